@@ -1,9 +1,7 @@
 import tkinter as tk
 from tkinter import messagebox
-import requests
 from gui_main import launch_main  # 👈 GUI-файл теперь только с launch_main()
-
-API_URL = "http://localhost:8000"
+from ui.api_client import api
 
 
 def login_window():
@@ -31,9 +29,7 @@ def login_window():
             messagebox.showwarning("Ошибка", "Введите имя пользователя")
             return
         try:
-            response = requests.post(
-                f"{API_URL}/auth/login", json={"username": username}, timeout=3
-            )
+            response = api.login(username)
             if response.status_code == 200:
                 role = response.json()["role"]
                 login.destroy()
@@ -0,0 +1,192 @@
+# backend/events.py
+# Push-уведомления клиентам (GET /events, Server-Sent Events): изменения
+# записей после коммита и захват/снятие блокировок — вместо постоянных
+# обновлений списков на клиентах.
+import asyncio
+import json
+import logging
+import queue
+import threading
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from backend import config
+from backend.sync import SYNC_ENTITIES
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+except ImportError:  # redis нужен только для EVENTS_BACKEND=redis
+    redis = None
+
+EVENTS_CHANNEL = "events"
+# Подписчик, не успевающий читать, отключается: клиент переподключится
+# и догонит пропущенное через журнал изменений (/changes)
+OVERFLOW = {"event": "resync"}
+
+
+class EventBroker:
+    """
+    Рассылка событий подписчикам GET /events. Публиковать можно из любого
+    потока: доставка идёт через call_soon_threadsafe в цикл подписчика.
+    С EVENTS_BACKEND=redis события проходят через канал Redis и доходят
+    до клиентов всех воркеров uvicorn.
+    """
+
+    def __init__(self, queue_size: int, redis_url=None):
+        self.queue_size = queue_size
+        self._subscribers = {}  # asyncio.Queue -> event loop подписчика
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+        self._redis = None
+        self._outbox = None
+        if redis_url:
+            if redis is None:
+                raise RuntimeError("Для EVENTS_BACKEND=redis установите пакет redis")
+            self._redis = redis.Redis.from_url(redis_url, decode_responses=True)
+            self._outbox = queue.Queue()
+            self._started = False
+
+    def start(self):
+        """Потоки обмена с Redis; без Redis ничего не делает"""
+        if self._redis is None or self._started:
+            return
+        self._started = True
+        threading.Thread(target=self._relay_out, name="events-out", daemon=True).start()
+        threading.Thread(target=self._relay_in, name="events-in", daemon=True).start()
+
+    def subscribe(self) -> asyncio.Queue:
+        events = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[events] = asyncio.get_running_loop()
+        return events
+
+    def unsubscribe(self, events: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(events, None)
+
+    def publish(self, data: dict):
+        self.published += 1
+        if self._outbox is not None:
+            # Сетевой вызов не должен держать поток запроса или event loop
+            self._outbox.put(data)
+        else:
+            self._dispatch(data)
+
+    def _dispatch(self, data: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for events, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, events, data)
+            except RuntimeError:  # цикл уже остановлен
+                self.unsubscribe(events)
+
+    def _deliver(self, events: asyncio.Queue, data: dict):
+        if events not in self._subscribers:  # уже отключён из-за переполнения
+            return
+        try:
+            events.put_nowait(data)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            self.unsubscribe(events)
+            events.get_nowait()  # место под уведомление о переполнении
+            events.put_nowait(OVERFLOW)
+
+    def _relay_out(self):
+        while True:
+            data = self._outbox.get()
+            try:
+                self._redis.publish(EVENTS_CHANNEL, json.dumps(data, ensure_ascii=False))
+            except Exception:
+                logger.exception("Ошибка публикации события в Redis")
+
+    def _relay_in(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(EVENTS_CHANNEL)
+                for message in pubsub.listen():
+                    self._dispatch(json.loads(message["data"]))
+            except Exception:
+                logger.exception("Ошибка подписки на события Redis, переподключение")
+                threading.Event().wait(1)
+
+    def stats(self):
+        with self._lock:
+            subscribers = len(self._subscribers)
+        return {
+            "backend": "redis" if self._redis is not None else "memory",
+            "subscribers": subscribers,
+            "published": self.published,
+            "dropped_subscribers": self.dropped,
+        }
+
+
+def create_broker() -> EventBroker:
+    if config.EVENTS_BACKEND == "redis":
+        return EventBroker(config.EVENTS_QUEUE_SIZE, config.EVENTS_REDIS_URL)
+    if config.EVENTS_BACKEND == "memory":
+        return EventBroker(config.EVENTS_QUEUE_SIZE)
+    raise RuntimeError(f"Неизвестный EVENTS_BACKEND: {config.EVENTS_BACKEND}")
+
+
+broker = create_broker()
+
+
+def publish_change(entity: str, created=(), updated=(), deleted=(), bulk: int = 0):
+    broker.publish(
+        {
+            "event": "change",
+            "entity": entity,
+            "created": list(created),
+            "updated": list(updated),
+            "deleted": list(deleted),
+            "bulk": bulk,
+        }
+    )
+
+
+def publish_lock(entity: str, entity_id: int, user: str, ttl: float):
+    # Публикуется и при продлении: клиент держит отметку блокировки ttl
+    # секунд с последнего события, истёкшая аренда гаснет сама
+    broker.publish({"event": "lock", "entity": entity, "id": entity_id, "user": user, "ttl": ttl})
+
+
+def publish_unlock(entity: str, entity_id: int, user: str):
+    broker.publish({"event": "unlock", "entity": entity, "id": entity_id, "user": user})
+
+
+def format_sse(data: dict) -> str:
+    return f"event: {data['event']}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+# Изменения через ORM собираются в сессии и рассылаются после коммита:
+# откаченная транзакция уведомлений не порождает
+def _collector(kind):
+    def collect(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            changes = session.info.setdefault("entity_changes", {})
+            entity = changes.setdefault(SYNC_ENTITIES[mapper.class_], {})
+            entity.setdefault(kind, []).append(target.id)
+
+    return collect
+
+
+for _model in SYNC_ENTITIES:
+    event.listen(_model, "after_insert", _collector("created"))
+    event.listen(_model, "after_update", _collector("updated"))
+    event.listen(_model, "after_delete", _collector("deleted"))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session):
+    for entity, changes in session.info.pop("entity_changes", {}).items():
+        publish_change(entity, **changes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop("entity_changes", None)
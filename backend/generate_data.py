@@ -0,0 +1,313 @@
+# backend/generate_data.py
+# Синтетические данные объёма продакшена: владельцы, инспекторы, ТС и протоколы
+# генерируются в памяти пачками и грузятся в PostgreSQL через COPY.
+import argparse
+import csv
+import io
+import random
+import time as timer
+from array import array
+from datetime import date, time, timedelta
+from itertools import accumulate
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from backend.database import engine
+from backend.models import (
+    Article,
+    Brand,
+    Color,
+    Inspector,
+    Model,
+    Owner,
+    Protocol,
+    Vehicle,
+    Violation,
+    ViolationType,
+)
+
+DEFAULT_BATCH_SIZE = 50_000
+
+LAST_NAMES = [
+    "Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов",
+    "Михайлов", "Новиков", "Фёдоров", "Морозов", "Волков", "Алексеев", "Лебедев",
+    "Семёнов", "Егоров", "Павлов", "Козлов", "Степанов", "Николаев", "Орлов",
+    "Андреев", "Макаров", "Никитин", "Захаров", "Зайцев", "Соловьёв", "Борисов",
+    "Яковлев", "Григорьев", "Романов", "Воробьёв", "Сергеев", "Кузьмин", "Фролов",
+]
+FIRST_NAMES = [
+    "Александр", "Сергей", "Дмитрий", "Андрей", "Алексей", "Максим", "Евгений",
+    "Иван", "Михаил", "Артём", "Николай", "Илья", "Владимир", "Павел", "Роман",
+    "Олег", "Денис", "Игорь", "Пётр", "Виктор", "Антон", "Юрий", "Кирилл",
+]
+MIDDLE_NAMES = [
+    "Александрович", "Сергеевич", "Дмитриевич", "Андреевич", "Алексеевич",
+    "Иванович", "Михайлович", "Николаевич", "Владимирович", "Павлович",
+    "Викторович", "Игоревич", "Петрович", "Юрьевич", "Олегович",
+]
+STREETS = [
+    "ул. Ленина", "пр. Мира", "ул. Гагарина", "ул. Советская", "ул. Садовая",
+    "ул. Лесная", "ул. Победы", "пр. Строителей", "ул. Школьная", "ул. Заречная",
+]
+DEPARTMENTS = [
+    "ГИБДД Центральный", "ГИБДД Восточный", "ГИБДД Западный",
+    "ГИБДД Северный", "ГИБДД Южный",
+]
+# Звание -> вес: младших чинов больше
+RANKS = {"лейтенант": 40, "старший лейтенант": 30, "капитан": 20, "майор": 8, "подполковник": 2}
+# Буквы, допустимые в госномерах РФ
+PLATE_LETTERS = "АВЕКМНОРСТУХ"
+PLATE_REGIONS = ["77", "97", "99", "177", "197", "50", "90", "150", "78", "98"]
+# Час выписки -> вес: пики в часы пик
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 9, 12, 9, 6, 5, 5, 5, 5, 6, 8, 12, 11, 7, 4, 3, 2, 1]
+
+# Справочники для пустой базы (те же, что в init_db.py)
+REFERENCE_BRANDS = {
+    "Toyota": ["Camry", "Corolla"],
+    "Ford": ["Focus", "Mondeo"],
+    "Kia": ["Rio", "Ceed"],
+}
+REFERENCE_COLORS = ["Белый", "Чёрный", "Серый", "Синий"]
+# (нарушение, тип, номер статьи, статья, относительная частота)
+REFERENCE_VIOLATIONS = [
+    ("Скорость > 60", "Движение", "12.1", "Превышение скорости", 60),
+    ("Красный свет", "Светофор", "12.2", "Проезд на красный", 15),
+    ("Стоянка на тротуаре", "Стоянка", "12.3", "Нарушение правил парковки", 25),
+]
+
+
+def ensure_reference_data(db):
+    """Справочники нужны для внешних ключей; в пустой базе создаются минимальные"""
+    if db.scalar(select(func.count(Violation.id))) and db.scalar(select(func.count(Model.id))):
+        return
+    print("Справочники пусты — заполняем минимальный набор")
+    for brand_name, models in REFERENCE_BRANDS.items():
+        brand = Brand(name=brand_name)
+        db.add(brand)
+        db.flush()
+        db.add_all([Model(name=name, brand_id=brand.id) for name in models])
+    db.add_all([Color(name=name) for name in REFERENCE_COLORS])
+    for name, type_name, number, article_name, _ in REFERENCE_VIOLATIONS:
+        violation_type = ViolationType(name=type_name)
+        article = Article(number=number, name=article_name)
+        db.add_all([violation_type, article])
+        db.flush()
+        db.add(Violation(name=name, violation_type_id=violation_type.id, article_id=article.id))
+    db.commit()
+
+
+def violation_weights(db):
+    """id нарушений и их частоты: известным — из REFERENCE_VIOLATIONS, прочим — 10"""
+    known = {name: weight for name, _, _, _, weight in REFERENCE_VIOLATIONS}
+    rows = db.execute(select(Violation.id, Violation.name).order_by(Violation.id)).all()
+    return [row.id for row in rows], [known.get(row.name, 10) for row in rows]
+
+
+def next_id(db, model):
+    return (db.scalar(select(func.max(model.id))) or 0) + 1
+
+
+def plate(n: int) -> str:
+    """Уникальный госномер по порядковому номеру: А123ВС77"""
+    letters = len(PLATE_LETTERS)
+    n, digits = divmod(n, 1000)
+    n, first = divmod(n, letters)
+    n, second = divmod(n, letters)
+    n, third = divmod(n, letters)
+    region = PLATE_REGIONS[n % len(PLATE_REGIONS)]
+    suffix = "" if n < len(PLATE_REGIONS) else str(n // len(PLATE_REGIONS))
+    return (
+        f"{PLATE_LETTERS[first]}{digits:03d}{PLATE_LETTERS[second]}"
+        f"{PLATE_LETTERS[third]}{region}{suffix}"
+    )
+
+
+def copy_rows(table: str, columns, rows, batch_size: int, bind=engine):
+    """
+    COPY ... FROM STDIN пачками по batch_size строк, каждая пачка — своя транзакция.
+    Печатает прогресс и скорость в строках в секунду.
+    """
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    started = timer.perf_counter()
+    total = 0
+    raw = bind.raw_connection()
+    try:
+        cursor = raw.cursor()
+        while True:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            count = 0
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+                if count == batch_size:
+                    break
+            if not count:
+                break
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            raw.commit()
+            total += count
+            elapsed = timer.perf_counter() - started
+            print(f"  {table}: {total} строк, {total / elapsed:.0f} строк/с", flush=True)
+            if count < batch_size:
+                break
+        cursor.close()
+    finally:
+        raw.close()
+    return total
+
+
+def reset_sequence(table: str, bind=engine):
+    with bind.begin() as conn:
+        conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+            )
+        )
+
+
+def person(rnd):
+    return rnd.choice(LAST_NAMES), rnd.choice(FIRST_NAMES), rnd.choice(MIDDLE_NAMES)
+
+
+def owner_rows(rnd, start, count):
+    today = date.today()
+    for owner_id in range(start, start + count):
+        last_name, first_name, middle_name = person(rnd)
+        # Возраст водителей 18–80, больше всего — 30–45
+        age_days = int(min(max(rnd.gauss(40, 11), 18), 80) * 365.25)
+        address = f"{rnd.choice(STREETS)}, {rnd.randint(1, 150)}, кв. {rnd.randint(1, 300)}"
+        yield (owner_id, last_name, first_name, middle_name,
+               today - timedelta(days=age_days), address, 1)
+
+
+def inspector_rows(rnd, start, count):
+    ranks, rank_weights = list(RANKS), list(RANKS.values())
+    for inspector_id in range(start, start + count):
+        last_name, first_name, middle_name = person(rnd)
+        rank = rnd.choices(ranks, rank_weights)[0]
+        yield (inspector_id, last_name, first_name, middle_name,
+               rnd.choice(DEPARTMENTS), rank, 1)
+
+
+def vehicle_rows(rnd, start, count, owner_ids, model_ids, color_ids, vehicle_owners):
+    # Цвета распределены неравномерно: первые в справочнике встречаются чаще
+    color_weights = [1 / (i + 1) for i in range(len(color_ids))]
+    for n, vehicle_id in enumerate(range(start, start + count)):
+        # Машина есть у каждого владельца; лишние ТС достаются случайным —
+        # у большинства одна машина, у части две-три
+        owner_id = owner_ids[n] if n < len(owner_ids) else rnd.choice(owner_ids)
+        vehicle_owners.append(owner_id)
+        yield (vehicle_id, plate(vehicle_id), rnd.choice(model_ids),
+               rnd.choices(color_ids, color_weights)[0], owner_id, 1)
+
+
+def protocol_rows(rnd, start, count, vehicle_ids, vehicle_owners, inspector_ids,
+                  violation_ids, violation_freq, days):
+    # Протоколы на ТС — с тяжёлым хвостом: немногие машины нарушают часто
+    vehicle_cum = list(accumulate(rnd.paretovariate(1.5) for _ in vehicle_ids))
+    violation_cum = list(accumulate(violation_freq))
+    hour_cum = list(accumulate(HOUR_WEIGHTS))
+    today = date.today()
+    for protocol_id in range(start, start + count):
+        index = rnd.choices(range(len(vehicle_ids)), cum_weights=vehicle_cum)[0]
+        issue_date = today - timedelta(days=rnd.randrange(days))
+        # По выходным нарушений фиксируют меньше
+        if issue_date.weekday() >= 5 and rnd.random() < 0.4:
+            issue_date -= timedelta(days=2)
+        hour = rnd.choices(range(24), cum_weights=hour_cum)[0]
+        yield (
+            protocol_id,
+            f"GEN-{protocol_id:09d}",
+            issue_date,
+            time(hour, rnd.randrange(60)),
+            vehicle_ids[index],
+            vehicle_owners[index],
+            rnd.choice(inspector_ids),
+            rnd.choices(violation_ids, cum_weights=violation_cum)[0],
+            1,
+        )
+
+
+def generate(owners: int, vehicles: int, inspectors: int, protocols: int,
+             days: int = 365, batch_size: int = DEFAULT_BATCH_SIZE, seed=None, bind=engine):
+    """bind — движок целевой базы; по умолчанию база из настроек (DB_URL)"""
+    if bind.dialect.name != "postgresql":
+        raise SystemExit("Генератор грузит данные через COPY и работает только с PostgreSQL")
+    rnd = random.Random(seed)
+    started = timer.perf_counter()
+
+    with Session(bind) as db:
+        ensure_reference_data(db)
+        model_ids = list(db.scalars(select(Model.id)))
+        color_ids = list(db.scalars(select(Color.id).order_by(Color.id)))
+        violation_ids, violation_freq = violation_weights(db)
+        owner_start = next_id(db, Owner)
+        inspector_start = next_id(db, Inspector)
+        vehicle_start = next_id(db, Vehicle)
+        protocol_start = next_id(db, Protocol)
+
+    print(f"Владельцы: {owners}")
+    copy_rows("owner", ["id", "last_name", "first_name", "middle_name",
+                        "date_of_birth", "address", "version"],
+              owner_rows(rnd, owner_start, owners), batch_size, bind)
+    print(f"Инспекторы: {inspectors}")
+    copy_rows("inspector", ["id", "last_name", "first_name", "middle_name",
+                            "department", "rank", "version"],
+              inspector_rows(rnd, inspector_start, inspectors), batch_size, bind)
+
+    owner_ids = array("l", range(owner_start, owner_start + owners))
+    rnd.shuffle(owner_ids)
+    vehicle_owners = array("l")
+    print(f"ТС: {vehicles}")
+    copy_rows("vehicle", ["id", "state_number", "model_id", "color_id", "owner_id", "version"],
+              vehicle_rows(rnd, vehicle_start, vehicles, owner_ids, model_ids, color_ids,
+                           vehicle_owners),
+              batch_size, bind)
+
+    print(f"Протоколы: {protocols}")
+    copy_rows("protocol", ["id", "number", "issue_date", "issue_time", "vehicle_id",
+                           "owner_id", "inspector_id", "violation_id", "version"],
+              protocol_rows(rnd, protocol_start, protocols,
+                            array("l", range(vehicle_start, vehicle_start + vehicles)),
+                            vehicle_owners,
+                            list(range(inspector_start, inspector_start + inspectors)),
+                            violation_ids, violation_freq, days),
+              batch_size, bind)
+
+    for table in ("owner", "inspector", "vehicle", "protocol"):
+        reset_sequence(table, bind)
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    print(f"Готово за {timer.perf_counter() - started:.1f} с")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Синтетические данные для нагрузочных тестов")
+    parser.add_argument("--protocols", type=int, default=100_000)
+    parser.add_argument("--owners", type=int, help="по умолчанию protocols / 5")
+    parser.add_argument("--vehicles", type=int, help="по умолчанию owners × 1.2")
+    parser.add_argument("--inspectors", type=int, help="по умолчанию protocols / 2000")
+    parser.add_argument("--days", type=int, default=365, help="период выписки протоколов")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, help="для воспроизводимых данных")
+    args = parser.parse_args()
+
+    owners = args.owners or max(args.protocols // 5, 1)
+    vehicles = args.vehicles or max(int(owners * 1.2), owners)
+    if vehicles < owners:
+        parser.error("ТС должно быть не меньше владельцев: у каждого владельца есть машина")
+    generate(
+        owners=owners,
+        vehicles=vehicles,
+        inspectors=args.inspectors or max(args.protocols // 2000, 1),
+        protocols=args.protocols,
+        days=args.days,
+        batch_size=args.batch_size,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# backend/http_cache.py
+# Условные GET для справочников: ETag по «отпечатку» таблиц
+# (число строк, max(id), сумма версий, max(updated_at)), Last-Modified
+# и 304 без выборки самих строк.
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# Клиент всегда переспрашивает сервер, но при совпадении ETag получает 304 без тела
+CACHE_CONTROL = "no-cache"
+
+
+class TableVersion:
+    """Валидаторы ответа по состоянию таблиц: ETag и Last-Modified"""
+
+    __slots__ = ("etag", "last_modified")
+
+    def __init__(self, etag: str, last_modified: Optional[datetime]):
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+def table_version(db: Session, *models) -> TableVersion:
+    """
+    Слабый ETag по состоянию таблиц — один запрос с агрегатами.
+    Меняется при вставке, удалении и любом изменении строки через ORM
+    (version или updated_at). Last-Modified — самый поздний updated_at.
+    """
+    columns = []
+    for model in models:
+        columns += [
+            select(func.count(model.id)).scalar_subquery(),
+            select(func.max(model.id)).scalar_subquery(),
+            select(func.coalesce(func.sum(model.version), 0)).scalar_subquery(),
+            select(func.max(model.updated_at)).scalar_subquery(),
+        ]
+    fingerprint = db.execute(select(*columns)).one()
+    raw = ":".join(model.__tablename__ for model in models) + repr(tuple(fingerprint))
+    updated = [_as_utc(value) for value in fingerprint[3::4] if value is not None]
+    return TableVersion(
+        f'W/"{hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]}"',
+        max(updated) if updated else None,
+    )
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite отдаёт время без часового пояса; PostgreSQL — в поясе сессии
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # HTTP-дата — с точностью до секунды
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Слабое сравнение (RFC 9110): префикс W/ не учитывается
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def not_modified(request: Request, response: Response, version: TableVersion) -> Optional[Response]:
+    """
+    Проставляет ETag и Last-Modified в ответ. Если у клиента та же версия —
+    возвращает готовый ответ 304, который эндпоинт отдаёт вместо данных.
+    If-None-Match главнее If-Modified-Since (RFC 9110): дата точна до секунды.
+    """
+    headers = {"ETag": version.etag, "Cache-Control": CACHE_CONTROL}
+    if version.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(version.last_modified, usegmt=True)
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match:
+        matched = _etag_matches(if_none_match, version.etag)
+    else:
+        matched = bool(
+            if_modified_since
+            and version.last_modified is not None
+            and _not_modified_since(if_modified_since, version.last_modified)
+        )
+    if matched:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
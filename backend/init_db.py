@@ -1,5 +1,8 @@
-from database import engine, db_session
-from models import (
+import argparse
+from backend.database import engine, SessionLocal
+from backend.generate_data import generate
+from backend.stats import install_stats_triggers
+from backend.models import (
     Base,
     Brand,
     Model,
@@ -14,11 +17,19 @@ from models import (
     UserAccount,
 )
 from datetime import date, time
+from sqlalchemy import text
+
+db_session = SessionLocal()
 
 
 def init_tables():
     print("Создание таблиц...")
+    # Расширение нужно до индексов поиска (pg_trgm) в create_all
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        install_stats_triggers(conn)
     print("Таблицы созданы")
 
 
@@ -207,9 +218,25 @@ def init_main_data():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Создание и заполнение базы")
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        metavar="PROTOCOLS",
+        help="догрузить синтетические данные через COPY (подробнее: python -m backend.generate_data -h)",
+    )
+    args = parser.parse_args()
+
     init_tables()
     try:
         init_reference_data()
         init_main_data()
     except Exception as e:
         print("Ошибка при инициализации:", e)
+    if args.synthetic:
+        generate(
+            owners=max(args.synthetic // 5, 1),
+            vehicles=max(args.synthetic * 6 // 25, 1),
+            inspectors=max(args.synthetic // 2000, 1),
+            protocols=args.synthetic,
+        )
@@ -0,0 +1,39 @@
+# backend/lock_reaper.py
+# Фоновая очистка истёкших блокировок вместо проверки при чтении
+import asyncio
+import logging
+from datetime import datetime
+from backend import config
+from backend.locks import lock_manager
+
+logger = logging.getLogger(__name__)
+
+reaper_stats = {
+    "runs": 0,
+    "errors": 0,
+    "leases_reaped": 0,
+    "last_run_at": None,
+}
+
+
+async def reap_expired_locks():
+    """
+    Один проход: истёкшие аренды в хранилище блокировок. Колонок
+    locked_by/locked_at в таблицах больше нет (миграции 0007, 0008).
+    """
+    leases = lock_manager.backend.purge_expired()
+
+    reaper_stats["runs"] += 1
+    reaper_stats["leases_reaped"] += leases
+    reaper_stats["last_run_at"] = datetime.utcnow().isoformat()
+    return leases
+
+
+async def run_lock_reaper():
+    while True:
+        await asyncio.sleep(config.LOCK_REAPER_INTERVAL_SECONDS)
+        try:
+            await reap_expired_locks()
+        except Exception:
+            reaper_stats["errors"] += 1
+            logger.exception("Ошибка очистки истёкших блокировок")
@@ -0,0 +1,283 @@
+# backend/locks.py
+# Блокировки редактирования: аренда (lease) с TTL вне строк сущностей.
+# Захват/снятие не пишет в БД — строка меняется только при реальном изменении.
+import threading
+import time
+from typing import Optional
+from backend import config
+from backend.events import publish_lock, publish_unlock
+
+try:
+    import redis
+except ImportError:  # redis нужен только для LOCK_BACKEND=redis
+    redis = None
+
+
+class MemoryLockBackend:
+    """Хранилище аренд в памяти процесса (один воркер uvicorn)"""
+
+    blocking = False
+
+    def __init__(self):
+        self._leases = {}  # key -> (owner, expires_at по time.monotonic)
+        self._lock = threading.Lock()
+
+    def _current(self, key, now):
+        lease = self._leases.get(key)
+        if lease and lease[1] <= now:
+            del self._leases[key]
+            return None
+        return lease
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            lease = self._current(key, now)
+            if lease and lease[0] != owner:
+                return False
+            self._leases[key] = (owner, now + ttl)
+            return True
+
+    def renew(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            lease = self._current(key, now)
+            if not lease or lease[0] != owner:
+                return False
+            self._leases[key] = (owner, now + ttl)
+            return True
+
+    def release(self, key: str, owner: str) -> bool:
+        with self._lock:
+            lease = self._current(key, time.monotonic())
+            if not lease or lease[0] != owner:
+                return False
+            del self._leases[key]
+            return True
+
+    def holder(self, key: str) -> Optional[str]:
+        with self._lock:
+            lease = self._current(key, time.monotonic())
+            return lease[0] if lease else None
+
+    def acquire_all(self, keys, owner: str, ttl: float) -> list:
+        """Все ключи или ни одного. Возвращает номера ключей, занятых другими"""
+        now = time.monotonic()
+        with self._lock:
+            conflicts = []
+            for i, key in enumerate(keys):
+                lease = self._current(key, now)
+                if lease and lease[0] != owner:
+                    conflicts.append(i)
+            if not conflicts:
+                for key in keys:
+                    self._leases[key] = (owner, now + ttl)
+            return conflicts
+
+    def purge_expired(self) -> int:
+        """Удаляет истёкшие аренды, возвращает их число"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._leases.items() if expires_at <= now]
+            for key in expired:
+                del self._leases[key]
+            return len(expired)
+
+    def active_count(self) -> int:
+        """Действующие аренды: истёкшие, ещё не удалённые очисткой, не считаются"""
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for _, expires_at in self._leases.values() if expires_at > now)
+
+    def release_all(self, keys, owner: str) -> list:
+        now = time.monotonic()
+        with self._lock:
+            released = []
+            for key in keys:
+                lease = self._current(key, now)
+                owned = bool(lease and lease[0] == owner)
+                if owned:
+                    del self._leases[key]
+                released.append(owned)
+            return released
+
+
+# Проверка владельца и изменение ключа — одной атомарной операцией на сервере
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+_ACQUIRE_ALL_SCRIPT = """
+local conflicts = {}
+for i, key in ipairs(KEYS) do
+    local current = redis.call('GET', key)
+    if current and current ~= ARGV[1] then
+        table.insert(conflicts, i - 1)
+    end
+end
+if #conflicts == 0 then
+    for _, key in ipairs(KEYS) do
+        redis.call('SET', key, ARGV[1], 'PX', ARGV[2])
+    end
+end
+return conflicts
+"""
+_RELEASE_ALL_SCRIPT = """
+local released = {}
+for i, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        released[i] = redis.call('DEL', key)
+    else
+        released[i] = 0
+    end
+end
+return released
+"""
+
+
+class RedisLockBackend:
+    """Хранилище аренд в Redis (или любом сервере с протоколом Redis) — общее для всех воркеров"""
+
+    blocking = True
+
+    def __init__(self, url: str, count_cache_seconds: float = 0):
+        if redis is None:
+            raise RuntimeError("Для LOCK_BACKEND=redis установите пакет redis")
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._count_cache_seconds = count_cache_seconds
+        self._count = (0, 0.0)  # (число блокировок, когда пересчитать по time.monotonic)
+        self._count_lock = threading.Lock()
+        self._renew = self._client.register_script(_RENEW_SCRIPT)
+        self._release = self._client.register_script(_RELEASE_SCRIPT)
+        self._acquire_all = self._client.register_script(_ACQUIRE_ALL_SCRIPT)
+        self._release_all = self._client.register_script(_RELEASE_ALL_SCRIPT)
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        ttl_ms = int(ttl * 1000)
+        if self._client.set(key, owner, nx=True, px=ttl_ms):
+            return True
+        # Повторный захват своей же блокировки продлевает аренду
+        return bool(self._renew(keys=[key], args=[owner, ttl_ms]))
+
+    def renew(self, key: str, owner: str, ttl: float) -> bool:
+        return bool(self._renew(keys=[key], args=[owner, int(ttl * 1000)]))
+
+    def release(self, key: str, owner: str) -> bool:
+        return bool(self._release(keys=[key], args=[owner]))
+
+    def holder(self, key: str) -> Optional[str]:
+        return self._client.get(key)
+
+    def purge_expired(self) -> int:
+        return 0  # Redis сам удаляет ключи по PX
+
+    def active_count(self) -> int:
+        """
+        SCAN по всем ключам — O(размер базы), поэтому не на каждый опрос /metrics:
+        значение пересчитывается не чаще раза в count_cache_seconds. Счётчик
+        в Lua-скриптах не подходит: ключи истекают по PX без участия скриптов
+        """
+        with self._count_lock:
+            count, refresh_at = self._count
+            if time.monotonic() < refresh_at:
+                return count
+            count = sum(1 for _ in self._client.scan_iter(match="lock:*", count=1000))
+            self._count = (count, time.monotonic() + self._count_cache_seconds)
+            return count
+
+    def acquire_all(self, keys, owner: str, ttl: float) -> list:
+        if not keys:
+            return []
+        return list(self._acquire_all(keys=list(keys), args=[owner, int(ttl * 1000)]))
+
+    def release_all(self, keys, owner: str) -> list:
+        if not keys:
+            return []
+        return [bool(n) for n in self._release_all(keys=list(keys), args=[owner])]
+
+
+class LockManager:
+    """Блокировки сущностей вида (entity, id) поверх выбранного хранилища"""
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def key(entity: str, entity_id: int) -> str:
+        return f"lock:{entity}:{entity_id}"
+
+    def acquire(self, entity: str, entity_id: int, user: str) -> bool:
+        """Захватить или продлить блокировку. False — держит другой пользователь"""
+        acquired = self.backend.acquire(self.key(entity, entity_id), user, self.ttl)
+        if acquired:
+            publish_lock(entity, entity_id, user, self.ttl)
+        return acquired
+
+    def renew(self, entity: str, entity_id: int, user: str) -> bool:
+        """Продлить свою блокировку. False — блокировки нет или она чужая"""
+        renewed = self.backend.renew(self.key(entity, entity_id), user, self.ttl)
+        if renewed:
+            publish_lock(entity, entity_id, user, self.ttl)
+        return renewed
+
+    def release(self, entity: str, entity_id: int, user: str) -> bool:
+        """Снять свою блокировку. False — блокировки нет или она чужая"""
+        released = self.backend.release(self.key(entity, entity_id), user)
+        if released:
+            publish_unlock(entity, entity_id, user)
+        return released
+
+    def holder(self, entity: str, entity_id: int) -> Optional[str]:
+        return self.backend.holder(self.key(entity, entity_id))
+
+    def acquire_many(self, items, user: str) -> list:
+        """
+        Захватить блокировки на все пары (entity, id) разом или ни на одну.
+        Возвращает номера пар, заблокированных другими пользователями.
+        """
+        keys = [self.key(entity, entity_id) for entity, entity_id in items]
+        conflicts = self.backend.acquire_all(keys, user, self.ttl)
+        if not conflicts:
+            for entity, entity_id in items:
+                publish_lock(entity, entity_id, user, self.ttl)
+        return conflicts
+
+    def release_many(self, items, user: str) -> list:
+        """Снять свои блокировки; для каждой пары — снята ли она"""
+        keys = [self.key(entity, entity_id) for entity, entity_id in items]
+        released = self.backend.release_all(keys, user)
+        for (entity, entity_id), owned in zip(items, released):
+            if owned:
+                publish_unlock(entity, entity_id, user)
+        return released
+
+    def is_locked_by_other(self, entity: str, entity_id: int, user: str) -> bool:
+        current = self.holder(entity, entity_id)
+        return current is not None and current != user
+
+
+def create_lock_manager() -> LockManager:
+    if config.LOCK_BACKEND == "redis":
+        backend = RedisLockBackend(config.LOCK_REDIS_URL, config.LOCK_REAPER_INTERVAL_SECONDS)
+    elif config.LOCK_BACKEND == "memory":
+        if config.WORKERS > 1:
+            raise RuntimeError(
+                f"LOCK_BACKEND=memory хранит блокировки в процессе, а воркеров {config.WORKERS}: "
+                "одну запись смогут заблокировать двое. Задайте LOCK_BACKEND=redis"
+            )
+        backend = MemoryLockBackend()
+    else:
+        raise RuntimeError(f"Неизвестный LOCK_BACKEND: {config.LOCK_BACKEND}")
+    return LockManager(backend, config.LOCK_TTL_SECONDS)
+
+
+lock_manager = create_lock_manager()
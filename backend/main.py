@@ -1,4 +1,12 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
+from backend.events import broker
+from backend.lock_reaper import run_lock_reaper
+from backend.prometheus import PrometheusMiddleware
+from backend.query_stats import QueryStatsMiddleware
+from backend.stats import run_stats_rebuilder
+from backend.sync import run_tombstone_pruner
 from backend.routers import (
     auth,
     owners,
@@ -7,16 +15,41 @@ from backend.routers import (
     protocols,
     violations,
     lock,
-    reports
+    events,
+    reports,
+    metrics,
+    search,
 )
 
-app = FastAPI(title="Система контроля правонарушений")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    broker.start()
+    tasks = [
+        asyncio.create_task(run_lock_reaper()),
+        asyncio.create_task(run_tombstone_pruner()),
+        asyncio.create_task(run_stats_rebuilder()),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+app = FastAPI(title="Система контроля правонарушений", lifespan=lifespan)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(PrometheusMiddleware)
 
 app.include_router(reports.router, prefix="/reports")
 app.include_router(lock.router)
+app.include_router(events.router)
 app.include_router(auth.router)
 app.include_router(owners.router, prefix="/owners")
 app.include_router(inspectors.router, prefix="/inspectors")
 app.include_router(vehicles.router, prefix="/vehicles")
 app.include_router(protocols.router, prefix="/protocols")
 app.include_router(violations.router, prefix="/violations")
+app.include_router(metrics.router, prefix="/metrics")
+app.include_router(search.router, prefix="/search")
@@ -0,0 +1,153 @@
+"""Исходная схема: таблицы, как их создаёт Base.metadata.create_all
+
+Для базы, уже созданной через init_db.py: alembic stamp head —
+init_db создаёт схему текущей версии, а не 0001
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-10-01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _lock_columns():
+    return [
+        sa.Column("locked_by", sa.String(), nullable=True),
+        sa.Column("locked_at", sa.DateTime(), nullable=True),
+    ]
+
+
+def _timestamps():
+    return [
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        "user_account",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(50), nullable=False, unique=True),
+        sa.Column("role", sa.String(20), nullable=False),
+    )
+    op.create_table(
+        "owner",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("last_name", sa.String(50), nullable=False),
+        sa.Column("first_name", sa.String(50), nullable=False),
+        sa.Column("middle_name", sa.String(50), nullable=False),
+        sa.Column("date_of_birth", sa.Date(), nullable=False),
+        sa.Column("address", sa.String(100), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        *_timestamps(),
+        *_lock_columns(),
+    )
+    op.create_table(
+        "inspector",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("last_name", sa.String(50), nullable=False),
+        sa.Column("first_name", sa.String(50), nullable=False),
+        sa.Column("middle_name", sa.String(50), nullable=False),
+        sa.Column("department", sa.String(100), nullable=False),
+        sa.Column("rank", sa.String(50), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        *_timestamps(),
+        *_lock_columns(),
+    )
+    op.create_table(
+        "brand",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(50), nullable=False, unique=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "model",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(50), nullable=False),
+        sa.Column("brand_id", sa.Integer(), sa.ForeignKey("brand.id"), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        *_lock_columns(),
+    )
+    op.create_table(
+        "color",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(30), nullable=False, unique=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        *_lock_columns(),
+    )
+    op.create_table(
+        "vehicle",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("state_number", sa.String(20), nullable=False, unique=True),
+        sa.Column("model_id", sa.Integer(), sa.ForeignKey("model.id"), nullable=False),
+        sa.Column("color_id", sa.Integer(), sa.ForeignKey("color.id"), nullable=False),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("owner.id"), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        *_timestamps(),
+        *_lock_columns(),
+    )
+    op.create_table(
+        "violation_type",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False, unique=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        *_lock_columns(),
+    )
+    op.create_table(
+        "article",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("number", sa.String(20), nullable=False),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        *_lock_columns(),
+    )
+    op.create_table(
+        "violation",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column(
+            "violation_type_id", sa.Integer(), sa.ForeignKey("violation_type.id"), nullable=False
+        ),
+        sa.Column("article_id", sa.Integer(), sa.ForeignKey("article.id"), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        *_timestamps(),
+        *_lock_columns(),
+    )
+    op.create_table(
+        "protocol",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("number", sa.String(20), nullable=False, unique=True),
+        sa.Column("issue_date", sa.Date(), nullable=False),
+        sa.Column("issue_time", sa.Time(), nullable=False),
+        sa.Column("vehicle_id", sa.Integer(), sa.ForeignKey("vehicle.id"), nullable=False),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("owner.id"), nullable=False),
+        sa.Column("inspector_id", sa.Integer(), sa.ForeignKey("inspector.id"), nullable=False),
+        sa.Column("violation_id", sa.Integer(), sa.ForeignKey("violation.id"), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        *_timestamps(),
+        *_lock_columns(),
+    )
+
+
+def downgrade():
+    for table in (
+        "protocol",
+        "violation",
+        "article",
+        "violation_type",
+        "vehicle",
+        "color",
+        "model",
+        "brand",
+        "inspector",
+        "owner",
+        "user_account",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,57 @@
+"""Индексы под поиск по имени, внешние ключи и keyset-пагинацию
+
+Индексы строятся CREATE INDEX CONCURRENTLY, чтобы не блокировать
+запись в большие таблицы (protocol, vehicle) на время построения.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-02
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (имя, таблица, колонки) — совпадает с индексами в backend/models.py
+INDEXES = [
+    ("ix_owner_full_name", "owner", ["last_name", "first_name", "middle_name"]),
+    ("ix_owner_last_name_id", "owner", ["last_name", "id"]),
+    ("ix_inspector_full_name", "inspector", ["last_name", "first_name", "middle_name"]),
+    ("ix_inspector_last_name_id", "inspector", ["last_name", "id"]),
+    ("ix_model_brand_id", "model", ["brand_id"]),
+    ("ix_model_name_brand_id", "model", ["name", "brand_id"]),
+    ("ix_vehicle_model_id", "vehicle", ["model_id"]),
+    ("ix_vehicle_color_id", "vehicle", ["color_id"]),
+    ("ix_vehicle_owner_id", "vehicle", ["owner_id"]),
+    ("ix_article_number", "article", ["number"]),
+    ("ix_violation_name", "violation", ["name"]),
+    ("ix_violation_violation_type_id", "violation", ["violation_type_id"]),
+    ("ix_violation_article_id", "violation", ["article_id"]),
+    ("ix_protocol_issue_date_id", "protocol", ["issue_date", "id"]),
+    ("ix_protocol_vehicle_id", "protocol", ["vehicle_id"]),
+    ("ix_protocol_owner_id", "protocol", ["owner_id"]),
+    ("ix_protocol_inspector_id", "protocol", ["inspector_id"]),
+    ("ix_protocol_violation_id", "protocol", ["violation_id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for table in dict.fromkeys(table for _, table, _ in INDEXES):
+            op.execute(f"ANALYZE {table}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,64 @@
+"""Журнал изменений: updated_at у каждой строки, индексы по нему, надгробия
+
+updated_at раньше заполнялся только при изменении строки; теперь он
+ставится и при вставке, а старые строки получают значение created_at.
+Обновление больших таблиц (protocol) идёт одним UPDATE и держит
+блокировку строк до конца — миграцию лучше запускать вне рабочего времени.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+TABLES = ["owner", "inspector", "vehicle", "violation", "protocol"]
+
+
+def upgrade():
+    for table in TABLES:
+        op.execute(
+            f"UPDATE {table} SET updated_at = coalesce(created_at, now()) WHERE updated_at IS NULL"
+        )
+        op.alter_column(table, "updated_at", server_default=sa.func.now())
+
+    op.create_table(
+        "tombstone",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("entity", sa.String(20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "deleted_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_tombstone_entity_deleted_at", "tombstone", ["entity", "deleted_at"], if_not_exists=True
+    )
+
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(
+                f"ix_{table}_updated_at",
+                table,
+                ["updated_at"],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table in reversed(TABLES):
+            op.drop_index(
+                f"ix_{table}_updated_at", table_name=table, postgresql_concurrently=True, if_exists=True
+            )
+    op.drop_index("ix_tombstone_entity_deleted_at", table_name="tombstone", if_exists=True)
+    op.drop_table("tombstone", if_exists=True)
+    for table in TABLES:
+        op.alter_column(table, "updated_at", server_default=None)
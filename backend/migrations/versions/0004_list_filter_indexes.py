@@ -0,0 +1,53 @@
+"""Индексы под фильтры и сортировки списков
+
+Протоколы инспектора за период — (inspector_id, issue_date, id): фильтр,
+диапазон дат и keyset-сортировка одним проходом по индексу. Он же
+покрывает поиск по одному inspector_id, так что прежний индекс удаляется.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# (имя, таблица, колонки) — совпадает с индексами в backend/models.py
+INDEXES = [
+    ("ix_inspector_department_id", "inspector", ["department", "id"]),
+    ("ix_protocol_inspector_id_issue_date_id", "protocol", ["inspector_id", "issue_date", "id"]),
+]
+REPLACED = [("ix_protocol_inspector_id", "protocol", ["inspector_id"])]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name, table, _ in REPLACED:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        for table in dict.fromkeys(table for _, table, _ in INDEXES):
+            op.execute(f"ANALYZE {table}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,43 @@
+"""Поиск: расширение pg_trgm и GiST-индексы по искомым полям
+
+GiST, а не GIN: кроме фильтра (%>, ILIKE) он отдаёт строки в порядке
+сходства (<->, <->>), и первые N результатов читаются без сортировки
+всех совпадений. CREATE EXTENSION требует прав владельца базы.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# (имя, таблица, выражение) — совпадает с trigram_index в backend/models.py
+INDEXES = [
+    ("ix_owner_full_name_trgm", "owner", "last_name || ' ' || first_name || ' ' || middle_name"),
+    ("ix_owner_address_trgm", "owner", "address"),
+    ("ix_vehicle_state_number_trgm", "vehicle", "state_number"),
+    ("ix_protocol_number_trgm", "protocol", "number"),
+    ("ix_violation_name_trgm", "violation", "name"),
+]
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, table, expression in INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {table} USING gist (({expression}) gist_trgm_ops)"
+            )
+        for table in dict.fromkeys(table for _, table, _ in INDEXES):
+            op.execute(f"ANALYZE {table}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
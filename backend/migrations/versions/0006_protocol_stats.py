@@ -0,0 +1,96 @@
+"""Сводка протоколов для /reports/stats: таблица, триггеры, начальное заполнение
+
+protocol_daily_stats — число протоколов за день по инспектору и нарушению.
+Её ведут триггеры уровня оператора на protocol, так что вставка через ORM,
+пакетный импорт и COPY учитываются одинаково. Триггеры создаются до
+заполнения: их блокировка держит запись в protocol до конца миграции,
+и протоколы, вставленные во время заполнения, не теряются.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# Совпадает с STATS_TRIGGER_SQL в backend/stats.py
+TRIGGER_SQL = [
+    """CREATE OR REPLACE FUNCTION protocol_stats_apply() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO protocol_daily_stats AS s (issue_date, inspector_id, violation_id, protocols)
+            SELECT issue_date, inspector_id, violation_id, count(*)
+            FROM new_rows GROUP BY issue_date, inspector_id, violation_id
+            ON CONFLICT (issue_date, inspector_id, violation_id)
+            DO UPDATE SET protocols = s.protocols + EXCLUDED.protocols;
+        ELSIF TG_OP = 'DELETE' THEN
+            INSERT INTO protocol_daily_stats AS s (issue_date, inspector_id, violation_id, protocols)
+            SELECT issue_date, inspector_id, violation_id, -count(*)
+            FROM old_rows GROUP BY issue_date, inspector_id, violation_id
+            ON CONFLICT (issue_date, inspector_id, violation_id)
+            DO UPDATE SET protocols = s.protocols + EXCLUDED.protocols;
+        ELSE
+            INSERT INTO protocol_daily_stats AS s (issue_date, inspector_id, violation_id, protocols)
+            SELECT issue_date, inspector_id, violation_id, sum(delta)
+            FROM (
+                SELECT issue_date, inspector_id, violation_id, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT issue_date, inspector_id, violation_id, -1 AS delta FROM old_rows
+            ) changes
+            GROUP BY issue_date, inspector_id, violation_id
+            HAVING sum(delta) <> 0
+            ON CONFLICT (issue_date, inspector_id, violation_id)
+            DO UPDATE SET protocols = s.protocols + EXCLUDED.protocols;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS protocol_stats_insert ON protocol",
+    """CREATE TRIGGER protocol_stats_insert AFTER INSERT ON protocol
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION protocol_stats_apply()
+    """,
+    "DROP TRIGGER IF EXISTS protocol_stats_update ON protocol",
+    """CREATE TRIGGER protocol_stats_update AFTER UPDATE ON protocol
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION protocol_stats_apply()
+    """,
+    "DROP TRIGGER IF EXISTS protocol_stats_delete ON protocol",
+    """CREATE TRIGGER protocol_stats_delete AFTER DELETE ON protocol
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION protocol_stats_apply()
+    """,
+]
+
+
+def upgrade():
+    op.create_table(
+        "protocol_daily_stats",
+        sa.Column("issue_date", sa.Date(), primary_key=True),
+        sa.Column("inspector_id", sa.Integer(), primary_key=True),
+        sa.Column("violation_id", sa.Integer(), primary_key=True),
+        sa.Column("protocols", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    for statement in TRIGGER_SQL:
+        op.execute(statement)
+    op.execute("DELETE FROM protocol_daily_stats")
+    op.execute(
+        "INSERT INTO protocol_daily_stats (issue_date, inspector_id, violation_id, protocols) "
+        "SELECT issue_date, inspector_id, violation_id, count(*) FROM protocol "
+        "GROUP BY issue_date, inspector_id, violation_id"
+    )
+
+
+def downgrade():
+    for trigger in ("protocol_stats_delete", "protocol_stats_update", "protocol_stats_insert"):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON protocol")
+    op.execute("DROP FUNCTION IF EXISTS protocol_stats_apply()")
+    op.drop_table("protocol_daily_stats")
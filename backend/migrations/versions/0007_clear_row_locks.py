@@ -0,0 +1,41 @@
+"""Однократная очистка locked_by/locked_at в строках
+
+С переходом на менеджер блокировок (backend/locks.py) колонки никто
+не пишет; оставшиеся в них отметки снимаются здесь один раз, а не
+периодическим UPDATE в фоне. Обычный UPDATE, а не ORM: updated_at
+не меняется, и строки не попадают в журнал /changes.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+TABLES = [
+    "vehicle",
+    "owner",
+    "inspector",
+    "protocol",
+    "violation",
+    "model",
+    "color",
+    "article",
+    "violation_type",
+]
+
+
+def upgrade():
+    for table in TABLES:
+        op.execute(
+            f"UPDATE {table} SET locked_by = NULL, locked_at = NULL "
+            f"WHERE locked_by IS NOT NULL OR locked_at IS NOT NULL"
+        )
+
+
+def downgrade():
+    pass  # снятые отметки не восстанавливаются
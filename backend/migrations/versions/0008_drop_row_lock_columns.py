@@ -0,0 +1,42 @@
+"""Удаление колонок locked_by/locked_at
+
+Блокировки живут в менеджере блокировок (backend/locks.py), колонки
+очищены миграцией 0007 и в ответах API всегда были бы пустыми.
+DROP COLUMN в PostgreSQL меняет только каталог — таблица не переписывается.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+TABLES = [
+    "vehicle",
+    "owner",
+    "inspector",
+    "protocol",
+    "violation",
+    "model",
+    "color",
+    "article",
+    "violation_type",
+]
+
+
+def upgrade():
+    for table in TABLES:
+        op.execute(
+            f"ALTER TABLE {table} DROP COLUMN IF EXISTS locked_by, DROP COLUMN IF EXISTS locked_at"
+        )
+
+
+def downgrade():
+    for table in TABLES:
+        op.add_column(table, sa.Column("locked_by", sa.String(), nullable=True), if_not_exists=True)
+        op.add_column(table, sa.Column("locked_at", sa.DateTime(), nullable=True), if_not_exists=True)
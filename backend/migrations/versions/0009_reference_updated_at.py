@@ -0,0 +1,34 @@
+"""updated_at у справочников — для ETag и Last-Modified
+
+Отпечаток справочника (backend/http_cache.py) учитывает max(updated_at):
+правка строки без увеличения version тоже меняет ETag. Существующие
+строки получают время миграции; ADD COLUMN с DEFAULT now() в PostgreSQL 11+
+не переписывает таблицу.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+TABLES = ["brand", "model", "color", "violation_type", "article"]
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS updated_at")
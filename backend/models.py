@@ -1,9 +1,26 @@
-from sqlalchemy import Column, Integer, String, Date, Time, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Date, Time, ForeignKey, DateTime, Index, func, text
 from sqlalchemy.orm import relationship, declarative_base
 
 Base = declarative_base()
 
 
+def trigram_index(name, *columns, expression=None):
+    """
+    GiST-индекс pg_trgm для поиска (GET /search): частичные совпадения
+    и выдача в порядке сходства. Только PostgreSQL, нужно расширение pg_trgm.
+    """
+    if expression is not None:
+        index = Index(name, text(f"({expression}) gist_trgm_ops"), postgresql_using="gist")
+    else:
+        index = Index(
+            name,
+            *columns,
+            postgresql_using="gist",
+            postgresql_ops={column: "gist_trgm_ops" for column in columns},
+        )
+    return index.ddl_if(dialect="postgresql")
+
+
 class UserAccount(Base):
     __tablename__ = "user_account"
     id = Column(Integer, primary_key=True)
@@ -13,6 +30,19 @@ class UserAccount(Base):
 
 class Owner(Base):
     __tablename__ = "owner"
+    __table_args__ = (
+        # Поиск по ФИО при создании ТС/протоколов и проверке дублей
+        Index("ix_owner_full_name", "last_name", "first_name", "middle_name"),
+        # Keyset-пагинация списка владельцев
+        Index("ix_owner_last_name_id", "last_name", "id"),
+        # Журнал изменений: GET /owners/changes?since=
+        Index("ix_owner_updated_at", "updated_at"),
+        trigram_index(
+            "ix_owner_full_name_trgm",
+            expression="last_name || ' ' || first_name || ' ' || middle_name",
+        ),
+        trigram_index("ix_owner_address_trgm", "address"),
+    )
     id = Column(Integer, primary_key=True)
     last_name = Column(String(50), nullable=False)
     first_name = Column(String(50), nullable=False)
@@ -22,13 +52,18 @@ class Owner(Base):
     version = Column(Integer, default=1, nullable=False)
     vehicles = relationship("Vehicle", back_populates="owner", cascade="all, delete")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    locked_by = Column(String, nullable=True)
-    locked_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class Inspector(Base):
     __tablename__ = "inspector"
+    __table_args__ = (
+        Index("ix_inspector_full_name", "last_name", "first_name", "middle_name"),
+        Index("ix_inspector_last_name_id", "last_name", "id"),
+        # Фильтр и сортировка списка по отделу
+        Index("ix_inspector_department_id", "department", "id"),
+        Index("ix_inspector_updated_at", "updated_at"),
+    )
     id = Column(Integer, primary_key=True)
     last_name = Column(String(50), nullable=False)
     first_name = Column(String(50), nullable=False)
@@ -38,9 +73,7 @@ class Inspector(Base):
     version = Column(Integer, default=1, nullable=False)
     protocols = relationship("Protocol", back_populates="inspector")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    locked_by = Column(String, nullable=True)
-    locked_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class Brand(Base):
@@ -48,18 +81,20 @@ class Brand(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(50), unique=True, nullable=False)
     version = Column(Integer, default=1, nullable=False)
+    # Для ETag справочников: правка без увеличения version тоже меняет отпечаток
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class Model(Base):
     __tablename__ = "model"
+    __table_args__ = (Index("ix_model_name_brand_id", "name", "brand_id"),)
     id = Column(Integer, primary_key=True)
     name = Column(String(50), nullable=False)
-    brand_id = Column(Integer, ForeignKey("brand.id"), nullable=False)
+    brand_id = Column(Integer, ForeignKey("brand.id"), nullable=False, index=True)
     version = Column(Integer, default=1, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     brand = relationship("Brand")
     vehicles = relationship("Vehicle", back_populates="model", cascade="all, delete")
-    locked_by = Column(String, nullable=True)
-    locked_at = Column(DateTime, nullable=True)
 
 
 class Color(Base):
@@ -67,26 +102,27 @@ class Color(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(30), unique=True, nullable=False)
     version = Column(Integer, default=1, nullable=False)
-    locked_by = Column(String, nullable=True)
-    locked_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class Vehicle(Base):
     __tablename__ = "vehicle"
+    __table_args__ = (
+        Index("ix_vehicle_updated_at", "updated_at"),
+        trigram_index("ix_vehicle_state_number_trgm", "state_number"),
+    )
     id = Column(Integer, primary_key=True)
     state_number = Column(String(20), unique=True, nullable=False)
-    model_id = Column(Integer, ForeignKey("model.id"), nullable=False)
-    color_id = Column(Integer, ForeignKey("color.id"), nullable=False)
-    owner_id = Column(Integer, ForeignKey("owner.id"), nullable=False)
+    model_id = Column(Integer, ForeignKey("model.id"), nullable=False, index=True)
+    color_id = Column(Integer, ForeignKey("color.id"), nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey("owner.id"), nullable=False, index=True)
     version = Column(Integer, default=1, nullable=False)
     model = relationship("Model", back_populates="vehicles")
     color = relationship("Color")
     owner = relationship("Owner", back_populates="vehicles")
     protocols = relationship("Protocol", back_populates="vehicle")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    locked_by = Column(String, nullable=True)
-    locked_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class ViolationType(Base):
@@ -94,52 +130,79 @@ class ViolationType(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(100), unique=True, nullable=False)
     version = Column(Integer, default=1, nullable=False)
-    locked_by = Column(String, nullable=True)
-    locked_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class Article(Base):
     __tablename__ = "article"
     id = Column(Integer, primary_key=True)
-    number = Column(String(20), nullable=False)
+    number = Column(String(20), nullable=False, index=True)
     name = Column(String(100), nullable=False)
     version = Column(Integer, default=1, nullable=False)
-    locked_by = Column(String, nullable=True)
-    locked_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class Violation(Base):
     __tablename__ = "violation"
+    __table_args__ = (
+        Index("ix_violation_updated_at", "updated_at"),
+        trigram_index("ix_violation_name_trgm", "name"),
+    )
     id = Column(Integer, primary_key=True)
-    name = Column(String(100), nullable=False)
-    violation_type_id = Column(Integer, ForeignKey("violation_type.id"), nullable=False)
-    article_id = Column(Integer, ForeignKey("article.id"), nullable=False)
+    name = Column(String(100), nullable=False, index=True)
+    violation_type_id = Column(
+        Integer, ForeignKey("violation_type.id"), nullable=False, index=True
+    )
+    article_id = Column(Integer, ForeignKey("article.id"), nullable=False, index=True)
     version = Column(Integer, default=1, nullable=False)
     violation_type = relationship("ViolationType")
     article = relationship("Article")
     protocols = relationship("Protocol", back_populates="violation")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    locked_by = Column(String, nullable=True)
-    locked_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class Protocol(Base):
     __tablename__ = "protocol"
+    __table_args__ = (
+        Index("ix_protocol_issue_date_id", "issue_date", "id"),
+        # Протоколы инспектора за период, в порядке дат
+        Index("ix_protocol_inspector_id_issue_date_id", "inspector_id", "issue_date", "id"),
+        Index("ix_protocol_updated_at", "updated_at"),
+        trigram_index("ix_protocol_number_trgm", "number"),
+    )
     id = Column(Integer, primary_key=True)
     number = Column(String(20), unique=True, nullable=False)
     issue_date = Column(Date, nullable=False)
     issue_time = Column(Time, nullable=False)
-    vehicle_id = Column(Integer, ForeignKey("vehicle.id"), nullable=False)
-    owner_id = Column(Integer, ForeignKey("owner.id"), nullable=False)
+    vehicle_id = Column(Integer, ForeignKey("vehicle.id"), nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey("owner.id"), nullable=False, index=True)
     inspector_id = Column(Integer, ForeignKey("inspector.id"), nullable=False)
-    violation_id = Column(Integer, ForeignKey("violation.id"), nullable=False)
+    violation_id = Column(Integer, ForeignKey("violation.id"), nullable=False, index=True)
     version = Column(Integer, default=1, nullable=False)
     vehicle = relationship("Vehicle", back_populates="protocols")
     owner = relationship("Owner")
     inspector = relationship("Inspector", back_populates="protocols")
     violation = relationship("Violation", back_populates="protocols")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    locked_by = Column(String, nullable=True)
-    locked_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ProtocolDailyStats(Base):
+    # Число протоколов за день по инспектору и нарушению — основа /reports/stats.
+    # В PostgreSQL ведётся триггерами на protocol (backend/stats.py)
+    __tablename__ = "protocol_daily_stats"
+    issue_date = Column(Date, primary_key=True)
+    inspector_id = Column(Integer, primary_key=True)
+    violation_id = Column(Integer, primary_key=True)
+    protocols = Column(Integer, nullable=False)
+
+
+class Tombstone(Base):
+    # Удалённые записи — для журнала изменений клиентов (GET /<коллекция>/changes)
+    __tablename__ = "tombstone"
+    __table_args__ = (Index("ix_tombstone_entity_deleted_at", "entity", "deleted_at"),)
+    id = Column(Integer, primary_key=True)
+    entity = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,86 @@
+# backend/pagination.py
+import base64
+import json
+from datetime import date, datetime, time
+from typing import Optional
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _dump_value(value):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+
+def _load_value(column, value):
+    python_type = column.type.python_type
+    if value is None or isinstance(value, python_type):
+        return value
+    if python_type in (date, datetime, time):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(keys, row):
+    """Курсор — значения ключей сортировки последней строки страницы."""
+    values = [_dump_value(getattr(row, key.key)) for key in keys]
+    raw = json.dumps(values, ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(keys, cursor: str):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if len(values) != len(keys):
+            raise ValueError("cursor length mismatch")
+        return [_load_value(key, value) for key, value in zip(keys, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+def sort_keys(sort: str, options: dict):
+    """
+    Ключи сортировки по имени из белого списка options (имя -> ключи,
+    последний — уникальный). "-имя" — по убыванию. Возвращает (ключи, по убыванию).
+    """
+    descending = sort.startswith("-")
+    keys = options.get(sort[1:] if descending else sort)
+    if keys is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Недопустимая сортировка: {sort}. Доступны: {', '.join(options)}",
+        )
+    return keys, descending
+
+
+def page_query(query, keys, limit: int, after: Optional[str], descending: bool = False):
+    """
+    Keyset-выборка: строки сортируются по keys и начинаются строго после
+    курсора after. Берётся на одну строку больше, чтобы понять, есть ли
+    следующая страница. Подходит и для Query, и для select().
+    """
+    if after:
+        row_key, cursor_key = tuple_(*keys), tuple_(*decode_cursor(keys, after))
+        query = query.filter(row_key < cursor_key if descending else row_key > cursor_key)
+    order = [key.desc() for key in keys] if descending else keys
+    return query.order_by(*order).limit(limit + 1)
+
+
+def trim_page(rows, keys, limit: int, response: Response):
+    """
+    Обрезает лишнюю строку и отдаёт курсор следующей страницы
+    в заголовке X-Next-Cursor (нет заголовка — страница последняя).
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(keys, rows[-1])
+    return rows
+
+
+def paginate(query, keys, limit: int, after: Optional[str], response: Response):
+    return trim_page(page_query(query, keys, limit, after).all(), keys, limit, response)
@@ -0,0 +1,161 @@
+# backend/prometheus.py
+# Метрики в текстовом формате Prometheus без сторонних зависимостей:
+# гистограммы длительности по маршрутам, счётчики ответов и конфликтов,
+# датчики блокировок и пула соединений (считаются в момент опроса).
+import threading
+import time
+from bisect import bisect_left
+from backend.database import pool_stats
+from backend.locks import lock_manager
+from backend.security import role_cache
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Границы корзин гистограммы, секунды
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = "unmatched"  # 404 по произвольным путям не плодят новые ряды
+# Потоковые ответы открыты минутами и часами: для них меряется время
+# до начала ответа (http.response.start), а не время жизни соединения
+STREAMING_ROUTES = frozenset({"/events", "/reports/owners/stream"})
+
+
+def is_streaming_route(scope) -> bool:
+    route = scope.get("route")
+    return route is not None and route.path in STREAMING_ROUTES
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (method, route) -> [счётчики корзин..., +Inf, сумма секунд]
+        self._durations = {}
+        self._responses = {}  # (method, route, status) -> число
+        self._conflicts = {}  # (entity, kind) -> число
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        bucket = bisect_left(DURATION_BUCKETS, seconds)
+        with self._lock:
+            series = self._durations.get((method, route))
+            if series is None:
+                series = self._durations[(method, route)] = [0] * (len(DURATION_BUCKETS) + 1) + [0.0]
+            series[bucket] += 1
+            series[-1] += seconds
+            key = (method, route, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def count_conflict(self, entity: str, kind: str, n: int = 1):
+        """kind: lock — запись заблокирована, version — устаревшая версия, duplicate — дубль"""
+        with self._lock:
+            key = (entity, kind)
+            self._conflicts[key] = self._conflicts.get(key, 0) + n
+
+    def render(self) -> str:
+        with self._lock:
+            durations = {key: list(series) for key, series in self._durations.items()}
+            responses = dict(self._responses)
+            conflicts = dict(self._conflicts)
+
+        lines = []
+        _header(lines, "http_request_duration_seconds", "histogram", "Длительность запросов по маршрутам")
+        for (method, route), series in sorted(durations.items()):
+            labels = {"method": method, "route": route}
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS + ("+Inf",), series):
+                cumulative += count
+                _sample(lines, "http_request_duration_seconds_bucket", dict(labels, le=str(bound)), cumulative)
+            _sample(lines, "http_request_duration_seconds_sum", labels, round(series[-1], 6))
+            _sample(lines, "http_request_duration_seconds_count", labels, cumulative)
+
+        _header(lines, "http_responses_total", "counter", "Ответы по маршрутам и кодам")
+        for (method, route, status), count in sorted(responses.items()):
+            _sample(lines, "http_responses_total", {"method": method, "route": route, "status": str(status)}, count)
+
+        _header(lines, "edit_conflicts_total", "counter", "Конфликты редактирования по типам сущностей")
+        for (entity, kind), count in sorted(conflicts.items()):
+            _sample(lines, "edit_conflicts_total", {"entity": entity, "kind": kind}, count)
+
+        _header(lines, "edit_locks_active", "gauge", "Активные блокировки редактирования")
+        _sample(lines, "edit_locks_active", {"backend": type(lock_manager.backend).__name__},
+                lock_manager.backend.active_count())
+
+        pools = pool_stats()
+        for name, key, kind, help_text in (
+            ("db_pool_size", "size", "gauge", "Размер пула соединений"),
+            ("db_pool_checked_out", "checked_out", "gauge", "Выданные соединения"),
+            ("db_pool_checked_in", "checked_in", "gauge", "Свободные соединения в пуле"),
+            ("db_pool_overflow", "overflow", "gauge", "Соединения сверх pool_size"),
+            ("db_pool_checkouts_total", "checkouts", "counter", "Выдачи соединений"),
+            ("db_pool_timeouts_total", "timeouts", "counter", "Таймауты ожидания соединения"),
+            ("db_pool_connect_errors_total", "connect_errors", "counter", "Ошибки подключения к базе"),
+            ("db_pool_wait_seconds_total", "wait_seconds_total", "counter", "Суммарное ожидание соединения"),
+            ("db_pool_wait_seconds_max", "wait_seconds_max", "gauge", "Максимальное ожидание соединения"),
+        ):
+            _header(lines, name, kind, help_text)
+            for engine_name, pool in pools.items():
+                _sample(lines, name, {"engine": engine_name}, pool[key])
+
+        cache = role_cache.stats()
+        for name, key, kind, help_text in (
+            ("role_cache_hits_total", "hits", "counter", "Попадания в кэш ролей"),
+            ("role_cache_misses_total", "misses", "counter", "Промахи кэша ролей"),
+        ):
+            _header(lines, name, kind, help_text)
+            _sample(lines, name, {}, cache[key])
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _header(lines, name, kind, help_text):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _sample(lines, name, labels, value):
+    if labels:
+        label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        lines.append(f"{name}{{{label_text}}} {value}")
+    else:
+        lines.append(f"{name} {value}")
+
+
+metrics = Metrics()
+
+
+class PrometheusMiddleware:
+    """
+    ASGI-middleware: длительность и код ответа каждого запроса по шаблону маршрута.
+    Для потоковых маршрутов (STREAMING_ROUTES) — время до начала ответа.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        elapsed = None
+
+        async def send_with_status(message):
+            nonlocal status, elapsed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if is_streaming_route(scope):
+                    elapsed = time.perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            metrics.observe_request(
+                scope["method"],
+                route.path if route else UNMATCHED_ROUTE,
+                status,
+                elapsed if elapsed is not None else time.perf_counter() - started,
+            )
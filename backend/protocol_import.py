@@ -0,0 +1,167 @@
+# backend/protocol_import.py
+# Пакетный импорт протоколов: внешние ключи разрешаются по именам
+# несколькими запросами на пачку, вставка — одним executemany.
+import json
+from pydantic import ValidationError
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from backend.models import Protocol, Vehicle, Owner, Inspector, Violation
+from backend.schemas import ProtocolImportRow
+
+BULK_BATCH_SIZE = 1000
+
+
+def parse_json_array(body: bytes):
+    rows = json.loads(body)
+    if not isinstance(rows, list):
+        raise ValueError("Ожидается JSON-массив протоколов")
+    return rows
+
+
+def _parse_ndjson_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return line.decode("utf-8", "replace")  # станет строкой со статусом invalid
+
+
+async def aiter_ndjson(chunks):
+    """
+    Асинхронный поток байтов NDJSON -> объекты, без чтения тела целиком.
+    Пустые строки пропускаются.
+    """
+    tail = b""
+    async for chunk in chunks:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield _parse_ndjson_line(line)
+    if tail.strip():
+        yield _parse_ndjson_line(tail)
+
+
+def _split_name(full_name: str):
+    parts = full_name.split(" ")
+    return (parts[0], parts[1]) if len(parts) == 2 else None
+
+
+def _first_ids(rows):
+    """key -> id первой найденной записи (как .first() в одиночном add_protocol)"""
+    ids = {}
+    for key, entity_id in rows:
+        ids.setdefault(key, entity_id)
+    return ids
+
+
+def _resolve_people(db: Session, model, names):
+    if not names:
+        return {}
+    rows = db.execute(
+        select(model.last_name, model.first_name, model.id)
+        .where(tuple_(model.last_name, model.first_name).in_(names))
+        .order_by(model.id)
+    )
+    return _first_ids(((last, first), entity_id) for last, first, entity_id in rows)
+
+
+def import_batch(db: Session, raw_rows, start: int = 0):
+    """
+    Импортирует пачку строк одной транзакцией. Возвращает результат
+    по каждой строке: created, exists, invalid, unresolved или error.
+    Ошибка БД не прерывает импорт — строки пачки получают error.
+    """
+    results = [None] * len(raw_rows)
+    parsed = {}
+    for i, raw in enumerate(raw_rows):
+        try:
+            if not isinstance(raw, dict):
+                raise ValueError("строка не является JSON-объектом")
+            row = ProtocolImportRow(**raw)
+            owner, inspector = _split_name(row.owner), _split_name(row.inspector)
+            if not owner or not inspector:
+                raise ValueError("владелец и инспектор указываются как 'Фамилия Имя'")
+            parsed[i] = (row, owner, inspector)
+        except (ValidationError, ValueError, TypeError) as e:
+            results[i] = {"row": start + i, "status": "invalid", "detail": str(e)}
+
+    try:
+        _resolve_and_insert(db, parsed, results, start)
+    except SQLAlchemyError as e:
+        # Номер успели занять параллельно, таймаут, обрыв соединения — пачка
+        # откатывается целиком, её строки без итогового статуса и созданные
+        # получают error; прежние пачки уже зафиксированы и остаются
+        db.rollback()
+        detail = str(getattr(e, "orig", None) or e)
+        for i, (row, _, _) in parsed.items():
+            result = results[i]
+            if result is None:
+                results[i] = {"row": start + i, "number": row.number, "status": "error", "detail": detail}
+            elif result["status"] == "created":
+                result["status"] = "error"
+                result["detail"] = detail
+    return results
+
+
+def _insert_rows(db: Session, to_insert):
+    db.execute(insert(Protocol), to_insert)
+    db.commit()
+
+
+def _resolve_and_insert(db: Session, parsed, results, start: int):
+    """Внешние ключи пачки по именам и вставка; results заполняется на месте"""
+    rows = [row for row, _, _ in parsed.values()]
+    numbers = {row.number for row in rows}
+    existing = set(
+        db.scalars(select(Protocol.number).where(Protocol.number.in_(numbers)))
+    ) if numbers else set()
+    vehicles = _first_ids(
+        db.execute(
+            select(Vehicle.state_number, Vehicle.id).where(
+                Vehicle.state_number.in_({row.vehicle for row in rows})
+            )
+        )
+    ) if rows else {}
+    owners = _resolve_people(db, Owner, {owner for _, owner, _ in parsed.values()})
+    inspectors = _resolve_people(db, Inspector, {insp for _, _, insp in parsed.values()})
+    violations = _first_ids(
+        db.execute(
+            select(Violation.name, Violation.id)
+            .where(Violation.name.in_({row.violation for row in rows}))
+            .order_by(Violation.id)
+        )
+    ) if rows else {}
+
+    to_insert = []
+    seen = set()
+    for i, (row, owner, inspector) in parsed.items():
+        result = {"row": start + i, "number": row.number}
+        if row.number in existing or row.number in seen:
+            result["status"] = "exists"
+        else:
+            ids = {
+                "vehicle_id": vehicles.get(row.vehicle),
+                "owner_id": owners.get(owner),
+                "inspector_id": inspectors.get(inspector),
+                "violation_id": violations.get(row.violation),
+            }
+            missing = [name[:-3] for name, value in ids.items() if value is None]
+            if missing:
+                result["status"] = "unresolved"
+                result["detail"] = "Не найдены: " + ", ".join(missing)
+            else:
+                seen.add(row.number)
+                to_insert.append(
+                    {
+                        "number": row.number,
+                        "issue_date": row.issue_date,
+                        "issue_time": row.issue_time,
+                        **ids,
+                    }
+                )
+                result["status"] = "created"
+        results[i] = result
+
+    if to_insert:
+        _insert_rows(db, to_insert)
@@ -0,0 +1,195 @@
+# backend/query_stats.py
+# Число SQL-запросов и время в БД на каждый HTTP-запрос.
+# События SQLAlchemy пишут в объект текущего запроса (contextvar),
+# middleware отдаёт итог в Server-Timing и копит агрегаты по маршрутам.
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from backend import config
+from backend.database import async_engine, engine
+from backend.prometheus import UNMATCHED_ROUTE, is_streaming_route
+
+STATEMENT_PREVIEW_CHARS = 500
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_query_stats", default=None)
+
+
+class RequestQueryStats:
+    __slots__ = ("count", "db_seconds", "slowest_seconds", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+
+    def add(self, statement: str, seconds: float):
+        self.count += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def server_timing(self, total_seconds: float) -> str:
+        return (
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.count} queries", '
+            f"app;dur={total_seconds * 1000:.2f}"
+        )
+
+
+# Время начала хранится в контексте выполнения оператора, а не в соединении:
+# оператор с ошибкой (например, отменённый statement_timeout) не доходит
+# до after_cursor_execute и учитывается в handle_error
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _record_statement(context, statement):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    del context._query_started
+    stats = _current.get()
+    if stats is not None:
+        stats.add(statement, time.perf_counter() - started)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_statement(context, statement)
+
+
+def _handle_error(exception_context):
+    _record_statement(exception_context.execution_context, exception_context.statement)
+
+
+def install_query_hooks(sync_engine):
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+install_query_hooks(engine)
+install_query_hooks(async_engine.sync_engine)
+
+
+class RouteQueryStats:
+    """Агрегаты по маршрутам: запросы, время в БД, самый медленный запрос"""
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, stats: RequestQueryStats, total_seconds: float):
+        with self._lock:
+            item = self._routes.get(route)
+            if item is None:
+                item = self._routes[route] = {
+                    "requests": 0,
+                    "queries": 0,
+                    "max_queries": 0,
+                    "db_seconds": 0.0,
+                    "total_seconds": 0.0,
+                    "slowest_query_ms": 0.0,
+                    "slowest_statement": None,
+                }
+            item["requests"] += 1
+            item["queries"] += stats.count
+            item["max_queries"] = max(item["max_queries"], stats.count)
+            item["db_seconds"] += stats.db_seconds
+            item["total_seconds"] += total_seconds
+            if stats.slowest_seconds * 1000 > item["slowest_query_ms"]:
+                item["slowest_query_ms"] = stats.slowest_seconds * 1000
+                item["slowest_statement"] = stats.slowest_statement[:STATEMENT_PREVIEW_CHARS]
+
+    def snapshot(self):
+        """Маршруты по убыванию среднего числа запросов — самые «болтливые» сверху"""
+        with self._lock:
+            routes = {route: dict(item) for route, item in self._routes.items()}
+        result = []
+        for route, item in routes.items():
+            requests = item["requests"]
+            result.append(
+                {
+                    "route": route,
+                    "requests": requests,
+                    "avg_queries": round(item["queries"] / requests, 2),
+                    "max_queries": item["max_queries"],
+                    "avg_db_ms": round(item["db_seconds"] / requests * 1000, 2),
+                    "avg_total_ms": round(item["total_seconds"] / requests * 1000, 2),
+                    "slowest_query_ms": round(item["slowest_query_ms"], 2),
+                    "slowest_statement": item["slowest_statement"],
+                }
+            )
+        return sorted(result, key=lambda r: r["avg_queries"], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_query_stats = RouteQueryStats()
+
+
+def _route_name(scope) -> str:
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route else UNMATCHED_ROUTE}"
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI-middleware: Server-Timing и X-DB-Query-Count в каждом ответе,
+    агрегаты по маршрутам и лог медленных запросов (config.SLOW_REQUEST_MS).
+    У потоковых ответов заголовки отражают запросы только до начала тела,
+    агрегаты — все; время для агрегатов и лога у потоковых маршрутов
+    (STREAMING_ROUTES) — до начала ответа, а не время жизни соединения.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        elapsed = None
+
+        async def send_with_timing(message):
+            nonlocal elapsed
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+                headers[QUERY_COUNT_HEADER] = str(stats.count)
+                if is_streaming_route(scope):
+                    elapsed = time.perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if elapsed is None:
+                elapsed = time.perf_counter() - started
+            route = _route_name(scope)
+            route_query_stats.record(route, stats, elapsed)
+            if config.SLOW_REQUEST_MS and elapsed * 1000 >= config.SLOW_REQUEST_MS:
+                logger.warning(
+                    "Медленный запрос %s: %.0f мс, запросов: %d, в БД: %.0f мс, "
+                    "самый медленный (%.0f мс): %s",
+                    route,
+                    elapsed * 1000,
+                    stats.count,
+                    stats.db_seconds * 1000,
+                    stats.slowest_seconds * 1000,
+                    (stats.slowest_statement or "")[:STATEMENT_PREVIEW_CHARS],
+                )
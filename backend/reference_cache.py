@@ -0,0 +1,141 @@
+# backend/reference_cache.py
+# Справочники (марки, модели, цвета, типы нарушений, статьи) в памяти процесса:
+# разрешение name -> id на путях записи без запросов к БД.
+import threading
+import time
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from backend import config
+from backend.models import Article, Brand, Color, Model, ViolationType
+
+
+class ReferenceCache:
+    """
+    Снимок справочников целиком, с TTL. Изменения через ORM сбрасывают
+    снимок сразу; изменения в обход ORM (другой воркер, COPY) видны
+    не позже чем через TTL. Промах по имени проверяется в БД — новая
+    запись, которой ещё нет в снимке, не будет создана повторно.
+    Снимок грузится вне блокировки; если за это время был invalidate(),
+    загруженный снимок отдаётся вызвавшему, но не сохраняется.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot = None
+        self._expires_at = 0.0
+        self._generation = 0  # растёт при каждом invalidate()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def _load(self, db: Session):
+        brands = dict(db.execute(select(Brand.id, Brand.name)).all())
+        models = db.execute(select(Model.id, Model.name, Model.brand_id)).all()
+        colors = db.execute(select(Color.id, Color.name)).all()
+        types = db.execute(select(ViolationType.id, ViolationType.name)).all()
+        articles = db.execute(select(Article.id, Article.number).order_by(Article.id)).all()
+        snapshot = {
+            "model_id": {(name, brands[brand_id]): id for id, name, brand_id in models},
+            "color_id": {name: id for id, name in colors},
+            "violation_type_id": {name: id for id, name in types},
+            # Номер статьи не уникален в схеме — берётся первая, как .first()
+            "article_id": {},
+        }
+        for id, number in articles:
+            snapshot["article_id"].setdefault(number, id)
+        return snapshot
+
+    def _get(self, db: Session):
+        with self._lock:
+            if self._snapshot is not None and self._expires_at > time.monotonic():
+                return self._snapshot
+            generation = self._generation
+        snapshot = self._load(db)
+        with self._lock:
+            self.loads += 1
+            # Загрузка началась до изменения справочника — снимок мог устареть
+            if self._generation == generation:
+                self._snapshot = snapshot
+                self._expires_at = time.monotonic() + self.ttl
+        return snapshot
+
+    def _lookup(self, db: Session, table: str, key, fallback):
+        value = self._get(db)[table].get(key)
+        with self._lock:
+            if value is not None:
+                self.hits += 1
+                return value
+            self.misses += 1
+        # Нет в снимке: либо записи нет, либо снимок устарел
+        value = fallback()
+        if value is not None:
+            self.invalidate()
+        return value
+
+    def model_id(self, db: Session, model_name: str, brand_name: str):
+        return self._lookup(
+            db, "model_id", (model_name, brand_name),
+            lambda: db.scalar(
+                select(Model.id).join(Brand).where(Model.name == model_name, Brand.name == brand_name)
+            ),
+        )
+
+    def color_id(self, db: Session, name: str):
+        return self._lookup(
+            db, "color_id", name, lambda: db.scalar(select(Color.id).where(Color.name == name))
+        )
+
+    def violation_type_id(self, db: Session, name: str):
+        return self._lookup(
+            db, "violation_type_id", name,
+            lambda: db.scalar(select(ViolationType.id).where(ViolationType.name == name)),
+        )
+
+    def article_id(self, db: Session, number: str):
+        return self._lookup(
+            db, "article_id", number,
+            lambda: db.scalar(select(Article.id).where(Article.number == number).order_by(Article.id)),
+        )
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "loaded": self._snapshot is not None,
+                "ttl_seconds": self.ttl,
+                "loads": self.loads,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+reference_cache = ReferenceCache(config.REFERENCE_CACHE_TTL_SECONDS)
+
+REFERENCE_MODELS = (Brand, Model, Color, ViolationType, Article)
+
+
+# Запись в справочник через ORM сбрасывает снимок сразу и ещё раз после
+# коммита — чтобы снимок, загруженный до коммита, не пережил изменение
+def _invalidate_reference(mapper, connection, target):
+    reference_cache.invalidate()
+    session = object_session(target)
+    if session is not None:
+        session.info["reference_changed"] = True
+
+
+for _model in REFERENCE_MODELS:
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _invalidate_reference)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("reference_changed", False):
+        reference_cache.invalidate()
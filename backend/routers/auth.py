@@ -1,15 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session 
-from backend.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import get_async_db
 from backend.models import UserAccount
 from backend.schemas import UserLogin, UserInfo
+from backend.security import role_cache
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/login", response_model=UserInfo)
-def login(data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(UserAccount).filter_by(username=data.username).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Пользователь не найден")
-    return {"username": user.username, "role": user.role}
\ No newline at end of file
+async def login(data: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    role = role_cache.get(data.username)
+    if role is None:
+        user = await db.scalar(
+            select(UserAccount).filter_by(username=data.username).limit(1)
+        )
+        if not user:
+            raise HTTPException(status_code=404, detail="Пользователь не найден")
+        role = user.role
+        role_cache.put(data.username, role)
+    return {"username": data.username, "role": role}
\ No newline at end of file
@@ -0,0 +1,43 @@
+import asyncio
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from backend import config
+from backend.events import OVERFLOW, broker, format_sse
+
+router = APIRouter(tags=["events"])
+
+
+@router.get("/events")
+async def stream_events():
+    """
+    Поток Server-Sent Events: change — записи коллекции изменены (id новых,
+    изменённых и удалённых), lock/unlock — захват и снятие блокировок,
+    resync — часть событий потеряна, списки нужно сверить через /changes.
+    Первым приходит ready: подписка действует, события с этого момента не
+    теряются.
+    """
+    events = broker.subscribe()
+
+    async def stream():
+        try:
+            yield format_sse({"event": "ready"})
+            while True:
+                try:
+                    data = await asyncio.wait_for(
+                        events.get(), timeout=config.EVENTS_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Комментарий держит соединение через прокси и выявляет отключившихся
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(data)
+                if data is OVERFLOW:
+                    return
+        finally:
+            broker.unsubscribe(events)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,19 +1,64 @@
-from fastapi import APIRouter, HTTPException
-from backend.database import get_db
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import get_async_db, get_db
 from sqlalchemy.orm import Session
 from fastapi import Depends
 from backend.models import Inspector, UserAccount
-from backend.schemas import InspectorBase, InspectorOut, InspectorUpdate
+from backend.schemas import InspectorBase, InspectorChanges, InspectorOut, InspectorUpdate
 from backend.security import check_role
-from datetime import datetime
-from backend.utils import get_entity_or_404
+from backend.locks import lock_manager
+from backend.utils import check_lock, conflict, get_entity_or_404
+from backend.sync import change_feed
+from backend.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    page_query,
+    sort_keys,
+    trim_page,
+)
 
 router = APIRouter(tags=["inspectors"])
 
+# Допустимые значения sort: у каждой сортировки есть индекс под keyset-выборку
+INSPECTOR_SORTS = {
+    "last_name": (Inspector.last_name, Inspector.id),
+    "department": (Inspector.department, Inspector.id),
+    "id": (Inspector.id,),
+}
+
 
 @router.get("", response_model=list[InspectorOut])
-def get_inspectors(db: Session = Depends(get_db)):
-    return db.query(Inspector).order_by(Inspector.last_name).all()
+async def get_inspectors(
+    response: Response,
+    last_name: Optional[str] = None,
+    first_name: Optional[str] = None,
+    department: Optional[str] = None,
+    sort: str = Query("last_name", description="last_name, department или id, '-' — по убыванию"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Фильтры — точное совпадение; имя уточняет фамилию (индекс по ФИО)"""
+    keys, descending = sort_keys(sort, INSPECTOR_SORTS)
+    query = select(Inspector)
+    if last_name:
+        query = query.where(Inspector.last_name == last_name)
+    if first_name:
+        query = query.where(Inspector.first_name == first_name)
+    if department:
+        query = query.where(Inspector.department == department)
+    inspectors = (await db.scalars(page_query(query, keys, limit, after, descending))).all()
+    return trim_page(inspectors, keys, limit, response)
+
+
+@router.get("/changes", response_model=InspectorChanges)
+async def get_inspector_changes(
+    since: Optional[datetime] = None, db: AsyncSession = Depends(get_async_db)
+):
+    return await change_feed(db, Inspector, select(Inspector), since)
 
 
 @router.post("", status_code=201)  # Исправлено: добавил слэш
@@ -30,7 +75,7 @@ def add_inspector(data: InspectorBase, db: Session = Depends(get_db)):
         .first()
     )
     if exists:
-        raise HTTPException(status_code=409, detail="Инспектор уже существует")
+        raise conflict("inspector", "duplicate", "Инспектор уже существует")
 
     inspector = Inspector(**data.dict(exclude={"user"}))  # Исключаем user из данных
     db.add(inspector)
@@ -45,15 +90,14 @@ def update_inspector(inspector_id: int, data: InspectorUpdate, db: Session = Dep
     inspector = get_entity_or_404(db, Inspector, inspector_id)
 
     # Проверка блокировки
-    if inspector.locked_by and inspector.locked_by != data.user:
-        raise HTTPException(
-            status_code=409, detail="Инспектор редактируется другим пользователем"
-        )
+    check_lock(
+        "inspector", inspector_id, data.user, "Инспектор редактируется другим пользователем"
+    )
 
     # Проверка версии
     if inspector.version != data.version:
-        raise HTTPException(
-            status_code=409, detail="Инспектор был изменён другим пользователем"
+        raise conflict(
+            "inspector", "version", "Инспектор был изменён другим пользователем"
         )
 
     # Обновляем поля
@@ -61,10 +105,9 @@ def update_inspector(inspector_id: int, data: InspectorUpdate, db: Session = Dep
         setattr(inspector, field, value)
 
     inspector.version += 1
-    inspector.locked_by = None # Разблокируем после успешного обновления
-    inspector.locked_at = None 
 
     db.commit()
+    lock_manager.release("inspector", inspector_id, data.user)  # Разблокируем после успешного обновления
     return {"status": "updated", "new_version": inspector.version}
 
 
@@ -78,30 +121,17 @@ def get_inspector(inspector_id: int, db: Session = Depends(get_db)):
 
 @router.post("/lock/{inspector_id}")
 def lock_inspector(inspector_id: int, user: str, db: Session = Depends(get_db)):
-    inspector = get_entity_or_404(db, Inspector, inspector_id)
-    
-    if not inspector:
-        raise HTTPException(status_code=404, detail="Инспектор не найден")
+    get_entity_or_404(db, Inspector, inspector_id)
 
-    if inspector.locked_by and inspector.locked_by != user:
-        raise HTTPException(
-            status_code=409, detail="Инспектор уже редактируется другим пользователем"
+    if not lock_manager.acquire("inspector", inspector_id, user):
+        raise conflict(
+            "inspector", "lock", "Инспектор уже редактируется другим пользователем"
         )
-
-    inspector.locked_by = user
-    inspector.locked_at = datetime.utcnow()
-    db.commit()
     return {"status": "locked"}
 
 
 @router.post("/unlock/{inspector_id}")
-def unlock_inspector(inspector_id: int, user: str, db: Session = Depends(get_db)):
-    inspector = get_entity_or_404(db, Inspector, inspector_id)
-
-    if inspector.locked_by != user:
+def unlock_inspector(inspector_id: int, user: str):
+    if not lock_manager.release("inspector", inspector_id, user):
         raise HTTPException(status_code=403, detail="Вы не владелец блокировки")
-
-    inspector.locked_by = None
-    inspector.locked_at = None
-    db.commit()
     return {"status": "unlocked"}
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
-from backend.database import get_db
-from sqlalchemy.orm import Session 
-from backend.database import get_db
-from datetime import datetime, timedelta
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import get_async_db
+from backend.locks import lock_manager
+from backend.prometheus import metrics
+from backend.schemas import LockBatchRequest, LockBatchResult
 from backend.models import (
     Vehicle,
     Owner,
@@ -14,6 +17,7 @@ from backend.models import (
     Article,
     ViolationType,
 )
+from backend.utils import conflict
 
 router = APIRouter(tags=["locks"])
 
@@ -30,46 +34,97 @@ MODEL_MAP = {
 }
 
 
-@router.post("/lock/{entity}/{id}")
-def lock_entity(entity: str, id: int, user: str, db: Session = Depends(get_db)):
+async def call_lock_manager(method, *args):
+    # Redis-клиент синхронный — уводим его вызовы из event loop
+    if lock_manager.backend.blocking:
+        return await run_in_threadpool(method, *args)
+    return method(*args)
+
+
+def get_model_or_400(entity: str):
     model = MODEL_MAP.get(entity)
     if not model:
         raise HTTPException(status_code=400, detail="Неизвестный тип сущности")
+    return model
+
+
+@router.post("/lock/{entity}/{id}")
+async def lock_entity(
+    entity: str, id: int, user: str, db: AsyncSession = Depends(get_async_db)
+):
+    model = get_model_or_400(entity)
 
-    obj = db.query(model).get(id)
-    if not obj:
+    exists = await db.scalar(select(model.id).where(model.id == id))
+    if not exists:
         raise HTTPException(status_code=404, detail="Объект не найден")
 
-    # Авторазблокировка по таймауту
-    if obj.locked_at and datetime.utcnow() - obj.locked_at > timedelta(minutes=1):
-        obj.locked_by = None
-        obj.locked_at = None
+    if not await call_lock_manager(lock_manager.acquire, entity, id, user):
+        raise conflict(entity, "lock", "Объект редактируется другим пользователем")
+    return {"status": "locked", "ttl": lock_manager.ttl}
 
-    if obj.locked_by and obj.locked_by != user:
-        raise HTTPException(
-            status_code=409, detail="Объект редактируется другим пользователем"
-        )
 
-    obj.locked_by = user
-    obj.locked_at = datetime.utcnow()
-    db.commit()
-    return {"status": "locked"}
+@router.post("/renew/{entity}/{id}")
+async def renew_lock(entity: str, id: int, user: str):
+    get_model_or_400(entity)
 
+    if not await call_lock_manager(lock_manager.renew, entity, id, user):
+        raise conflict(entity, "lock", "Блокировка истекла или принадлежит другому пользователю")
+    return {"status": "renewed", "ttl": lock_manager.ttl}
 
-@router.post("/unlock/{entity}/{id}")
-def unlock_entity(entity: str, id: int, user: str, db: Session = Depends(get_db)):
-    model = MODEL_MAP.get(entity)
-    if not model:
-        raise HTTPException(status_code=400, detail="Неизвестный тип сущности")
 
-    obj = db.query(model).get(id)
-    if not obj:
-        raise HTTPException(status_code=404, detail="Объект не найден")
+@router.post("/unlock/{entity}/{id}")
+async def unlock_entity(entity: str, id: int, user: str):
+    get_model_or_400(entity)
 
-    if obj.locked_by != user:
+    if not await call_lock_manager(lock_manager.release, entity, id, user):
         raise HTTPException(status_code=403, detail="Вы не владелец блокировки")
-
-    obj.locked_by = None
-    obj.locked_at = None
-    db.commit()
     return {"status": "unlocked"}
+
+
+async def find_missing(db: AsyncSession, items):
+    """Номера пар (entity, id), для которых нет записи, — один запрос на тип"""
+    ids_by_entity = {}
+    for item in items:
+        ids_by_entity.setdefault(item.entity, set()).add(item.id)
+    existing = set()
+    for entity, ids in ids_by_entity.items():
+        model = MODEL_MAP[entity]
+        found = await db.scalars(select(model.id).where(model.id.in_(ids)))
+        existing.update((entity, entity_id) for entity_id in found)
+    return {i for i, item in enumerate(items) if (item.entity, item.id) not in existing}
+
+
+@router.post("/locks/batch", response_model=LockBatchResult)
+async def lock_batch(data: LockBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Снимает блокировки из unlock и захватывает блокировки из lock одним запросом.
+    Захват атомарный: либо блокируются все записи из lock, либо ни одна.
+    """
+    for item in data.lock + data.unlock:
+        get_model_or_400(item.entity)
+
+    results = []
+    unlock_pairs = [(item.entity, item.id) for item in data.unlock]
+    released = await call_lock_manager(lock_manager.release_many, unlock_pairs, data.user)
+    for item, was_released in zip(data.unlock, released):
+        status = "unlocked" if was_released else "not_owner"
+        results.append({"entity": item.entity, "id": item.id, "action": "unlock", "status": status})
+
+    missing = await find_missing(db, data.lock)
+    conflicts = set()
+    if not missing:
+        lock_pairs = [(item.entity, item.id) for item in data.lock]
+        conflicts = set(await call_lock_manager(lock_manager.acquire_many, lock_pairs, data.user))
+        for i in conflicts:
+            metrics.count_conflict(data.lock[i].entity, "lock")
+    ok = not missing and not conflicts
+    for i, item in enumerate(data.lock):
+        if i in missing:
+            status = "not_found"
+        elif i in conflicts:
+            status = "conflict"
+        else:
+            status = "locked" if ok else "skipped"
+        results.append({"entity": item.entity, "id": item.id, "action": "lock", "status": status})
+
+    return {"ok": ok, "results": results}
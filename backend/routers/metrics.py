@@ -0,0 +1,59 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from backend.database import pool_stats
+from backend.events import broker
+from backend.lock_reaper import reaper_stats
+from backend.locks import lock_manager
+from backend.prometheus import CONTENT_TYPE, metrics
+from backend.query_stats import route_query_stats
+from backend.reference_cache import reference_cache
+from backend.security import role_cache
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("")
+def get_prometheus_metrics():
+    """Все метрики в текстовом формате Prometheus — для scrape"""
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+
+@router.get("/pool")
+def get_pool_stats():
+    """Состояние пулов соединений с БД: sync и async"""
+    return pool_stats()
+
+
+@router.get("/locks")
+def get_lock_stats():
+    """Активные блокировки и счётчики фоновой очистки"""
+    return {
+        "backend": type(lock_manager.backend).__name__,
+        "ttl_seconds": lock_manager.ttl,
+        "active": lock_manager.backend.active_count(),
+        "reaper": reaper_stats,
+    }
+
+
+@router.get("/role-cache")
+def get_role_cache_stats():
+    """Попадания и промахи кэша ролей"""
+    return role_cache.stats()
+
+
+@router.get("/reference-cache")
+def get_reference_cache_stats():
+    """Попадания и промахи кэша справочников"""
+    return reference_cache.stats()
+
+
+@router.get("/queries")
+def get_query_stats():
+    """SQL-запросы и время в БД по маршрутам, самые «болтливые» — первыми"""
+    return route_query_stats.snapshot()
+
+
+@router.get("/events")
+def get_event_stats():
+    """Подписчики потока /events и число разосланных событий"""
+    return broker.stats()
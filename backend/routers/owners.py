@@ -1,18 +1,60 @@
 from datetime import datetime
-from fastapi import APIRouter, HTTPException
-from backend.database import get_db
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import get_async_db, get_db
 from sqlalchemy.orm import Session
 from fastapi import Depends
 from backend.models import Owner, UserAccount
-from backend.schemas import OwnerBase, OwnerOut, OwnerUpdate
+from backend.schemas import OwnerBase, OwnerChanges, OwnerOut, OwnerUpdate
 from backend.security import check_role
+from backend.locks import lock_manager
+from backend.utils import check_lock, conflict, get_entity_or_404
+from backend.sync import change_feed
+from backend.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    page_query,
+    sort_keys,
+    trim_page,
+)
 
 router = APIRouter(tags=["owners"])
 
+# Допустимые значения sort: у каждой сортировки есть индекс под keyset-выборку
+OWNER_SORTS = {
+    "last_name": (Owner.last_name, Owner.id),
+    "id": (Owner.id,),
+}
+
 
 @router.get("", response_model=list[OwnerOut])
-def get_owners(db: Session = Depends(get_db)):
-    return db.query(Owner).order_by(Owner.last_name).all()
+async def get_owners(
+    response: Response,
+    last_name: Optional[str] = None,
+    first_name: Optional[str] = None,
+    sort: str = Query("last_name", description="last_name или id, '-' — по убыванию"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Фильтры — точное совпадение; имя уточняет фамилию (индекс по ФИО)"""
+    keys, descending = sort_keys(sort, OWNER_SORTS)
+    query = select(Owner)
+    if last_name:
+        query = query.where(Owner.last_name == last_name)
+    if first_name:
+        query = query.where(Owner.first_name == first_name)
+    owners = (await db.scalars(page_query(query, keys, limit, after, descending))).all()
+    return trim_page(owners, keys, limit, response)
+
+
+@router.get("/changes", response_model=OwnerChanges)
+async def get_owner_changes(
+    since: Optional[datetime] = None, db: AsyncSession = Depends(get_async_db)
+):
+    return await change_feed(db, Owner, select(Owner), since)
 
 
 @router.post("", status_code=201)
@@ -29,7 +71,7 @@ def add_owner(data: OwnerBase, db: Session = Depends(get_db)):
         .first()
     )
     if exists:
-        raise HTTPException(status_code=409, detail="Владелец уже существует")
+        raise conflict("owner", "duplicate", "Владелец уже существует")
 
     owner = Owner(**data.dict(exclude={"user"}))
     db.add(owner)
@@ -51,14 +93,11 @@ def update_owner(owner_id: int, data: OwnerUpdate, db: Session = Depends(get_db)
     if not owner:
         raise HTTPException(status_code=404, detail="Владелец не найден")
 
-    if owner.locked_by and owner.locked_by != data.user:
-        raise HTTPException(
-            status_code=409, detail="Владелец редактируется другим пользователем"
-        )
+    check_lock("owner", owner_id, data.user, "Владелец редактируется другим пользователем")
 
     if owner.version != data.version:
-        raise HTTPException(
-            status_code=409, detail="Владелец был изменён другим пользователем"
+        raise conflict(
+            "owner", "version", "Владелец был изменён другим пользователем"
         )
 
     for field, value in data.dict(exclude={"user", "version"}).items():
@@ -66,36 +105,25 @@ def update_owner(owner_id: int, data: OwnerUpdate, db: Session = Depends(get_db)
     owner.version += 1
 
     db.commit()
+    lock_manager.release("owner", owner_id, data.user)
     return {"status": "updated", "new_version": owner.version}
 
 
 @router.post("/lock/{owner_id}")
 def lock_owner(owner_id: int, user: str, db: Session = Depends(get_db)):
-    owner = db.query(Owner).filter(Owner.id == owner_id).first()
-    if not owner:
-        raise HTTPException(status_code=404, detail="Владелец не найден")
+    get_entity_or_404(db, Owner, owner_id)
 
-    if owner.locked_by and owner.locked_by != user:
-        raise HTTPException(
-            status_code=409, detail="Владелец уже редактируется другим пользователем"
+    if not lock_manager.acquire("owner", owner_id, user):
+        raise conflict(
+            "owner", "lock", "Владелец уже редактируется другим пользователем"
         )
-
-    owner.locked_by = user
-    owner.locked_at = datetime.utcnow() 
-    db.commit()
     return {"status": "locked"}
 
 
 @router.post("/unlock/{owner_id}")
-def unlock_owner(owner_id: int, user: str, db: Session = Depends(get_db)):
-    owner = db.query(Owner).filter(Owner.id == owner_id).first()
-    if not owner:
-        raise HTTPException(status_code=404, detail="Владелец не найден")
-    if owner.locked_by != user:
+def unlock_owner(owner_id: int, user: str):
+    if not lock_manager.release("owner", owner_id, user):
         raise HTTPException(status_code=403, detail="Вы не владелец блокировки")
-    owner.locked_by = None
-    owner.locked_at = None
-    db.commit()
     return {"status": "unlocked"}
 
 
@@ -1,33 +1,126 @@
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from backend.database import get_db
+from backend.database import get_async_db, get_db
 from backend.models import Protocol, Vehicle, Owner, Inspector, Violation, UserAccount
-from backend.schemas import ProtocolBase, ProtocolOut, ProtocolUpdate
+from backend.schemas import (
+    ProtocolBase,
+    ProtocolChanges,
+    ProtocolImportSummary,
+    ProtocolOut,
+    ProtocolUpdate,
+)
 from backend.security import check_role
+from backend.locks import lock_manager
+from backend.utils import check_lock, conflict, get_entity_or_404
+from backend.sync import change_feed
+from backend.events import publish_change
+from backend.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    page_query,
+    sort_keys,
+    trim_page,
+)
+from backend.protocol_import import (
+    BULK_BATCH_SIZE,
+    aiter_ndjson,
+    import_batch,
+    parse_json_array,
+)
 
 router = APIRouter(tags=["protocols"])
 
 
-@router.get("", response_model=list[ProtocolOut])
-def get_protocols(db: Session = Depends(get_db)):
-    protocols = db.query(Protocol).all()
-    result = []
-    for p in protocols:
-        result.append(
-            {
-                "id": p.id,
-                "number": p.number,
-                "issue_date": p.issue_date,
-                "issue_time": p.issue_time,
-                "vehicle": p.vehicle.state_number,
-                "owner": f"{p.owner.last_name} {p.owner.first_name}",
-                "inspector": f"{p.inspector.last_name} {p.inspector.first_name}",
-                "violation": p.violation.name,
-                "version": p.version,
-            }
+def protocol_rows_select():
+    """
+    Плоские строки протоколов одним запросом.
+    Связанные сущности присоединяются через JOIN, из них выбираются
+    только нужные колонки — без ленивой загрузки по каждой строке.
+    """
+    return (
+        select(
+            Protocol.id,
+            Protocol.number,
+            Protocol.issue_date,
+            Protocol.issue_time,
+            Vehicle.state_number.label("vehicle"),
+            (Owner.last_name + " " + Owner.first_name).label("owner"),
+            (Inspector.last_name + " " + Inspector.first_name).label("inspector"),
+            Violation.name.label("violation"),
+            Protocol.version,
         )
-    return result
+        .join(Vehicle, Protocol.vehicle_id == Vehicle.id)
+        .join(Owner, Protocol.owner_id == Owner.id)
+        .join(Inspector, Protocol.inspector_id == Inspector.id)
+        .join(Violation, Protocol.violation_id == Violation.id)
+    )
+
+
+# Допустимые значения sort; номер протокола уникален — второй ключ не нужен
+PROTOCOL_SORTS = {
+    "issue_date": (Protocol.issue_date, Protocol.id),
+    "number": (Protocol.number,),
+    "id": (Protocol.id,),
+}
+
+
+@router.get("", response_model=list[ProtocolOut])
+async def get_protocols(
+    response: Response,
+    issue_date_from: Optional[date] = None,
+    issue_date_to: Optional[date] = None,
+    inspector_id: Optional[int] = None,
+    vehicle_id: Optional[int] = None,
+    owner_id: Optional[int] = None,
+    violation_id: Optional[int] = None,
+    sort: str = Query("issue_date", description="issue_date, number или id, '-' — по убыванию"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Период issue_date_from..issue_date_to включает обе границы"""
+    if issue_date_from and issue_date_to and issue_date_from > issue_date_to:
+        raise HTTPException(status_code=400, detail="Начало периода позже его конца")
+    keys, descending = sort_keys(sort, PROTOCOL_SORTS)
+    query = protocol_rows_select()
+    if issue_date_from:
+        query = query.where(Protocol.issue_date >= issue_date_from)
+    if issue_date_to:
+        query = query.where(Protocol.issue_date <= issue_date_to)
+    if inspector_id is not None:
+        query = query.where(Protocol.inspector_id == inspector_id)
+    if vehicle_id is not None:
+        query = query.where(Protocol.vehicle_id == vehicle_id)
+    if owner_id is not None:
+        query = query.where(Protocol.owner_id == owner_id)
+    if violation_id is not None:
+        query = query.where(Protocol.violation_id == violation_id)
+    rows = (await db.execute(page_query(query, keys, limit, after, descending))).all()
+    return [row._asdict() for row in trim_page(rows, keys, limit, response)]
+
+
+@router.get("/changes", response_model=ProtocolChanges)
+async def get_protocol_changes(
+    since: Optional[datetime] = None, db: AsyncSession = Depends(get_async_db)
+):
+    # Имена ТС, владельца, инспектора и нарушения показаны в строке протокола
+    return await change_feed(
+        db,
+        Protocol,
+        protocol_rows_select(),
+        since,
+        related=[
+            (Protocol.vehicle_id, Vehicle),
+            (Protocol.owner_id, Owner),
+            (Protocol.inspector_id, Inspector),
+            (Protocol.violation_id, Violation),
+        ],
+    )
 
 
 @router.post("", status_code=201)
@@ -36,7 +129,7 @@ def add_protocol(data: ProtocolBase, db: Session = Depends(get_db)):
 
     exists = db.query(Protocol).filter_by(number=data.number).first()
     if exists:
-        raise HTTPException(status_code=409, detail="Протокол уже существует")
+        raise conflict("protocol", "duplicate", "Протокол уже существует")
 
     vehicle = db.query(Vehicle).filter_by(state_number=data.vehicle).first()
     owner_last, owner_first = data.owner.split(" ")
@@ -70,6 +163,46 @@ def add_protocol(data: ProtocolBase, db: Session = Depends(get_db)):
     return {"status": "ok"}
 
 
+@router.post("/bulk", response_model=ProtocolImportSummary)
+async def add_protocols_bulk(request: Request, user: str, db: Session = Depends(get_db)):
+    """
+    Пакетный импорт: тело — JSON-массив или NDJSON (application/x-ndjson).
+    Каждая пачка из BULK_BATCH_SIZE строк фиксируется отдельной транзакцией;
+    ошибка БД откатывает только свою пачку (её строки получают error).
+    Результат возвращается по каждой строке всех обработанных пачек.
+    """
+    await run_in_threadpool(check_role, db, user, ["admin", "inspector"])
+
+    results = []
+
+    async def flush(batch):
+        results.extend(await run_in_threadpool(import_batch, db, batch, len(results)))
+
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        batch = []
+        async for raw in aiter_ndjson(request.stream()):
+            batch.append(raw)
+            if len(batch) >= BULK_BATCH_SIZE:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+    else:
+        try:
+            rows = parse_json_array(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Некорректное тело запроса: {e}")
+        for start in range(0, len(rows), BULK_BATCH_SIZE):
+            await flush(rows[start:start + BULK_BATCH_SIZE])
+
+    created = sum(1 for r in results if r["status"] == "created")
+    if created:
+        # Импорт пишет через Core insert, мимо событий ORM: клиенты
+        # подтянут новые строки через журнал изменений
+        publish_change("protocol", bulk=created)
+    return {"total": len(results), "created": created, "results": results}
+
+
 @router.put("/{protocol_id}")
 def update_protocol(protocol_id: int, data: ProtocolUpdate, db: Session = Depends(get_db)):
     check_role(db, data.user, ["admin", "inspector"])
@@ -79,15 +212,12 @@ def update_protocol(protocol_id: int, data: ProtocolUpdate, db: Session = Depend
         raise HTTPException(status_code=404, detail="Протокол не найден")
 
     # Проверка блокировки
-    if protocol.locked_by and protocol.locked_by != data.user:
-        raise HTTPException(
-            status_code=409, detail="Протокол редактируется другим пользователем"
-        )
+    check_lock("protocol", protocol_id, data.user, "Протокол редактируется другим пользователем")
 
     # Проверка версии
     if protocol.version != data.version:
-        raise HTTPException(
-            status_code=409, detail="Протокол был изменён другим пользователем"
+        raise conflict(
+            "protocol", "version", "Протокол был изменён другим пользователем"
         )
 
     vehicle = db.query(Vehicle).filter_by(state_number=data.vehicle).first()
@@ -116,60 +246,37 @@ def update_protocol(protocol_id: int, data: ProtocolUpdate, db: Session = Depend
     protocol.inspector_id = inspector.id
     protocol.violation_id = violation.id
     protocol.version += 1
-    protocol.locked_by = None  # Разблокируем после обновления
 
     db.commit()
+    lock_manager.release("protocol", protocol_id, data.user)  # Разблокируем после обновления
     return {"status": "updated", "new_version": protocol.version}
 
 
 # Получить один протокол по ID
 @router.get("/{protocol_id}", response_model=ProtocolOut)
 def get_protocol(protocol_id: int, db: Session = Depends(get_db)):
-    protocol = db.query(Protocol).filter(Protocol.id == protocol_id).first()
-    if not protocol:
+    row = db.execute(protocol_rows_select().where(Protocol.id == protocol_id)).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Протокол не найден")
 
-    return {
-        "id": protocol.id,
-        "number": protocol.number,
-        "issue_date": protocol.issue_date,
-        "issue_time": protocol.issue_time,
-        "vehicle": protocol.vehicle.state_number,
-        "owner": f"{protocol.owner.last_name} {protocol.owner.first_name}",
-        "inspector": f"{protocol.inspector.last_name} {protocol.inspector.first_name}",
-        "violation": protocol.violation.name,
-        "version": protocol.version,
-    }
+    return row._asdict()
 
 
 # Блокировка протокола
 @router.post("/lock/{protocol_id}")
 def lock_protocol(protocol_id: int, user: str, db: Session = Depends(get_db)):
-    protocol = db.query(Protocol).filter(Protocol.id == protocol_id).first()
-    if not protocol:
-        raise HTTPException(status_code=404, detail="Протокол не найден")
+    get_entity_or_404(db, Protocol, protocol_id)
 
-    if protocol.locked_by and protocol.locked_by != user:
-        raise HTTPException(
-            status_code=409, detail="Протокол уже редактируется другим пользователем"
+    if not lock_manager.acquire("protocol", protocol_id, user):
+        raise conflict(
+            "protocol", "lock", "Протокол уже редактируется другим пользователем"
         )
-
-    protocol.locked_by = user
-    protocol.locked_at = datetime.utcnow
-    db.commit()
     return {"status": "locked"}
 
 
 # Разблокировка протокола
 @router.post("/unlock/{protocol_id}")
 def unlock_protocol(protocol_id: int, user: str):
-    protocol = db_session.query(Protocol).filter(Protocol.id == protocol_id).first()
-    if not protocol:
-        raise HTTPException(status_code=404, detail="Протокол не найден")
-
-    if protocol.locked_by != user:
+    if not lock_manager.release("protocol", protocol_id, user):
         raise HTTPException(status_code=403, detail="Вы не владелец блокировки")
-
-    protocol.locked_by = None
-    db_session.commit()
     return {"status": "unlocked"}
@@ -1,15 +1,55 @@
-from fastapi import APIRouter, Depends
+import csv
+import io
+import json
+from datetime import date
+from itertools import groupby
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from backend.database import get_db
-from backend.models import Inspector, Owner, Vehicle, Protocol, Violation
+from backend.database import get_db, get_session_factory
+from backend.models import (
+    Article,
+    Brand,
+    Color,
+    Inspector,
+    Model,
+    Owner,
+    Vehicle,
+    Protocol,
+    ProtocolDailyStats,
+    Violation,
+    ViolationType,
+)
+from backend.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
 
 router = APIRouter(tags=["reports"])
 
+STREAM_BATCH_SIZE = 1000
+OWNER_CSV_COLUMNS = [
+    "Владелец",
+    "Дата рождения",
+    "Адрес",
+    "Гос. номер",
+    "Модель",
+    "Цвет",
+    "Нарушение",
+    "Статья",
+    "Дата",
+    "Инспектор",
+]
+
 
 @router.get("/inspectors")
-def report_inspectors(db: Session = Depends(get_db)):
+def report_inspectors(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     """Отчёт: все инспекторы"""
-    inspectors = db.query(Inspector).all()
+    inspectors = paginate(db.query(Inspector), (Inspector.id,), limit, after, response)
     return [
         {
             "id": i.id,
@@ -23,9 +63,14 @@ def report_inspectors(db: Session = Depends(get_db)):
 
 
 @router.get("/owners")
-def report_owners(db: Session = Depends(get_db)):
+def report_owners(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     """Отчёт: владельцы + их ТС + нарушения"""
-    owners = db.query(Owner).all()
+    owners = paginate(db.query(Owner), (Owner.id,), limit, after, response)
     result = []
     for owner in owners:
         vehicles = []
@@ -53,10 +98,146 @@ def report_owners(db: Session = Depends(get_db)):
     return result
 
 
+def owner_report_rows(db: Session):
+    """
+    Владельцы, их ТС и протоколы одним запросом с LEFT JOIN.
+    Строки идут по владельцу подряд и читаются серверным курсором пачками.
+    """
+    return (
+        db.query(
+            Owner.id.label("owner_id"),
+            Owner.last_name,
+            Owner.first_name,
+            Owner.middle_name,
+            Owner.date_of_birth,
+            Owner.address,
+            Vehicle.id.label("vehicle_id"),
+            Vehicle.state_number,
+            Model.name.label("model"),
+            Brand.name.label("brand"),
+            Color.name.label("color"),
+            Protocol.id.label("protocol_id"),
+            Protocol.issue_date,
+            Violation.name.label("violation"),
+            Article.number.label("article_number"),
+            Article.name.label("article_name"),
+            Inspector.last_name.label("inspector_last_name"),
+            Inspector.first_name.label("inspector_first_name"),
+        )
+        .outerjoin(Vehicle, Vehicle.owner_id == Owner.id)
+        .outerjoin(Model, Vehicle.model_id == Model.id)
+        .outerjoin(Brand, Model.brand_id == Brand.id)
+        .outerjoin(Color, Vehicle.color_id == Color.id)
+        .outerjoin(Protocol, Protocol.vehicle_id == Vehicle.id)
+        .outerjoin(Violation, Protocol.violation_id == Violation.id)
+        .outerjoin(Article, Violation.article_id == Article.id)
+        .outerjoin(Inspector, Protocol.inspector_id == Inspector.id)
+        .order_by(Owner.id, Vehicle.id, Protocol.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+
+
+def _owner_fields(row):
+    return {
+        "Владелец": f"{row.last_name} {row.first_name} {row.middle_name}",
+        "Дата рождения": row.date_of_birth.isoformat(),
+        "Адрес": row.address,
+    }
+
+
+def _vehicle_fields(row):
+    return {
+        "Гос. номер": row.state_number,
+        "Модель": f"{row.model} ({row.brand})",
+        "Цвет": row.color,
+    }
+
+
+def _violation_fields(row):
+    return {
+        "Нарушение": row.violation,
+        "Статья": f"{row.article_number} — {row.article_name}",
+        "Дата": row.issue_date.isoformat(),
+        "Инспектор": f"{row.inspector_last_name} {row.inspector_first_name}",
+    }
+
+
+def group_owner_reports(rows):
+    """Собирает плоские строки в записи отчёта — по одной на владельца"""
+    for _, owner_rows in groupby(rows, key=lambda r: r.owner_id):
+        owner_rows = list(owner_rows)
+        vehicles = []
+        for vehicle_id, vehicle_rows in groupby(owner_rows, key=lambda r: r.vehicle_id):
+            if vehicle_id is None:
+                continue
+            vehicle_rows = list(vehicle_rows)
+            vehicles.append({
+                **_vehicle_fields(vehicle_rows[0]),
+                "Нарушения": [
+                    _violation_fields(r) for r in vehicle_rows if r.protocol_id is not None
+                ],
+            })
+        yield {**_owner_fields(owner_rows[0]), "ТС": vehicles}
+
+
+def _stream_owners_ndjson(rows):
+    for owner in group_owner_reports(rows):
+        yield json.dumps(owner, ensure_ascii=False) + "\n"
+
+
+def _stream_owners_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=OWNER_CSV_COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        line = _owner_fields(row)
+        if row.vehicle_id is not None:
+            line.update(_vehicle_fields(row))
+        if row.protocol_id is not None:
+            line.update(_violation_fields(row))
+        writer.writerow(line)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _stream_owner_report(session_factory, stream):
+    # Сессия живёт в генераторе: зависимость get_db закрывается раньше,
+    # чем StreamingResponse начнёт отдавать тело
+    db = session_factory()
+    try:
+        yield from stream(owner_report_rows(db))
+    finally:
+        db.close()
+
+
+@router.get("/owners/stream")
+def report_owners_stream(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    session_factory=Depends(get_session_factory),
+):
+    """Отчёт по владельцам потоком: NDJSON (владелец на строку) или CSV"""
+    if format == "csv":
+        return StreamingResponse(
+            _stream_owner_report(session_factory, _stream_owners_csv),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="owners_report.csv"'},
+        )
+    return StreamingResponse(
+        _stream_owner_report(session_factory, _stream_owners_ndjson),
+        media_type="application/x-ndjson",
+    )
+
+
 @router.get("/violations")
-def report_violations(db: Session = Depends(get_db)):
+def report_violations(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     """Отчёт: все нарушения"""
-    violations = db.query(Violation).all()
+    violations = paginate(db.query(Violation), (Violation.id,), limit, after, response)
     return [
         {
             "id": v.id,
@@ -66,4 +247,95 @@ def report_violations(db: Session = Depends(get_db)):
             "Создано": v.created_at.isoformat() if v.created_at else None,
         }
         for v in violations
-    ]
\ No newline at end of file
+    ]
+
+
+# Статистика: суммы по сводке protocol_daily_stats (backend/stats.py), а не
+# по протоколам — ответ не зависит от их числа. Период включает обе границы.
+def _stats_query(db: Session, group_columns, date_from: Optional[date], date_to: Optional[date]):
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="Начало периода позже его конца")
+    protocols = func.sum(ProtocolDailyStats.protocols)
+    query = db.query(*group_columns, protocols.label("protocols"))
+    if date_from:
+        query = query.filter(ProtocolDailyStats.issue_date >= date_from)
+    if date_to:
+        query = query.filter(ProtocolDailyStats.issue_date <= date_to)
+    return query.group_by(*group_columns).having(protocols > 0)
+
+
+@router.get("/stats/inspectors")
+def stats_inspectors(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    """Статистика: протоколов по инспекторам"""
+    rows = (
+        _stats_query(
+            db,
+            (Inspector.id, Inspector.last_name, Inspector.first_name, Inspector.department),
+            date_from,
+            date_to,
+        )
+        .join(Inspector, ProtocolDailyStats.inspector_id == Inspector.id)
+        .order_by(func.sum(ProtocolDailyStats.protocols).desc(), Inspector.id)
+        .all()
+    )
+    return [
+        {
+            "id": r.id,
+            "Инспектор": f"{r.last_name} {r.first_name}",
+            "Отдел": r.department,
+            "Протоколов": r.protocols,
+        }
+        for r in rows
+    ]
+
+
+@router.get("/stats/violation-types")
+def stats_violation_types(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    """Статистика: протоколов по типам нарушений"""
+    rows = (
+        _stats_query(db, (ViolationType.id, ViolationType.name), date_from, date_to)
+        .join(Violation, ProtocolDailyStats.violation_id == Violation.id)
+        .join(ViolationType, Violation.violation_type_id == ViolationType.id)
+        .order_by(func.sum(ProtocolDailyStats.protocols).desc(), ViolationType.id)
+        .all()
+    )
+    return [{"id": r.id, "Тип": r.name, "Протоколов": r.protocols} for r in rows]
+
+
+@router.get("/stats/departments")
+def stats_departments(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    """Статистика: протоколов по отделам"""
+    rows = (
+        _stats_query(db, (Inspector.department,), date_from, date_to)
+        .join(Inspector, ProtocolDailyStats.inspector_id == Inspector.id)
+        .order_by(func.sum(ProtocolDailyStats.protocols).desc(), Inspector.department)
+        .all()
+    )
+    return [{"Отдел": r.department, "Протоколов": r.protocols} for r in rows]
+
+
+@router.get("/stats/daily")
+def stats_daily(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    """Статистика: протоколов по дням; дни без протоколов пропускаются"""
+    rows = (
+        _stats_query(db, (ProtocolDailyStats.issue_date,), date_from, date_to)
+        .order_by(ProtocolDailyStats.issue_date)
+        .all()
+    )
+    return [{"Дата": r.issue_date.isoformat(), "Протоколов": r.protocols} for r in rows]
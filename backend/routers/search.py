@@ -0,0 +1,146 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import String, cast, literal, literal_column, null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import get_async_db
+from backend.models import Owner, Protocol, Vehicle, Violation
+from backend.schemas import SearchResults
+
+router = APIRouter(tags=["search"])
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+SEARCH_MAX_OFFSET = 500  # ранжированную выдачу листают на несколько экранов, не дальше
+
+# Выражение совпадает с индексом ix_owner_full_name_trgm дословно:
+# пробел — литерал SQL, а не параметр запроса
+_SPACE = literal_column("' '")
+OWNER_FULL_NAME = Owner.last_name + _SPACE + Owner.first_name + _SPACE + Owner.middle_name
+
+# Как сравнивается запрос с полем: WORDS — со словами текста (ФИО, адрес),
+# SUBSTRING — как подстрока кода (гос. номер, номер протокола)
+WORDS = "words"
+SUBSTRING = "substring"
+
+# Вид результата -> [(поле, режим, модель, искомое выражение, заголовок,
+# подзаголовок, JOIN)]; у каждого искомого выражения свой GiST-индекс pg_trgm
+SEARCH_SOURCES = {
+    "owner": [
+        ("name", WORDS, Owner, OWNER_FULL_NAME, OWNER_FULL_NAME, Owner.address, ()),
+        ("address", WORDS, Owner, Owner.address, OWNER_FULL_NAME, Owner.address, ()),
+    ],
+    "vehicle": [
+        (
+            "state_number",
+            SUBSTRING,
+            Vehicle,
+            Vehicle.state_number,
+            Vehicle.state_number,
+            OWNER_FULL_NAME,
+            ((Owner, Vehicle.owner_id == Owner.id),),
+        ),
+    ],
+    "protocol": [
+        (
+            "number",
+            SUBSTRING,
+            Protocol,
+            Protocol.number,
+            Protocol.number,
+            cast(Protocol.issue_date, String) + _SPACE + Violation.name,
+            ((Violation, Protocol.violation_id == Violation.id),),
+        ),
+    ],
+    "violation": [
+        ("name", WORDS, Violation, Violation.name, Violation.name, cast(null(), String), ()),
+    ],
+}
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _best_matches(kind, field, mode, model, searched, title, subtitle, joins, text, limit):
+    """
+    Лучшие limit совпадений по одному полю. WORDS: %> и <->> — сходство
+    запроса со словами поля (pg_trgm), «Ивано» находит «Иванов Пётр».
+    SUBSTRING: ILIKE '%123%' находит «А123ВС77», порядок — по <->.
+    Все операторы идут по GiST-индексу поля, а расстояние отдаёт строки
+    сразу в порядке сходства — без сортировки всех совпадений.
+    """
+    q = literal(text, String)
+    # Высокий приоритет оператора — искомое выражение берётся в скобки
+    if mode == WORDS:
+        distance = searched.op("<->>", precedence=100)(q)
+        matched = searched.op("%>", precedence=100)(q)
+    else:
+        distance = searched.op("<->", precedence=100)(q)
+        matched = searched.ilike(f"%{_escape_like(text)}%", escape="\\")
+    query = select(
+        literal_column(f"'{kind}'").label("kind"),
+        model.id.label("id"),
+        title.label("title"),
+        subtitle.label("subtitle"),
+        literal_column(f"'{field}'").label("field"),
+        distance.label("distance"),
+    ).select_from(model)
+    for target, onclause in joins:
+        query = query.join(target, onclause)
+    return query.where(matched).order_by(distance).limit(limit).subquery()
+
+
+@router.get("", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=2, max_length=100),
+    kinds: Optional[str] = Query(None, description="через запятую: owner,vehicle,protocol,violation"),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Поиск по частичному совпадению: ФИО и адреса владельцев, гос. номера,
+    номера протоколов, названия нарушений. Результаты всех видов в одном
+    списке, от самых похожих; страницы — offset/limit.
+    """
+    selected = kinds.split(",") if kinds else list(SEARCH_SOURCES)
+    unknown = [kind for kind in selected if kind not in SEARCH_SOURCES]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неизвестный вид поиска: {', '.join(unknown)}. Доступны: {', '.join(SEARCH_SOURCES)}",
+        )
+
+    text = q.strip()
+    if len(text) < 2:
+        raise HTTPException(status_code=400, detail="Запрос короче двух символов")
+
+    # Каждое поле отдаёт не больше, чем может попасть на запрошенную страницу
+    per_field = offset + limit + 1
+    matches = [
+        select(_best_matches(kind, *source, text, per_field))
+        for kind in dict.fromkeys(selected)
+        for source in SEARCH_SOURCES[kind]
+    ]
+    ranked = union_all(*matches).subquery()
+    rows = (
+        await db.execute(
+            select(ranked)
+            .order_by(ranked.c.distance, ranked.c.kind, ranked.c.id)
+            .offset(offset)
+            .limit(limit + 1)
+        )
+    ).all()
+
+    hits = [
+        {
+            "kind": row.kind,
+            "id": row.id,
+            "title": row.title,
+            "subtitle": row.subtitle,
+            "field": row.field,
+            "score": round(1 - row.distance, 3),
+        }
+        for row in rows[:limit]
+    ]
+    return {"hits": hits, "next_offset": offset + limit if len(rows) > limit else None}
@@ -1,30 +1,88 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from backend.database import get_db
+from backend.database import get_async_db, get_db
 from backend.models import Protocol, Vehicle, Model, Brand, Color, Owner
-from backend.schemas import VehicleBase, VehicleOut, ModelOut, ColorOut, VehicleUpdate
+from backend.schemas import VehicleBase, VehicleChanges, VehicleOut, ModelOut, ColorOut, VehicleUpdate
 from backend.security import check_role
+from backend.locks import lock_manager
+from backend.utils import check_lock, conflict, get_entity_or_404
+from backend.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    page_query,
+    sort_keys,
+    trim_page,
+)
+from backend.http_cache import not_modified, table_version
+from backend.reference_cache import reference_cache
+from backend.sync import change_feed
 
 router = APIRouter(tags=["vehicles"])
 
 
-@router.get("", response_model=list[VehicleOut])
-def get_vehicles(db: Session = Depends(get_db)):
-    vehicles = db.query(Vehicle).all()
-    result = []
-    for v in vehicles:
-        result.append(
-            {
-                "id": v.id,  # ← Добавляем ID
-                "state_number": v.state_number,
-                "model": f"{v.model.name} ({v.model.brand.name})",
-                "color": v.color.name,
-                "owner": f"{v.owner.last_name} {v.owner.first_name}",
-                "version": v.version,
-            }
+def vehicle_rows_select():
+    """Плоские строки ТС одним запросом: модель, цвет и владелец через JOIN"""
+    return (
+        select(
+            Vehicle.id,
+            Vehicle.state_number,
+            (Model.name + " (" + Brand.name + ")").label("model"),
+            Color.name.label("color"),
+            (Owner.last_name + " " + Owner.first_name).label("owner"),
+            Vehicle.version,
         )
-    return result
+        .join(Model, Vehicle.model_id == Model.id)
+        .join(Brand, Model.brand_id == Brand.id)
+        .join(Color, Vehicle.color_id == Color.id)
+        .join(Owner, Vehicle.owner_id == Owner.id)
+    )
+
+
+# Допустимые значения sort; гос. номер уникален — второй ключ не нужен
+VEHICLE_SORTS = {
+    "id": (Vehicle.id,),
+    "state_number": (Vehicle.state_number,),
+}
+
+
+@router.get("", response_model=list[VehicleOut])
+async def get_vehicles(
+    response: Response,
+    state_number: Optional[str] = None,
+    owner_id: Optional[int] = None,
+    model_id: Optional[int] = None,
+    color_id: Optional[int] = None,
+    sort: str = Query("id", description="id или state_number, '-' — по убыванию"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    keys, descending = sort_keys(sort, VEHICLE_SORTS)
+    query = vehicle_rows_select()
+    if state_number:
+        query = query.where(Vehicle.state_number == state_number)
+    if owner_id is not None:
+        query = query.where(Vehicle.owner_id == owner_id)
+    if model_id is not None:
+        query = query.where(Vehicle.model_id == model_id)
+    if color_id is not None:
+        query = query.where(Vehicle.color_id == color_id)
+    rows = (await db.execute(page_query(query, keys, limit, after, descending))).all()
+    return [row._asdict() for row in trim_page(rows, keys, limit, response)]
+
+
+@router.get("/changes", response_model=VehicleChanges)
+async def get_vehicle_changes(
+    since: Optional[datetime] = None, db: AsyncSession = Depends(get_async_db)
+):
+    # Строка ТС показывает имя владельца — его правка тоже изменение
+    return await change_feed(
+        db, Vehicle, vehicle_rows_select(), since, related=[(Vehicle.owner_id, Owner)]
+    )
 
 
 @router.post("", status_code=201)
@@ -33,28 +91,23 @@ def add_vehicle(data: VehicleBase, db: Session = Depends(get_db)):
 
     exists = db.query(Vehicle).filter_by(state_number=data.state_number).first()
     if exists:
-        raise HTTPException(status_code=409, detail="ТС уже существует")
+        raise conflict("vehicle", "duplicate", "ТС уже существует")
 
-    model = (
-        db.query(Model)
-        .join(Brand)
-        .filter(Model.name == data.model_name, Brand.name == data.brand_name)
-        .first()
-    )
-    color = db.query(Color).filter_by(name=data.color_name).first()
+    model_id = reference_cache.model_id(db, data.model_name, data.brand_name)
+    color_id = reference_cache.color_id(db, data.color_name)
     owner = (
         db.query(Owner)
         .filter_by(last_name=data.owner_last_name, first_name=data.owner_first_name)
         .first()
     )
 
-    if not all([model, color, owner]):
+    if not all([model_id, color_id, owner]):
         raise HTTPException(status_code=400, detail="Некорректные данные")
 
     vehicle = Vehicle(
         state_number=data.state_number,
-        model_id=model.id,
-        color_id=color.id,
+        model_id=model_id,
+        color_id=color_id,
         owner_id=owner.id,
     )
     db.add(vehicle)
@@ -63,62 +116,46 @@ def add_vehicle(data: VehicleBase, db: Session = Depends(get_db)):
 
 
 @router.get("/models", response_model=list[ModelOut])
-def get_models(db: Session = Depends(get_db)):
+def get_models(request: Request, response: Response, db: Session = Depends(get_db)):
+    cached = not_modified(request, response, table_version(db, Model, Brand))
+    if cached:
+        return cached
     models = db.query(Model).join(Brand).all()
     return [{"id": m.id, "name": m.name, "brand": m.brand.name} for m in models]
 
 
 @router.get("/colors", response_model=list[ColorOut])
-def get_colors(db: Session = Depends(get_db)):
+def get_colors(request: Request, response: Response, db: Session = Depends(get_db)):
+    cached = not_modified(request, response, table_version(db, Color))
+    if cached:
+        return cached
     return db.query(Color).all()
 
 
 @router.get("/{vehicle_id}", response_model=VehicleOut)
 def get_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
-    vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
-    if not vehicle:
+    row = db.execute(vehicle_rows_select().where(Vehicle.id == vehicle_id)).first()
+    if not row:
         raise HTTPException(status_code=404, detail="ТС не найдено")
 
-    return {
-        "id": vehicle.id,
-        "state_number": vehicle.state_number,
-        "model": f"{vehicle.model.name} ({vehicle.model.brand.name})",
-        "color": vehicle.color.name,
-        "owner": f"{vehicle.owner.last_name} {vehicle.owner.first_name}",
-        "version": vehicle.version,
-    }
+    return row._asdict()
 
 
 @router.post("/lock/{vehicle_id}")
 def lock_vehicle(vehicle_id: int, user: str, db: Session = Depends(get_db)):
-    vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
-    if not vehicle:
-        raise HTTPException(status_code=404, detail="ТС не найдено")
+    get_entity_or_404(db, Vehicle, vehicle_id)
 
-    if vehicle.locked_by and vehicle.locked_by != user:
-        raise HTTPException(
-            status_code=409, detail="ТС уже редактируется другим пользователем"
+    if not lock_manager.acquire("vehicle", vehicle_id, user):
+        raise conflict(
+            "vehicle", "lock", "ТС уже редактируется другим пользователем"
         )
-
-    vehicle.locked_by = user
-    vehicle.locked_at = datetime.utcnow()
-    db.commit()
     return {"status": "locked"}
 
 
-# Разблокировка по ID
 @router.post("/unlock/{vehicle_id}")
-def unlock_vehicle(vehicle_id: int, user: str, db: Session = Depends(get_db)):
-    vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
-    if not vehicle:
-        raise HTTPException(status_code=404, detail="ТС не найдено")
-
-    if vehicle.locked_by != user:
+def unlock_vehicle(vehicle_id: int, user: str):
+    if not lock_manager.release("vehicle", vehicle_id, user):
         raise HTTPException(status_code=403, detail="Вы не владелец блокировки")
-
-    vehicle.locked_by = None
-    vehicle.locked_at = datetime.utcnow()
-    db.commit()
     return {"status": "unlocked"}
 
 
@@ -131,39 +168,31 @@ def update_vehicle(vehicle_id: int, data: VehicleUpdate, db: Session = Depends(g
     if not vehicle:
         raise HTTPException(status_code=404, detail="ТС не найдено")
 
-    if vehicle.locked_by and vehicle.locked_by != data.user:
-        raise HTTPException(
-            status_code=409, detail="ТС редактируется другим пользователем"
-        )
+    check_lock("vehicle", vehicle_id, data.user, "ТС редактируется другим пользователем")
 
     if vehicle.version != data.version:
-        raise HTTPException(
-            status_code=409, detail="ТС было изменено другим пользователем"
+        raise conflict(
+            "vehicle", "version", "ТС было изменено другим пользователем"
         )
 
-    model = (
-        db.query(Model)
-        .join(Brand)
-        .filter(Model.name == data.model_name, Brand.name == data.brand_name)
-        .first()
-    )
-    color = db.query(Color).filter_by(name=data.color_name).first()
+    model_id = reference_cache.model_id(db, data.model_name, data.brand_name)
+    color_id = reference_cache.color_id(db, data.color_name)
     owner = (
         db.query(Owner)
         .filter_by(last_name=data.owner_last_name, first_name=data.owner_first_name)
         .first()
     )
 
-    if not all([model, color, owner]):
+    if not all([model_id, color_id, owner]):
         raise HTTPException(status_code=400, detail="Некорректные данные")
 
-    vehicle.model_id = model.id
-    vehicle.color_id = color.id
+    vehicle.model_id = model_id
+    vehicle.color_id = color_id
     vehicle.owner_id = owner.id
     vehicle.version += 1
-    vehicle.locked_by = None
 
     db.commit()
+    lock_manager.release("vehicle", vehicle_id, data.user)
     return {"status": "updated", "new_version": vehicle.version}
 
 
@@ -183,11 +212,9 @@ def delete_vehicle(vehicle_id: int, user: str, db: Session = Depends(get_db)):
             detail="Нельзя удалить ТС: существуют связанные протоколы"
         )
 
-    if vehicle.locked_by and vehicle.locked_by != user:
-        raise HTTPException(
-            status_code=409, detail="ТС редактируется другим пользователем"
-        )
+    check_lock("vehicle", vehicle_id, user, "ТС редактируется другим пользователем")
 
     db.delete(vehicle)
     db.commit()
+    lock_manager.release("vehicle", vehicle_id, user)
     return {"status": "deleted"}
@@ -1,61 +1,99 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from backend.database import get_db
+from backend.database import get_async_db, get_db
 from backend.models import Violation, ViolationType, Article, UserAccount
 from backend.schemas import (
     ViolationBase,
+    ViolationChanges,
     ViolationOut,
     ViolationTypeOut,
     ArticleOut,
     ViolationUpdate,
 )
 from backend.security import check_role
+from backend.locks import lock_manager
+from backend.utils import check_lock, conflict, get_entity_or_404
+from backend.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_query, trim_page
+from backend.http_cache import not_modified, table_version
+from backend.reference_cache import reference_cache
+from backend.sync import change_feed
 
 router = APIRouter(tags=["violations"])
 
 
-@router.get("", response_model=list[ViolationOut])
-def get_violations(type: str = Query(None), db: Session = Depends(get_db)):
-    query = db.query(Violation).join(ViolationType).join(Article)
-    if type:
-        query = query.filter(ViolationType.name == type)
-    violations = query.all()
-    return [
-        {
-            "id": v.id,
-            "name": v.name,
-            "type": v.violation_type.name,
-            "article_number": v.article.number,
-            "article_name": v.article.name,
-            "version": v.version,
-        }
-        for v in violations
-    ]
+def violation_rows_select():
+    """Плоские строки нарушений одним запросом: тип и статья через JOIN"""
+    return (
+        select(
+            Violation.id,
+            Violation.name,
+            ViolationType.name.label("type"),
+            Article.number.label("article_number"),
+            Article.name.label("article_name"),
+            Violation.version,
+        )
+        .join(ViolationType, Violation.violation_type_id == ViolationType.id)
+        .join(Article, Violation.article_id == Article.id)
+    )
 
 
-@router.post("", status_code=201)
-def add_violation(data: ViolationBase, db: Session = Depends(get_db)):
-    check_role(db, data.user, ["admin", "inspector"])
-
-    vt = db.query(ViolationType).filter_by(name=data.type).first()
-    if not vt:
+def resolve_type_and_article(db: Session, data):
+    """id типа и статьи по кэшу справочников; новые тип и статья создаются"""
+    type_id = reference_cache.violation_type_id(db, data.type)
+    if not type_id:
         vt = ViolationType(name=data.type)
         db.add(vt)
         db.commit()
+        type_id = vt.id
 
-    article = db.query(Article).filter_by(number=data.article_number).first()
-    if not article:
+    article_id = reference_cache.article_id(db, data.article_number)
+    if not article_id:
         article = Article(number=data.article_number, name=data.article_name)
         db.add(article)
         db.commit()
+        article_id = article.id
+    return type_id, article_id
+
+
+@router.get("", response_model=list[ViolationOut])
+async def get_violations(
+    response: Response,
+    type: str = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    query = violation_rows_select()
+    if type:
+        query = query.filter(ViolationType.name == type)
+    keys = (Violation.id,)
+    rows = (await db.execute(page_query(query, keys, limit, after))).all()
+    return [row._asdict() for row in trim_page(rows, keys, limit, response)]
+
+
+@router.get("/changes", response_model=ViolationChanges)
+async def get_violation_changes(
+    since: Optional[datetime] = None, db: AsyncSession = Depends(get_async_db)
+):
+    return await change_feed(db, Violation, violation_rows_select(), since)
+
+
+@router.post("", status_code=201)
+def add_violation(data: ViolationBase, db: Session = Depends(get_db)):
+    check_role(db, data.user, ["admin", "inspector"])
+
+    type_id, article_id = resolve_type_and_article(db, data)
 
     exists = db.query(Violation).filter_by(name=data.name).first()
     if exists:
-        raise HTTPException(status_code=409, detail="Нарушение уже существует")
+        raise conflict("violation", "duplicate", "Нарушение уже существует")
 
     violation = Violation(
-        name=data.name, violation_type_id=vt.id, article_id=article.id
+        name=data.name, violation_type_id=type_id, article_id=article_id
     )
     db.add(violation)
     db.commit()
@@ -71,94 +109,67 @@ def update_violation(violation_id: int, data: ViolationUpdate, db: Session = Dep
         raise HTTPException(status_code=404, detail="Нарушение не найдено")
 
     # Проверка блокировки
-    if violation.locked_by and violation.locked_by != data.user:
-        raise HTTPException(
-            status_code=409, detail="Нарушение редактируется другим пользователем"
-        )
+    check_lock("violation", violation_id, data.user, "Нарушение редактируется другим пользователем")
 
     # Проверка версии
     if violation.version != data.version:
-        raise HTTPException(
-            status_code=409, detail="Нарушение было изменено другим пользователем"
+        raise conflict(
+            "violation", "version", "Нарушение было изменено другим пользователем"
         )
 
-    vt = db.query(ViolationType).filter_by(name=data.type).first()
-    if not vt:
-        vt = ViolationType(name=data.type)
-        db.add(vt)
-        db.commit()
-
-    article = db.query(Article).filter_by(number=data.article_number).first()
-    if not article:
-        article = Article(number=data.article_number, name=data.article_name)
-        db.add(article)
-        db.commit()
+    type_id, article_id = resolve_type_and_article(db, data)
 
     violation.name = data.name
-    violation.violation_type_id = vt.id
-    violation.article_id = article.id
+    violation.violation_type_id = type_id
+    violation.article_id = article_id
     violation.version += 1
-    violation.locked_by = None  # Разблокируем после обновления
 
     db.commit()
+    lock_manager.release("violation", violation_id, data.user)  # Разблокируем после обновления
     return {"status": "updated", "new_version": violation.version}
 
 
 @router.get("/violation-types", response_model=list[ViolationTypeOut])
-def get_violation_types(db: Session = Depends(get_db)):
+def get_violation_types(request: Request, response: Response, db: Session = Depends(get_db)):
+    cached = not_modified(request, response, table_version(db, ViolationType))
+    if cached:
+        return cached
     return db.query(ViolationType).order_by(ViolationType.name).all()
 
 
 @router.get("/articles", response_model=list[ArticleOut])
-def get_articles(db: Session = Depends(get_db)):
+def get_articles(request: Request, response: Response, db: Session = Depends(get_db)):
+    cached = not_modified(request, response, table_version(db, Article))
+    if cached:
+        return cached
     return db.query(Article).order_by(Article.number).all()
 
 
 # Получить одно нарушение по ID
 @router.get("/{violation_id}", response_model=ViolationOut)
 def get_violation(violation_id: int, db: Session = Depends(get_db)):
-    violation = db.query(Violation).filter(Violation.id == violation_id).first()
-    if not violation:
+    row = db.execute(violation_rows_select().where(Violation.id == violation_id)).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Нарушение не найдено")
 
-    return {
-        "id": violation.id,
-        "name": violation.name,
-        "type": violation.violation_type.name,
-        "article_number": violation.article.number,
-        "article_name": violation.article.name,
-        "version": violation.version,
-    }
+    return row._asdict()
 
 
 # Блокировка нарушения
 @router.post("/lock/{violation_id}")
 def lock_violation(violation_id: int, user: str, db: Session = Depends(get_db)):
-    violation = db.query(Violation).filter(Violation.id == violation_id).first()
-    if not violation:
-        raise HTTPException(status_code=404, detail="Нарушение не найдено")
+    get_entity_or_404(db, Violation, violation_id)
 
-    if violation.locked_by and violation.locked_by != user:
-        raise HTTPException(
-            status_code=409, detail="Нарушение уже редактируется другим пользователем"
+    if not lock_manager.acquire("violation", violation_id, user):
+        raise conflict(
+            "violation", "lock", "Нарушение уже редактируется другим пользователем"
         )
-
-    violation.locked_by = user
-    violation.locked_at = datetime.utcow()
-    db.commit()
     return {"status": "locked"}
 
 
 # Разблокировка нарушения
 @router.post("/unlock/{violation_id}")
-def unlock_violation(violation_id: int, user: str, db: Session = Depends(get_db)):
-    violation = db.query(Violation).filter(Violation.id == violation_id).first()
-    if not violation:
-        raise HTTPException(status_code=404, detail="Нарушение не найдено")
-
-    if violation.locked_by != user:
+def unlock_violation(violation_id: int, user: str):
+    if not lock_manager.release("violation", violation_id, user):
         raise HTTPException(status_code=403, detail="Вы не владелец блокировки")
-
-    violation.locked_by = None
-    db.commit()
     return {"status": "unlocked"}
@@ -1,6 +1,6 @@
 from typing import Optional
 from pydantic import BaseModel
-from datetime import date, time
+from datetime import date, datetime, time
 
 
 # 🔐 Авторизация
@@ -31,7 +31,6 @@ class OwnerOut(BaseModel):
     date_of_birth: date
     address: str
     version: int
-    locked_by: Optional[str] = None
 
     class Config:
         orm_mode = True
@@ -65,7 +64,6 @@ class InspectorOut(BaseModel):
     department: str
     rank: str
     version: int
-    locked_by: Optional[str] = None
 
     class Config:
         orm_mode = True
@@ -95,7 +93,6 @@ class VehicleBase(BaseModel):
 class VehicleOut(BaseModel):
     id: int
     state_number: str
-    locked_by: Optional[str] = None
     model: str
     color: str
     owner: str
@@ -131,7 +128,6 @@ class ViolationOut(BaseModel):
     article_number: str
     article_name: str
     version: int
-    locked_by: Optional[str] = None
 
     class Config:
         orm_mode = True
@@ -191,7 +187,6 @@ class ProtocolOut(BaseModel):
     inspector: str
     violation: str
     version: int
-    locked_by: Optional[str] = None
 
     class Config:
         orm_mode = True
@@ -206,3 +201,94 @@ class ProtocolUpdate(BaseModel):
     violation: str
     user: str
     version: int
+
+
+class ProtocolImportRow(BaseModel):
+    """Строка пакетного импорта; пользователь передаётся параметром запроса"""
+    number: str
+    issue_date: date
+    issue_time: time
+    vehicle: str
+    owner: str
+    inspector: str
+    violation: str
+
+
+class ProtocolImportResult(BaseModel):
+    row: int
+    number: Optional[str] = None
+    status: str  # created, exists, invalid, unresolved, error
+    detail: Optional[str] = None
+
+
+class ProtocolImportSummary(BaseModel):
+    total: int
+    created: int
+    results: list[ProtocolImportResult]
+
+
+# 🔁 Журнал изменений: GET /<коллекция>/changes?since=
+class ChangeFeed(BaseModel):
+    watermark: datetime  # since для следующего запроса
+    complete: bool  # False — список нужно перезагрузить целиком
+    created: list[int]
+    deleted: list[int]
+
+
+class OwnerChanges(ChangeFeed):
+    changed: list[OwnerOut]
+
+
+class InspectorChanges(ChangeFeed):
+    changed: list[InspectorOut]
+
+
+class VehicleChanges(ChangeFeed):
+    changed: list[VehicleOut]
+
+
+class ViolationChanges(ChangeFeed):
+    changed: list[ViolationOut]
+
+
+class ProtocolChanges(ChangeFeed):
+    changed: list[ProtocolOut]
+
+
+# 🔒 Блокировки
+class LockItem(BaseModel):
+    entity: str
+    id: int
+
+
+class LockBatchRequest(BaseModel):
+    user: str
+    lock: list[LockItem] = []
+    unlock: list[LockItem] = []
+
+
+class LockItemResult(BaseModel):
+    entity: str
+    id: int
+    action: str  # 'lock' или 'unlock'
+    status: str  # locked, conflict, not_found, skipped, unlocked, not_owner
+
+
+class LockBatchResult(BaseModel):
+    ok: bool
+    results: list[LockItemResult]
+
+
+# 🔍 Поиск
+class SearchHit(BaseModel):
+    kind: str  # owner, vehicle, protocol, violation
+    id: int
+    title: str
+    subtitle: Optional[str] = None
+    field: str  # по какому полю найдено: name, address, state_number, number
+    score: float  # 0..1, сходство запроса с полем
+
+
+class SearchResults(BaseModel):
+    hits: list[SearchHit]
+    next_offset: Optional[int] = None  # None — результатов больше нет
@@ -1,14 +1,98 @@
 # backend/security.py
+import threading
+import time
 from fastapi import HTTPException
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from backend import config
 from backend.models import UserAccount
 
+
+class RoleCache:
+    """Кэш ролей пользователей с TTL: username -> role"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._roles = {}  # username -> (role, expires_at по time.monotonic)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username: str):
+        with self._lock:
+            entry = self._roles.get(username)
+            if entry and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self._roles.pop(username, None)
+            self.misses += 1
+            return None
+
+    def put(self, username: str, role: str):
+        with self._lock:
+            self._roles[username] = (role, time.monotonic() + self.ttl)
+
+    def invalidate(self, username: str):
+        with self._lock:
+            self._roles.pop(username, None)
+
+    def clear(self):
+        with self._lock:
+            self._roles.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._roles),
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+role_cache = RoleCache(config.ROLE_CACHE_TTL_SECONDS)
+
+
+# Изменение или удаление учётной записи через ORM сбрасывает её роль в кэше
+# сразу и ещё раз после коммита: check_role между flush и коммитом читает
+# прежнюю роль и кладёт её в кэш. При переименовании сбрасывается и старое имя
+@event.listens_for(UserAccount, "after_update")
+@event.listens_for(UserAccount, "after_delete")
+def _invalidate_user_role(mapper, connection, target):
+    usernames = {target.username, *inspect(target).attrs.username.history.deleted}
+    for username in usernames:
+        role_cache.invalidate(username)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("role_changed", set()).update(usernames)
+
+
+# active_history: прежнее имя загружается до присваивания, даже если атрибут
+# истёк после коммита, — иначе history.deleted в after_update пуст
+@event.listens_for(UserAccount.username, "set", active_history=True)
+def _keep_previous_username(target, value, oldvalue, initiator):
+    pass
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_roles_after_commit(session):
+    for username in session.info.pop("role_changed", ()):
+        role_cache.invalidate(username)
+
+
 def check_role(db, username: str, allowed_roles: list):
     """
     Проверяет роль пользователя.
-    db — сессия SQLAlchemy (Session).
+    db — сессия SQLAlchemy (Session). Роль берётся из кэша, в БД — только при промахе.
     """
-    user = db.query(UserAccount).filter_by(username=username).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Пользователь не найден")
-    if user.role not in allowed_roles:
-        raise HTTPException(status_code=403, detail="Недостаточно прав")
\ No newline at end of file
+    role = role_cache.get(username)
+    if role is None:
+        user = db.query(UserAccount).filter_by(username=username).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="Пользователь не найден")
+        role = user.role
+        role_cache.put(username, role)
+    if role not in allowed_roles:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
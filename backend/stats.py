@@ -0,0 +1,161 @@
+# backend/stats.py
+# Сводка протоколов для /reports/stats: protocol_daily_stats — число протоколов
+# за день по инспектору и нарушению. Отчёты суммируют её строки, а не протоколы,
+# поэтому их время не растёт с числом протоколов.
+import argparse
+import asyncio
+import logging
+import time
+from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy import delete, func, insert, select, text
+from backend import config
+from backend.database import async_engine
+from backend.models import Protocol, ProtocolDailyStats
+
+logger = logging.getLogger(__name__)
+
+# Триггеры уровня оператора с таблицами переходов: вставка пачки (COPY,
+# импорт) — один пересчёт на оператор, а не на строку. Изменение протокола
+# вычитает старую строку и добавляет новую; правки, не меняющие дату,
+# инспектора или нарушение, сводку не трогают. Тот же SQL — в миграции 0006.
+STATS_TRIGGER_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION protocol_stats_apply() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO protocol_daily_stats AS s (issue_date, inspector_id, violation_id, protocols)
+            SELECT issue_date, inspector_id, violation_id, count(*)
+            FROM new_rows GROUP BY issue_date, inspector_id, violation_id
+            ON CONFLICT (issue_date, inspector_id, violation_id)
+            DO UPDATE SET protocols = s.protocols + EXCLUDED.protocols;
+        ELSIF TG_OP = 'DELETE' THEN
+            INSERT INTO protocol_daily_stats AS s (issue_date, inspector_id, violation_id, protocols)
+            SELECT issue_date, inspector_id, violation_id, -count(*)
+            FROM old_rows GROUP BY issue_date, inspector_id, violation_id
+            ON CONFLICT (issue_date, inspector_id, violation_id)
+            DO UPDATE SET protocols = s.protocols + EXCLUDED.protocols;
+        ELSE
+            INSERT INTO protocol_daily_stats AS s (issue_date, inspector_id, violation_id, protocols)
+            SELECT issue_date, inspector_id, violation_id, sum(delta)
+            FROM (
+                SELECT issue_date, inspector_id, violation_id, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT issue_date, inspector_id, violation_id, -1 AS delta FROM old_rows
+            ) changes
+            GROUP BY issue_date, inspector_id, violation_id
+            HAVING sum(delta) <> 0
+            ON CONFLICT (issue_date, inspector_id, violation_id)
+            DO UPDATE SET protocols = s.protocols + EXCLUDED.protocols;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS protocol_stats_insert ON protocol",
+    """
+    CREATE TRIGGER protocol_stats_insert AFTER INSERT ON protocol
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION protocol_stats_apply()
+    """,
+    "DROP TRIGGER IF EXISTS protocol_stats_update ON protocol",
+    """
+    CREATE TRIGGER protocol_stats_update AFTER UPDATE ON protocol
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION protocol_stats_apply()
+    """,
+    "DROP TRIGGER IF EXISTS protocol_stats_delete ON protocol",
+    """
+    CREATE TRIGGER protocol_stats_delete AFTER DELETE ON protocol
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION protocol_stats_apply()
+    """,
+]
+
+# Ключ pg_try_advisory_xact_lock: пересчёт сводки идёт в одном процессе за раз
+STATS_REBUILD_LOCK_KEY = 7_260_001
+
+
+def install_stats_triggers(conn):
+    """Триггеры сводки (только PostgreSQL); в других СУБД — только пересчёт"""
+    if conn.dialect.name != "postgresql":
+        return
+    for statement in STATS_TRIGGER_SQL:
+        conn.execute(text(statement))
+
+
+def rebuild_statements(dialect_name: str, since: Optional[date] = None):
+    """Пересчёт сводки с даты since (None — целиком): удалить строки и собрать заново"""
+    statements = []
+    if dialect_name == "postgresql":
+        # Запись протоколов ждёт конца пересчёта: иначе вставка, закоммиченная
+        # между чтением и записью сводки, учлась бы дважды или ни разу
+        statements.append(text("LOCK TABLE protocol IN SHARE MODE"))
+    cleared = delete(ProtocolDailyStats)
+    counted = select(
+        Protocol.issue_date,
+        Protocol.inspector_id,
+        Protocol.violation_id,
+        func.count(),
+    ).group_by(Protocol.issue_date, Protocol.inspector_id, Protocol.violation_id)
+    if since:
+        # Окно берётся по индексу ix_protocol_issue_date_id, а не всей таблицей
+        cleared = cleared.where(ProtocolDailyStats.issue_date >= since)
+        counted = counted.where(Protocol.issue_date >= since)
+    statements.append(cleared)
+    statements.append(
+        insert(ProtocolDailyStats).from_select(
+            ["issue_date", "inspector_id", "violation_id", "protocols"], counted
+        )
+    )
+    return statements
+
+
+async def rebuild_protocol_stats(days: Optional[int] = None) -> bool:
+    """
+    Пересчитать сводку за последние days дней (None — целиком).
+    False — пересчёт уже идёт в другом процессе, этот пропущен.
+    """
+    since = date.today() - timedelta(days=days) if days else None
+    async with async_engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Блокировка до конца транзакции: второй пересчёт не встаёт в очередь
+            # за LOCK TABLE, а сразу отказывается
+            locked = await conn.scalar(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": STATS_REBUILD_LOCK_KEY}
+            )
+            if not locked:
+                return False
+        for statement in rebuild_statements(conn.dialect.name, since):
+            await conn.execute(statement)
+    return True
+
+
+async def run_stats_rebuilder():
+    interval = config.STATS_REBUILD_INTERVAL_SECONDS
+    if interval <= 0:
+        return
+    while True:
+        # Все воркеры просыпаются в одни моменты — кратные интервалу от начала
+        # эпохи (при сутках — в полночь UTC): пересчитывает взявший advisory-
+        # блокировку, остальные пропускают этот раз
+        await asyncio.sleep(interval - time.time() % interval)
+        try:
+            await rebuild_protocol_stats(config.STATS_REBUILD_DAYS or None)
+        except Exception:
+            logger.exception("Ошибка пересчёта сводки protocol_daily_stats")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пересчёт сводки protocol_daily_stats")
+    parser.add_argument("--days", type=int, help="только за последние N дней; по умолчанию — целиком")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    if not asyncio.run(rebuild_protocol_stats(args.days)):
+        raise SystemExit("Пересчёт уже выполняется в другом процессе")
+    print(f"Сводка пересчитана за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# backend/sync.py
+# Журнал изменений для клиентов: строки коллекции, изменённые после since
+# (по updated_at), и «надгробия» удалённых записей — вместо повторной
+# загрузки всего списка при каждом обновлении вкладки.
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import delete, event, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend import config
+from backend.database import async_engine
+from backend.models import Inspector, Owner, Protocol, Tombstone, Vehicle, Violation
+
+logger = logging.getLogger(__name__)
+
+SYNC_ENTITIES = {
+    Owner: "owner",
+    Inspector: "inspector",
+    Vehicle: "vehicle",
+    Violation: "violation",
+    Protocol: "protocol",
+}
+TOMBSTONE_PRUNE_INTERVAL_SECONDS = 3600
+_CREATED_AT = "_created_at"
+
+
+# Удаление через ORM оставляет надгробие в той же транзакции
+def _record_tombstone(mapper, connection, target):
+    connection.execute(
+        insert(Tombstone).values(entity=SYNC_ENTITIES[mapper.class_], entity_id=target.id)
+    )
+
+
+for _model in SYNC_ENTITIES:
+    event.listen(_model, "after_delete", _record_tombstone)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite отдаёт now() без часового пояса; в PostgreSQL он уже есть
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _unpack(row):
+    data = row._asdict()
+    created_at = data.pop(_CREATED_AT)
+    # select(Model) — ORM-объект, select(колонки) — плоская строка
+    item = next(iter(data.values())) if len(data) == 1 else data
+    item_id = item["id"] if isinstance(item, dict) else item.id
+    return item, item_id, created_at
+
+
+async def change_feed(
+    db: AsyncSession, model, query, since: Optional[datetime], related=()
+) -> dict:
+    """
+    Изменения коллекции после since: changed — новые и изменённые строки
+    в формате списка (query), created — id новых из них, deleted — id
+    удалённых. related — пары (внешний ключ, модель): строка попадает в
+    журнал и при изменении связанной записи, имя которой в ней показано.
+
+    watermark — since для следующего запроса. Без since отдаётся только
+    она. complete=False — изменений больше SYNC_MAX_CHANGES или since
+    старше хранимых надгробий: список нужно перезагрузить целиком.
+    """
+    now = _as_utc(await db.scalar(select(func.now())))
+    feed = {
+        "watermark": now - timedelta(seconds=config.SYNC_OVERLAP_SECONDS),
+        "complete": True,
+        "changed": [],
+        "created": [],
+        "deleted": [],
+    }
+    if since is None:
+        return feed
+    since = _as_utc(since)
+    if since < now - timedelta(seconds=config.SYNC_TOMBSTONE_TTL_SECONDS):
+        feed["complete"] = False
+        return feed
+
+    changed = model.updated_at > since
+    for foreign_key, related_model in related:
+        changed = or_(
+            changed,
+            foreign_key.in_(select(related_model.id).where(related_model.updated_at > since)),
+        )
+    rows = (
+        await db.execute(
+            query.where(changed)
+            .add_columns(model.created_at.label(_CREATED_AT))
+            .order_by(model.id)
+            .limit(config.SYNC_MAX_CHANGES + 1)
+        )
+    ).all()
+    if len(rows) > config.SYNC_MAX_CHANGES:
+        feed["complete"] = False
+        return feed
+
+    for row in rows:
+        item, item_id, created_at = _unpack(row)
+        feed["changed"].append(item)
+        if created_at is not None and _as_utc(created_at) > since:
+            feed["created"].append(item_id)
+
+    feed["deleted"] = (
+        await db.scalars(
+            select(Tombstone.entity_id).where(
+                Tombstone.entity == SYNC_ENTITIES[model], Tombstone.deleted_at > since
+            )
+        )
+    ).all()
+    return feed
+
+
+async def prune_tombstones():
+    """Надгробия старше срока хранения больше никому не нужны"""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=config.SYNC_TOMBSTONE_TTL_SECONDS)
+    async with async_engine.begin() as conn:
+        result = await conn.execute(delete(Tombstone).where(Tombstone.deleted_at < cutoff))
+    return result.rowcount
+
+
+async def run_tombstone_pruner():
+    while True:
+        await asyncio.sleep(TOMBSTONE_PRUNE_INTERVAL_SECONDS)
+        try:
+            await prune_tombstones()
+        except Exception:
+            logger.exception("Ошибка удаления старых надгробий")
@@ -1,22 +1,24 @@
 # backend/utils.py
-from datetime import datetime, timedelta
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
-
-LOCK_TIMEOUT_SECONDS = 45  # можно менять
-
-
-def clear_expired_lock(entity):
-    if entity.locked_by and entity.locked_at:
-        now = datetime.utcnow()
-        if now - entity.locked_at > timedelta(seconds=LOCK_TIMEOUT_SECONDS):
-            entity.locked_by = None
-            entity.locked_at = None
+from backend.locks import lock_manager
+from backend.prometheus import metrics
 
 
 def get_entity_or_404(db: Session, model, entity_id: int):
     entity = db.get(model, entity_id)
     if not entity:
         raise HTTPException(status_code=404, detail=f"{model.__name__} не найден")
-    clear_expired_lock(entity)
-    return entity
\ No newline at end of file
+    return entity
+
+
+def conflict(entity: str, kind: str, detail: str) -> HTTPException:
+    """409 с учётом в метриках: kind — lock, version или duplicate"""
+    metrics.count_conflict(entity, kind)
+    return HTTPException(status_code=409, detail=detail)
+
+
+def check_lock(entity: str, entity_id: int, user: str, detail: str):
+    """409, если запись заблокирована другим пользователем"""
+    if lock_manager.is_locked_by_other(entity, entity_id, user):
+        raise conflict(entity, "lock", detail)
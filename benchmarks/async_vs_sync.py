@@ -0,0 +1,144 @@
+# benchmarks/async_vs_sync.py
+"""
+Сравнение пропускной способности асинхронного и синхронного пути к БД.
+
+Поднимает два uvicorn-сервера в одном процессе: основное приложение
+backend.main:app (async-эндпоинты) и эталонное приложение с теми же
+эндпоинтами на синхронной Session. Блокировки в обоих идут через
+lock_manager, middleware одинаковые — разница только в пути к БД. Затем одинаковой нагрузкой из N
+потоков гоняет сценарий GUI-клиента: login → список → lock → unlock.
+
+Нужна заполненная база (backend/init_db.py) и свободные порты.
+
+    python -m benchmarks.async_vs_sync --concurrency 64 --duration 15
+"""
+import argparse
+import threading
+import time
+
+import requests
+import uvicorn
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy.orm import Session
+
+from backend.database import get_db
+from backend.locks import lock_manager
+from backend.main import app as async_app
+from backend.models import Owner, UserAccount
+from backend.prometheus import PrometheusMiddleware
+from backend.query_stats import QueryStatsMiddleware
+from backend.routers.lock import MODEL_MAP
+
+sync_app = FastAPI(title="sync baseline")
+sync_app.add_middleware(QueryStatsMiddleware)
+sync_app.add_middleware(PrometheusMiddleware)
+
+
+@sync_app.post("/auth/login")
+def sync_login(data: dict, db: Session = Depends(get_db)):
+    user = db.query(UserAccount).filter_by(username=data["username"]).first()
+    if not user:
+        raise HTTPException(status_code=404)
+    return {"username": user.username, "role": user.role}
+
+
+@sync_app.get("/owners")
+def sync_owners(limit: int = 100, db: Session = Depends(get_db)):
+    owners = db.query(Owner).order_by(Owner.last_name, Owner.id).limit(limit).all()
+    return [{"id": o.id, "last_name": o.last_name} for o in owners]
+
+
+@sync_app.post("/lock/{entity}/{id}")
+def sync_lock(entity: str, id: int, user: str, db: Session = Depends(get_db)):
+    if db.get(MODEL_MAP[entity], id) is None:
+        raise HTTPException(status_code=404)
+    if not lock_manager.acquire(entity, id, user):
+        raise HTTPException(status_code=409)
+    return {"status": "locked", "ttl": lock_manager.ttl}
+
+
+@sync_app.post("/unlock/{entity}/{id}")
+def sync_unlock(entity: str, id: int, user: str):
+    if not lock_manager.release(entity, id, user):
+        raise HTTPException(status_code=403)
+    return {"status": "unlocked"}
+
+
+def start_server(app, port):
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def client_session(base_url, username, owner_ids, deadline, counters, lock):
+    http = requests.Session()
+    done = errors = 0
+    i = 0
+    while time.perf_counter() < deadline:
+        owner_id = owner_ids[i % len(owner_ids)]
+        i += 1
+        try:
+            responses = [
+                http.post(f"{base_url}/auth/login", json={"username": username}),
+                http.get(f"{base_url}/owners", params={"limit": 50}),
+                http.post(f"{base_url}/lock/owner/{owner_id}", params={"user": username}),
+                http.post(f"{base_url}/unlock/owner/{owner_id}", params={"user": username}),
+            ]
+            done += len(responses)
+            errors += sum(1 for r in responses if r.status_code >= 500)
+        except requests.RequestException:
+            errors += 1
+    with lock:
+        counters["requests"] += done
+        counters["errors"] += errors
+
+
+def run(base_url, username, owner_ids, concurrency, duration):
+    counters = {"requests": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    # У каждого клиента свой владелец, чтобы не мерить конфликты блокировок
+    workers = [
+        threading.Thread(
+            target=client_session,
+            args=(base_url, username, owner_ids[n::concurrency] or owner_ids, deadline, counters, lock),
+        )
+        for n in range(concurrency)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return counters["requests"] / duration, counters["errors"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--sync-port", type=int, default=8101)
+    parser.add_argument("--async-port", type=int, default=8102)
+    args = parser.parse_args()
+
+    db = next(get_db())
+    owner_ids = [row.id for row in db.query(Owner.id).order_by(Owner.id).limit(args.concurrency * 4)]
+    db.close()
+    if not owner_ids:
+        raise SystemExit("В базе нет владельцев — сначала заполните её")
+
+    start_server(sync_app, args.sync_port)
+    start_server(async_app, args.async_port)
+
+    for name, port in (("sync", args.sync_port), ("async", args.async_port)):
+        rps, errors = run(
+            f"http://127.0.0.1:{port}", args.user, owner_ids, args.concurrency, args.duration
+        )
+        print(f"{name:>5}: {rps:8.1f} req/s, ошибок: {errors}")
+
+
+if __name__ == "__main__":
+    main()
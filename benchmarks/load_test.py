@@ -0,0 +1,267 @@
+# benchmarks/load_test.py
+"""
+Нагрузочный тест API: N одновременных сессий GUI-клиента.
+
+Каждая сессия повторяет сценарий: вход → списки вкладок → выбор записи →
+блокировка → сохранение → снятие блокировки. По каждому эндпоинту
+считаются p50/p95/p99 задержки и пропускная способность; результат
+сохраняется в JSON, чтобы сравнивать версии между собой (--compare).
+
+По умолчанию поднимает backend.main:app в процессе; --url — внешний сервер.
+В процессе сервер и клиентские потоки делят GIL — такие прогоны сравнимы
+только между собой (meta.in_process). --seed-protocols N сначала догружает
+в базу синтетические данные; --seed задаёт выбор записей в сессиях.
+
+    python -m benchmarks.load_test --concurrency 32 --duration 30 --out results/v2.json
+    python -m benchmarks.load_test --compare results/v1.json --out results/v2.json
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import requests
+from sqlalchemy import func, select
+
+from backend.database import SessionLocal
+from backend.models import Inspector, Owner, Protocol, Vehicle
+from benchmarks.async_vs_sync import start_server
+
+LIST_PATHS = ["/owners", "/inspectors", "/vehicles", "/protocols", "/violations"]
+PERCENTILES = (50, 95, 99)
+
+
+class Recorder:
+    """Задержки по эндпоинтам; у каждой сессии свой, сливаются в конце"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def call(self, name, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = method(url, timeout=30, **kwargs)
+        except requests.RequestException:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def merge(self, other):
+        for name, values in other.latencies.items():
+            self.latencies[name].extend(values)
+        for name, count in other.errors.items():
+            self.errors[name] += count
+
+
+def gui_session(base_url, username, owner_ids, page_size, think_time, deadline, recorder, seed):
+    http = requests.Session()
+    rnd = random.Random(seed)
+    while time.perf_counter() < deadline:
+        recorder.call("POST /auth/login", http.post, f"{base_url}/auth/login",
+                      json={"username": username})
+        for path in LIST_PATHS:
+            recorder.call(f"GET {path}", http.get, f"{base_url}{path}",
+                          params={"limit": page_size})
+        owner_id = rnd.choice(owner_ids)
+        response = recorder.call("GET /owners/{id}", http.get, f"{base_url}/owners/{owner_id}")
+        if response is None or response.status_code != 200:
+            continue
+        owner = response.json()
+        item = [{"entity": "owner", "id": owner_id}]
+        response = recorder.call("POST /locks/batch (lock)", http.post, f"{base_url}/locks/batch",
+                                 json={"user": username, "lock": item})
+        if response is None or response.status_code != 200 or not response.json()["ok"]:
+            continue
+        time.sleep(think_time)
+        recorder.call(
+            "PUT /owners/{id}", http.put, f"{base_url}/owners/{owner_id}",
+            json={
+                "last_name": owner["last_name"],
+                "first_name": owner["first_name"],
+                "middle_name": owner["middle_name"],
+                "date_of_birth": owner["date_of_birth"],
+                "address": owner["address"],
+                "user": username,
+                "version": owner["version"],
+            },
+        )
+        recorder.call("POST /locks/batch (unlock)", http.post, f"{base_url}/locks/batch",
+                      json={"user": username, "unlock": item})
+        time.sleep(think_time)
+
+
+def percentile(sorted_values, p):
+    """Ближайший ранг: без интерполяции, как в большинстве APM"""
+    index = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def summarize(recorder, duration):
+    endpoints = {}
+    for name in sorted(set(recorder.latencies) | set(recorder.errors)):
+        values = sorted(recorder.latencies[name])
+        stats = {
+            "count": len(values),
+            "errors": recorder.errors[name],
+            "rps": round(len(values) / duration, 2),
+        }
+        if values:
+            for p in PERCENTILES:
+                stats[f"p{p}_ms"] = round(percentile(values, p) * 1000, 2)
+            stats["mean_ms"] = round(sum(values) / len(values) * 1000, 2)
+            stats["max_ms"] = round(values[-1] * 1000, 2)
+        endpoints[name] = stats
+    total = sum(s["count"] for s in endpoints.values())
+    return {
+        "endpoints": endpoints,
+        "total": {
+            "requests": total,
+            "errors": sum(s["errors"] for s in endpoints.values()),
+            "rps": round(total / duration, 2),
+        },
+    }
+
+
+def database_size():
+    with SessionLocal() as db:
+        return {
+            model.__tablename__: db.scalar(select(func.count(model.id)))
+            for model in (Owner, Inspector, Vehicle, Protocol)
+        }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result, baseline=None):
+    base = baseline["endpoints"] if baseline else {}
+    print(f"{'эндпоинт':<28}{'запросов':>9}{'ошибок':>8}{'req/s':>9}"
+          f"{'p50':>9}{'p95':>9}{'p99':>9}  мс")
+    for name, stats in result["endpoints"].items():
+        line = (f"{name:<28}{stats['count']:>9}{stats['errors']:>8}{stats['rps']:>9.1f}"
+                + "".join(f"{stats.get(f'p{p}_ms', 0):>9.1f}" for p in PERCENTILES))
+        old = base.get(name)
+        if old and old.get("p95_ms"):
+            change = (stats.get("p95_ms", 0) - old["p95_ms"]) / old["p95_ms"] * 100
+            line += f"  p95 {change:+.0f}%"
+        print(line)
+    total = result["total"]
+    print(f"всего: {total['requests']} запросов, {total['rps']:.1f} req/s, ошибок: {total['errors']}")
+    if baseline:
+        if baseline["meta"].get("in_process") != result["meta"]["in_process"]:
+            print("внимание: один прогон — с сервером в процессе, другой — с внешним; сравнение неравноценно")
+        old_rps = baseline["total"]["rps"]
+        if old_rps:
+            print(f"пропускная способность к базовой версии: {(total['rps'] - old_rps) / old_rps * 100:+.0f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=16, help="одновременных сессий GUI")
+    parser.add_argument("--duration", type=float, default=30.0, help="секунд замера")
+    parser.add_argument("--warmup", type=float, default=3.0, help="секунд прогрева без учёта")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--think-time", type=float, default=0.0, help="пауза между действиями, с")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--url", help="внешний сервер; по умолчанию приложение поднимается в процессе")
+    parser.add_argument("--port", type=int, default=8104)
+    parser.add_argument("--seed-protocols", type=int, help="сначала догрузить N синтетических протоколов")
+    parser.add_argument("--seed", type=int, default=0, help="зерно выбора записей; сессия n — seed + n")
+    parser.add_argument("--out", help="куда сохранить результаты в JSON")
+    parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+    args = parser.parse_args()
+
+    if args.seed_protocols:
+        from backend.generate_data import generate
+
+        generate(
+            owners=max(args.seed_protocols // 5, 1),
+            vehicles=max(args.seed_protocols * 6 // 25, 1),
+            inspectors=max(args.seed_protocols // 2000, 1),
+            protocols=args.seed_protocols,
+            seed=0,
+        )
+
+    with SessionLocal() as db:
+        owner_ids = list(db.scalars(select(Owner.id).order_by(Owner.id).limit(args.concurrency * 50)))
+    if not owner_ids:
+        raise SystemExit("В базе нет владельцев — заполните её или укажите --seed-protocols")
+
+    base_url = args.url
+    if not base_url:
+        from backend.main import app
+
+        start_server(app, args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    def run(duration):
+        deadline = time.perf_counter() + duration
+        recorders = [Recorder() for _ in range(args.concurrency)]
+        # У каждой сессии свои владельцы, чтобы не мерить конфликты блокировок
+        workers = [
+            threading.Thread(
+                target=gui_session,
+                args=(base_url, args.user, owner_ids[n::args.concurrency] or owner_ids,
+                      args.page_size, args.think_time, deadline, recorder, args.seed + n),
+            )
+            for n, recorder in enumerate(recorders)
+        ]
+        started = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        total = Recorder()
+        for recorder in recorders:
+            total.merge(recorder)
+        return total, time.perf_counter() - started
+
+    if args.warmup > 0:
+        run(args.warmup)
+    recorder, elapsed = run(args.duration)
+
+    result = summarize(recorder, elapsed)
+    result["meta"] = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "url": base_url,
+        "in_process": not args.url,
+        "seed": args.seed,
+        "concurrency": args.concurrency,
+        "duration": round(elapsed, 2),
+        "page_size": args.page_size,
+        "think_time": args.think_time,
+        "database": database_size(),
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
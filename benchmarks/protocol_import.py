@@ -0,0 +1,115 @@
+# benchmarks/protocol_import.py
+"""
+Скорость импорта протоколов: строк в секунду через POST /protocols
+(по одной строке) и через POST /protocols/bulk (JSON-массив и NDJSON).
+
+Поднимает backend.main:app на свободном порту, берёт из базы реальные
+ТС, владельцев, инспектора и нарушение и создаёт протоколы с номерами
+BENCH-<метка>-<n>. После замера созданные протоколы удаляются
+(--keep — оставить).
+
+    python -m benchmarks.protocol_import --rows 20000 --single-rows 1000
+"""
+import argparse
+import json
+import time
+
+import requests
+from sqlalchemy import delete, select
+
+from backend.database import SessionLocal
+from backend.main import app
+from backend.models import Inspector, Owner, Protocol, Vehicle, Violation
+from benchmarks.async_vs_sync import start_server
+
+
+def sample_refs(limit):
+    """Реальные ссылки из базы: (госномер, 'Фамилия Имя' владельца), инспектор, нарушение"""
+    with SessionLocal() as db:
+        vehicles = db.execute(
+            select(Vehicle.state_number, Owner.last_name + " " + Owner.first_name)
+            .join(Owner, Vehicle.owner_id == Owner.id)
+            .limit(limit)
+        ).all()
+        inspector = db.execute(select(Inspector.last_name + " " + Inspector.first_name)).scalar()
+        violation = db.execute(select(Violation.name)).scalar()
+    if not vehicles or not inspector or not violation:
+        raise SystemExit("В базе нет ТС, инспекторов или нарушений — сначала заполните её")
+    return vehicles, inspector, violation
+
+
+def make_rows(prefix, count, refs):
+    vehicles, inspector, violation = refs
+    rows = []
+    for n in range(count):
+        state_number, owner = vehicles[n % len(vehicles)]
+        rows.append(
+            {
+                "number": f"{prefix}-{n}",
+                "issue_date": "2025-01-01",
+                "issue_time": "12:00:00",
+                "vehicle": state_number,
+                "owner": owner,
+                "inspector": inspector,
+                "violation": violation,
+            }
+        )
+    return rows
+
+
+def bench_single(http, base_url, user, rows):
+    started = time.perf_counter()
+    for row in rows:
+        http.post(f"{base_url}/protocols", json=dict(row, user=user)).raise_for_status()
+    return len(rows), time.perf_counter() - started
+
+
+def bench_bulk(http, base_url, user, rows, ndjson):
+    if ndjson:
+        body = "\n".join(json.dumps(row, ensure_ascii=False) for row in rows).encode("utf-8")
+        headers = {"Content-Type": "application/x-ndjson"}
+    else:
+        body = json.dumps(rows, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+    started = time.perf_counter()
+    response = http.post(
+        f"{base_url}/protocols/bulk", params={"user": user}, data=body, headers=headers
+    )
+    response.raise_for_status()
+    return response.json()["created"], time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000, help="строк для пакетного импорта")
+    parser.add_argument("--single-rows", type=int, default=500, help="строк для POST /protocols")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--port", type=int, default=8103)
+    parser.add_argument("--keep", action="store_true", help="не удалять созданные протоколы")
+    args = parser.parse_args()
+
+    refs = sample_refs(1000)
+    start_server(app, args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+    prefix = f"BENCH-{int(time.time())}"
+    http = requests.Session()
+
+    runs = [
+        ("single", lambda rows: bench_single(http, base_url, args.user, rows), args.single_rows),
+        ("bulk json", lambda rows: bench_bulk(http, base_url, args.user, rows, False), args.rows),
+        ("bulk ndjson", lambda rows: bench_bulk(http, base_url, args.user, rows, True), args.rows),
+    ]
+    try:
+        for name, bench, count in runs:
+            rows = make_rows(f"{prefix}-{name.replace(' ', '-')}", count, refs)
+            created, elapsed = bench(rows)
+            print(f"{name:>11}: {created / elapsed:10.1f} строк/с ({created} строк за {elapsed:.2f} с)")
+    finally:
+        if not args.keep:
+            with SessionLocal() as db:
+                db.execute(delete(Protocol).where(Protocol.number.like(f"{prefix}-%")))
+                db.commit()
+
+
+if __name__ == "__main__":
+    main()
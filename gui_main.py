@@ -5,6 +5,9 @@ from ui.inspector_tab import InspectorTab
 from ui.vehicle_tab import VehicleTab
 from ui.violation_tab import ViolationTab
 from ui.protocol_tab import ProtocolTab
+from ui.background import background
+from ui.events import EventStream
+from ui.quick_search import QuickSearch
 
 
 def launch_main(username, role):
@@ -21,6 +24,29 @@ def launch_main(username, role):
     style.configure("Treeview", font=("Segoe UI", 10), rowheight=28)
     style.map("TNotebook.Tab", background=[("selected", "#d0e0ff")])
 
+    # Индикатор фоновых запросов: виден, пока есть незавершённые вызовы
+    status_bar = ttk.Frame(root)
+    status_bar.pack(side="bottom", fill="x", padx=10, pady=(0, 5))
+    status_label = ttk.Label(status_bar, text="")
+    status_label.pack(side="left")
+    progress = ttk.Progressbar(status_bar, mode="indeterminate", length=150)
+
+    def on_busy_changed(busy):
+        if busy:
+            status_label.config(text=f"⏳ Запросов к серверу: {busy}")
+            if not progress.winfo_ismapped():
+                progress.pack(side="right")
+                progress.start(15)
+        else:
+            status_label.config(text="")
+            progress.stop()
+            progress.pack_forget()
+
+    background.attach(root, on_busy_changed)
+
+    quick_search = QuickSearch(root, on_open=lambda hit: open_search_hit(hit))
+    quick_search.pack(side="top", fill="x", padx=10, pady=(10, 0))
+
     notebook = ttk.Notebook(root)
     notebook.pack(expand=True, fill="both", padx=10, pady=10)
 
@@ -77,4 +103,35 @@ def launch_main(username, role):
 
     notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
 
+    # Найденная запись открывается на своей вкладке, как при выборе строки
+    search_targets = {
+        "owner": (owner_tab, owner_tab.load_selected_owner_data),
+        "vehicle": (vehicle_tab, vehicle_tab.load_selected_vehicle_data),
+        "protocol": (protocol_tab, protocol_tab.load_selected_protocol_data),
+        "violation": (violation_tab, violation_tab.load_selected_violation_data),
+    }
+
+    def open_search_hit(hit):
+        tab, load = search_targets[hit["kind"]]
+        notebook.select(tab.frame)
+        tab.open_record(hit["id"], on_locked=load)
+
+    # События сервера: изменения записей и чужие блокировки — без опроса
+    def on_server_event(data):
+        for tab in frame_to_tab.values():
+            tab.on_server_event(data)
+
+    events = EventStream(on_server_event)
+    events.start()
+
+    # При выходе снимаем все блокировки вкладок
+    def on_close():
+        events.stop()
+        for tab in frame_to_tab.values():
+            tab.unlock_entity(wait=True)
+        background.shutdown()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+
     root.mainloop()
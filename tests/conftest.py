@@ -0,0 +1,145 @@
+# tests/conftest.py
+# Общие фикстуры: приложение поверх временной SQLite-базы (sync и async пути)
+from datetime import date, time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import get_async_db, get_db, get_session_factory
+from backend.main import app
+from backend.models import (
+    Article,
+    Base,
+    Brand,
+    Color,
+    Inspector,
+    Model,
+    Owner,
+    Protocol,
+    Vehicle,
+    Violation,
+    ViolationType,
+)
+
+
+class StatementCounter:
+    """Число SQL-операторов, прошедших через движки (before_cursor_execute)"""
+
+    def __init__(self, *engines):
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+@pytest.fixture
+def sqlite_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'test.db'}"
+
+
+@pytest.fixture
+def sync_engine(sqlite_url):
+    engine = create_engine(sqlite_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(sync_engine):
+    return sessionmaker(bind=sync_engine, autoflush=False)
+
+
+@pytest.fixture
+def async_engine(sqlite_url, sync_engine):
+    engine = create_async_engine(sqlite_url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+    yield engine
+    engine.sync_engine.dispose()
+
+
+@pytest.fixture
+def client(session_factory, async_engine):
+    """TestClient без lifespan: фоновые задачи приложения не запускаются"""
+    async_sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def override_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_async_db():
+        async with async_sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_async_db] = override_async_db
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def _reference_data(db):
+    """Справочники для протоколов; при повторном вызове — уже созданные"""
+    inspector = db.query(Inspector).first()
+    if inspector:
+        return db.query(Model).first(), db.query(Color).first(), db.query(Violation).first(), inspector
+    brand = Brand(name="Toyota")
+    db.add(brand)
+    db.flush()
+    model = Model(name="Camry", brand_id=brand.id)
+    color = Color(name="Белый")
+    violation_type = ViolationType(name="Скоростной режим")
+    article = Article(number="12.9", name="Превышение скорости")
+    db.add_all([model, color, violation_type, article])
+    db.flush()
+    violation = Violation(
+        name="Превышение на 20-40 км/ч",
+        violation_type_id=violation_type.id,
+        article_id=article.id,
+    )
+    inspector = Inspector(
+        last_name="Кузнецов", first_name="Илья", middle_name="Викторович",
+        department="ОБ ДПС", rank="капитан",
+    )
+    db.add_all([violation, inspector])
+    db.flush()
+    return model, color, violation, inspector
+
+
+def seed_protocols(db, count: int, start: int = 0):
+    """count протоколов с номерами от start, у каждого свои ТС и владелец"""
+    model, color, violation, inspector = _reference_data(db)
+    for i in range(start, start + count):
+        owner = Owner(
+            last_name=f"Иванов{i}", first_name="Пётр", middle_name="Сергеевич",
+            date_of_birth=date(1985, 5, 12), address="ул. Ленина, 1",
+        )
+        db.add(owner)
+        db.flush()
+        vehicle = Vehicle(
+            state_number=f"А{i:03d}ВС77", model_id=model.id, color_id=color.id, owner_id=owner.id
+        )
+        db.add(vehicle)
+        db.flush()
+        db.add(
+            Protocol(
+                number=f"ПР-{i:05d}",
+                issue_date=date(2025, 9, i % 28 + 1),
+                issue_time=time(12, 0),
+                vehicle_id=vehicle.id,
+                owner_id=owner.id,
+                inspector_id=inspector.id,
+                violation_id=violation.id,
+            )
+        )
+    db.commit()
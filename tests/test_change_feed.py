@@ -0,0 +1,80 @@
+# tests/test_change_feed.py
+# Журнал изменений: изменённые и новые строки после since, надгробия
+# удалённых, watermark не отстаёт от прошлого ответа
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from backend import config
+from backend.models import Owner, Protocol, Vehicle
+from backend.sync import SYNC_ENTITIES
+from tests.conftest import seed_protocols
+
+
+def _parse(watermark):
+    value = datetime.fromisoformat(watermark)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def old_vehicles(session_factory, monkeypatch):
+    """Три ТС, созданные и изменённые час назад; since — полчаса назад"""
+    monkeypatch.setattr(config, "SYNC_OVERLAP_SECONDS", 0)
+    hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    with session_factory() as db:
+        seed_protocols(db, 3)
+        for model in SYNC_ENTITIES:
+            db.execute(update(model).values(created_at=hour_ago, updated_at=hour_ago))
+        db.commit()
+    return (hour_ago + timedelta(minutes=30)).isoformat()
+
+
+def test_feed_without_since_returns_only_watermark(client, old_vehicles):
+    response = client.get("/vehicles/changes")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["changed"] == [] and body["created"] == [] and body["deleted"] == []
+    assert body["complete"] is True
+    assert _parse(body["watermark"]) > datetime.fromisoformat(old_vehicles)
+
+
+def test_feed_returns_updates_creations_and_tombstones(client, session_factory, old_vehicles):
+    since = old_vehicles
+    first = client.get("/vehicles/changes", params={"since": since}).json()
+    assert first["changed"] == [] and first["deleted"] == []
+
+    with session_factory() as db:
+        db.get(Vehicle, 2).state_number = "М222ММ77"
+        db.query(Protocol).filter_by(vehicle_id=3).delete()
+        db.delete(db.get(Vehicle, 3))
+        db.add(Vehicle(state_number="Н444НН77", model_id=1, color_id=1, owner_id=1))
+        db.commit()
+
+    second = client.get("/vehicles/changes", params={"since": since}).json()
+
+    assert second["complete"] is True
+    assert {row["id"]: row["state_number"] for row in second["changed"]} == {
+        2: "М222ММ77",
+        4: "Н444НН77",
+    }
+    assert second["created"] == [4]
+    assert second["deleted"] == [3]
+    assert _parse(second["watermark"]) >= _parse(first["watermark"])
+
+    # Следующий опрос с новой отметкой не повторяет уже отданное
+    third = client.get("/vehicles/changes", params={"since": second["watermark"]}).json()
+    assert third["changed"] == [] and third["deleted"] == []
+    assert _parse(third["watermark"]) >= _parse(second["watermark"])
+
+
+def test_related_owner_change_marks_vehicle_changed(client, session_factory, old_vehicles):
+    with session_factory() as db:
+        db.get(Owner, 1).first_name = "Павел"
+        db.commit()
+
+    body = client.get("/vehicles/changes", params={"since": old_vehicles}).json()
+
+    assert [(row["id"], row["owner"]) for row in body["changed"]] == [(1, "Иванов0 Павел")]
+    assert body["created"] == []
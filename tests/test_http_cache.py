@@ -0,0 +1,52 @@
+# tests/test_http_cache.py
+# Условные GET справочников: 304 на неизменённый набор, 200 после правки —
+# в том числе правки без увеличения version
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from backend.models import Color
+
+
+@pytest.fixture
+def colors(session_factory):
+    # Отметка времени в прошлом: правка в ту же секунду, что и вставка,
+    # в SQLite не отличима по updated_at
+    hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    with session_factory() as db:
+        db.add_all([Color(name="Белый"), Color(name="Чёрный")])
+        db.flush()
+        db.execute(update(Color).values(updated_at=hour_ago))
+        db.commit()
+
+
+def test_unchanged_set_is_not_modified(client, colors):
+    first = client.get("/vehicles/colors")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    by_etag = client.get("/vehicles/colors", headers={"If-None-Match": etag})
+    by_date = client.get(
+        "/vehicles/colors", headers={"If-Modified-Since": first.headers["Last-Modified"]}
+    )
+
+    assert by_etag.status_code == 304
+    assert by_etag.headers["ETag"] == etag
+    assert by_etag.content == b""
+    assert by_date.status_code == 304
+
+
+def test_edit_without_version_bump_changes_etag(client, session_factory, colors):
+    first = client.get("/vehicles/colors")
+
+    with session_factory() as db:
+        db.query(Color).filter_by(name="Белый").one().name = "Серебристый"
+        db.commit()
+
+    response = client.get("/vehicles/colors", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != first.headers["ETag"]
+    assert "Серебристый" in {c["name"] for c in response.json()}
+    assert response.headers["Last-Modified"] != first.headers["Last-Modified"]
@@ -0,0 +1,16 @@
+# tests/test_load_test.py
+# Перцентили нагрузочного теста — ближайший ранг
+import pytest
+
+from benchmarks.load_test import percentile
+
+
+@pytest.mark.parametrize("p,expected", [(50, 50), (95, 95), (99, 99), (100, 100), (1, 1), (0, 1)])
+def test_percentile_nearest_rank(p, expected):
+    assert percentile(list(range(1, 101)), p) == expected
+
+
+def test_percentile_small_samples():
+    assert percentile([7], 99) == 7
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 95) == 4
@@ -0,0 +1,108 @@
+# tests/test_locks.py
+# Менеджер блокировок: захват и снятие, чужие блокировки, истечение аренды,
+# пакетный захват «всё или ничего» через /locks/batch
+import time
+
+import pytest
+
+from backend.locks import LockManager, MemoryLockBackend, lock_manager
+from tests.conftest import seed_protocols
+
+
+def test_active_count_skips_expired_leases():
+    backend = MemoryLockBackend()
+    backend.acquire("lock:owner:1", "ivanov", ttl=60)
+    backend.acquire("lock:owner:2", "ivanov", ttl=0.01)
+    time.sleep(0.02)
+
+    # Истёкшая аренда ещё лежит в хранилище до прохода очистки
+    assert backend.active_count() == 1
+    assert backend.purge_expired() == 1
+    assert backend.active_count() == 1
+
+
+@pytest.fixture
+def manager():
+    return LockManager(MemoryLockBackend(), ttl=60)
+
+
+def test_acquire_and_release(manager):
+    assert manager.acquire("owner", 1, "ivanov")
+    assert manager.holder("owner", 1) == "ivanov"
+    # Повторный захват своей блокировки продлевает её
+    assert manager.acquire("owner", 1, "ivanov")
+    assert manager.release("owner", 1, "ivanov")
+    assert manager.holder("owner", 1) is None
+    assert not manager.release("owner", 1, "ivanov")
+
+
+def test_other_owner_cannot_take_or_release(manager):
+    assert manager.acquire("owner", 1, "ivanov")
+
+    assert not manager.acquire("owner", 1, "petrov")
+    assert not manager.renew("owner", 1, "petrov")
+    assert not manager.release("owner", 1, "petrov")
+    assert manager.is_locked_by_other("owner", 1, "petrov")
+    assert not manager.is_locked_by_other("owner", 1, "ivanov")
+    assert manager.holder("owner", 1) == "ivanov"
+
+
+def test_expired_lease_can_be_taken_by_other():
+    manager = LockManager(MemoryLockBackend(), ttl=0.01)
+    assert manager.acquire("owner", 1, "ivanov")
+    time.sleep(0.02)
+
+    assert manager.holder("owner", 1) is None
+    assert not manager.renew("owner", 1, "ivanov")
+    assert manager.acquire("owner", 1, "petrov")
+
+
+@pytest.fixture
+def app_locks(monkeypatch):
+    """Чистое хранилище блокировок приложения на время теста"""
+    monkeypatch.setattr(lock_manager, "backend", MemoryLockBackend())
+    return lock_manager
+
+
+def test_batch_lock_is_all_or_nothing(client, session_factory, app_locks):
+    with session_factory() as db:
+        seed_protocols(db, 3)
+    app_locks.acquire("owner", 2, "petrov")
+
+    response = client.post(
+        "/locks/batch",
+        json={"user": "ivanov", "lock": [{"entity": "owner", "id": i} for i in (1, 2, 3)]},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ok"] is False
+    assert [r["status"] for r in body["results"]] == ["skipped", "conflict", "skipped"]
+    assert app_locks.holder("owner", 1) is None
+    assert app_locks.holder("owner", 2) == "petrov"
+    assert app_locks.holder("owner", 3) is None
+
+
+def test_batch_unlocks_then_locks(client, session_factory, app_locks):
+    with session_factory() as db:
+        seed_protocols(db, 3)
+    app_locks.acquire("owner", 1, "ivanov")
+    app_locks.acquire("owner", 3, "petrov")
+
+    response = client.post(
+        "/locks/batch",
+        json={
+            "user": "ivanov",
+            "unlock": [{"entity": "owner", "id": 1}, {"entity": "owner", "id": 3}],
+            "lock": [{"entity": "owner", "id": 2}],
+        },
+    )
+
+    body = response.json()
+    assert body["ok"] is True
+    assert [(r["action"], r["status"]) for r in body["results"]] == [
+        ("unlock", "unlocked"), ("unlock", "not_owner"), ("lock", "locked"),
+    ]
+    assert app_locks.holder("owner", 1) is None
+    assert app_locks.holder("owner", 2) == "ivanov"
+    assert app_locks.holder("owner", 3) == "petrov"
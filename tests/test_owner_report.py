@@ -0,0 +1,63 @@
+# tests/test_owner_report.py
+# Потоковый отчёт по владельцам: NDJSON и CSV, включая владельца без ТС
+# и ТС без протоколов (LEFT JOIN)
+import csv
+import io
+import json
+from datetime import date
+
+import pytest
+
+from backend.models import Color, Model, Owner, Vehicle
+from tests.conftest import seed_protocols
+
+
+@pytest.fixture
+def report_data(session_factory):
+    db = session_factory()
+    seed_protocols(db, 1)
+    db.add(Owner(
+        last_name="Безмашинный", first_name="Олег", middle_name="Ильич",
+        date_of_birth=date(1990, 1, 2), address="ул. Мира, 3",
+    ))
+    owner = Owner(
+        last_name="Аккуратный", first_name="Павел", middle_name="Андреевич",
+        date_of_birth=date(1979, 3, 4), address="ул. Садовая, 5",
+    )
+    db.add(owner)
+    db.flush()
+    db.add(Vehicle(
+        state_number="В999ОР77", model_id=db.query(Model.id).scalar(),
+        color_id=db.query(Color.id).scalar(), owner_id=owner.id,
+    ))
+    db.commit()
+    db.close()
+
+
+def test_owner_report_ndjson(client, report_data):
+    response = client.get("/reports/owners/stream")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    owners = {o["Владелец"]: o for o in map(json.loads, response.text.splitlines())}
+    assert len(owners) == 3
+    assert owners["Иванов0 Пётр Сергеевич"]["ТС"][0]["Нарушения"][0]["Статья"] == (
+        "12.9 — Превышение скорости"
+    )
+    assert owners["Безмашинный Олег Ильич"]["ТС"] == []
+    careful = owners["Аккуратный Павел Андреевич"]["ТС"]
+    assert [v["Гос. номер"] for v in careful] == ["В999ОР77"]
+    assert careful[0]["Нарушения"] == []
+
+
+def test_owner_report_csv(client, report_data):
+    response = client.get("/reports/owners/stream", params={"format": "csv"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = {r["Владелец"]: r for r in csv.DictReader(io.StringIO(response.text))}
+    assert len(rows) == 3
+    assert rows["Иванов0 Пётр Сергеевич"]["Нарушение"] == "Превышение на 20-40 км/ч"
+    assert rows["Безмашинный Олег Ильич"]["Гос. номер"] == ""
+    assert rows["Аккуратный Павел Андреевич"]["Гос. номер"] == "В999ОР77"
+    assert rows["Аккуратный Павел Андреевич"]["Нарушение"] == ""
@@ -0,0 +1,88 @@
+# tests/test_pagination.py
+# Keyset-пагинация: обход по X-Next-Cursor без повторов и пропусков
+# при равных ключах сортировки, отказ на испорченный курсор и чужую сортировку
+import base64
+import json
+from datetime import date
+
+import pytest
+
+from backend.models import Owner
+from backend.pagination import NEXT_CURSOR_HEADER
+from tests.conftest import seed_protocols
+
+
+def walk(client, path, params, limit):
+    """Все страницы подряд по курсору: id строк и число запросов"""
+    ids, after, pages = [], None, 0
+    while True:
+        query = dict(params, limit=limit)
+        if after:
+            query["after"] = after
+        response = client.get(path, params=query)
+        assert response.status_code == 200
+        ids.extend(row["id"] for row in response.json())
+        pages += 1
+        after = response.headers.get(NEXT_CURSOR_HEADER)
+        if not after:
+            return ids, pages
+
+
+@pytest.fixture
+def owners_with_ties(session_factory):
+    with session_factory() as db:
+        for i, last_name in enumerate(["Петров"] * 7 + ["Андреев", "Яковлев"] * 2):
+            db.add(Owner(
+                last_name=last_name, first_name=f"Имя{i}", middle_name="Отчество",
+                date_of_birth=date(1980, 1, 1), address="ул. Мира, 1",
+            ))
+        db.commit()
+
+
+@pytest.mark.parametrize("sort", ["last_name", "-last_name", "id", "-id"])
+def test_owner_pages_have_no_duplicates_or_gaps(client, owners_with_ties, sort):
+    ids, pages = walk(client, "/owners", {"sort": sort}, limit=3)
+    everything = client.get("/owners", params={"sort": sort, "limit": 100}).json()
+
+    assert ids == [row["id"] for row in everything]
+    assert len(set(ids)) == 11
+    assert pages == 4
+
+
+@pytest.mark.parametrize("sort", ["issue_date", "-issue_date"])
+def test_protocol_pages_with_tied_dates(client, session_factory, sort):
+    with session_factory() as db:
+        seed_protocols(db, 40)  # даты повторяются: день — номер % 28
+
+    ids, _ = walk(client, "/protocols", {"sort": sort}, limit=7)
+    everything = client.get("/protocols", params={"sort": sort, "limit": 100}).json()
+
+    assert ids == [row["id"] for row in everything]
+    assert sorted(ids) == list(range(1, 41))
+
+
+def _cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@pytest.mark.parametrize(
+    "after",
+    [
+        "не-курсор",
+        _cursor(["Петров"]),  # число ключей не совпадает
+        _cursor(["Петров", "abc"]),  # id не число
+        _cursor({"id": 1}),
+    ],
+)
+def test_tampered_cursor_is_rejected(client, owners_with_ties, after):
+    response = client.get("/owners", params={"after": after})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Некорректный курсор"
+
+
+def test_sort_outside_whitelist_is_rejected(client):
+    response = client.get("/owners", params={"sort": "first_name"})
+
+    assert response.status_code == 400
+    assert "Недопустимая сортировка" in response.json()["detail"]
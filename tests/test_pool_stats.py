@@ -0,0 +1,61 @@
+# tests/test_pool_stats.py
+# Метрики пулов: таймаут ожидания и ошибка подключения считаются раздельно,
+# асинхронный пул считает выдачи так же, как синхронный
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend.database import TimedAsyncQueuePool, TimedQueuePool
+
+
+def test_pool_timeout_is_counted_as_timeout(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+
+    assert engine.pool.timeouts == 1
+    assert engine.pool.connect_errors == 0
+
+
+def test_connect_failure_is_not_counted_as_timeout(tmp_path):
+    # Каталога нет — SQLite не может открыть файл базы
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'missing' / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    with pytest.raises(exc.OperationalError):
+        engine.connect()
+
+    assert engine.pool.timeouts == 0
+    assert engine.pool.connect_errors == 1
+
+
+def test_async_pool_counts_checkouts(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedAsyncQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+
+    async def run():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        # dispose() подменяет пул новым — счётчики читаем до него
+        checkouts, timeouts = engine.pool.checkouts, engine.pool.timeouts
+        await engine.dispose()
+        return checkouts, timeouts
+
+    assert asyncio.run(run()) == (1, 0)
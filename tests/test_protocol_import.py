@@ -0,0 +1,132 @@
+# tests/test_protocol_import.py
+# Пакетный импорт протоколов: результат по каждой строке, ошибка БД
+# откатывает только свою пачку
+import json
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from backend import protocol_import
+from backend.models import Inspector, Owner, Protocol, UserAccount, Vehicle, Violation
+from backend.routers import protocols
+from tests.conftest import StatementCounter, seed_protocols
+
+
+@pytest.fixture
+def seeded(session_factory):
+    with session_factory() as db:
+        db.add(UserAccount(username="importer", role="admin"))
+        seed_protocols(db, 3)
+
+
+def protocol_row(number, i=0):
+    return {
+        "number": number,
+        "issue_date": "2025-10-01",
+        "issue_time": "10:30:00",
+        "vehicle": f"А{i:03d}ВС77",
+        "owner": f"Иванов{i} Пётр",
+        "inspector": "Кузнецов Илья",
+        "violation": "Превышение на 20-40 км/ч",
+    }
+
+
+def post_ndjson(client, rows):
+    return client.post(
+        "/protocols/bulk",
+        params={"user": "importer"},
+        content="\n".join(json.dumps(row, ensure_ascii=False) for row in rows),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+
+def test_duplicate_number_mid_stream(client, seeded, session_factory):
+    rows = [protocol_row("ИМ-1"), protocol_row("ПР-00001", 1), protocol_row("ИМ-1"), protocol_row("ИМ-2", 2)]
+
+    response = post_ndjson(client, rows)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["status"] for r in body["results"]] == ["created", "exists", "exists", "created"]
+    assert [r["row"] for r in body["results"]] == [0, 1, 2, 3]
+    assert body["created"] == 2
+    with session_factory() as db:
+        assert db.query(Protocol).count() == 5
+
+
+def test_db_error_rolls_back_only_its_batch(client, seeded, session_factory, monkeypatch):
+    monkeypatch.setattr(protocols, "BULK_BATCH_SIZE", 2)
+    insert_rows = protocol_import._insert_rows
+    calls = []
+
+    def failing_second_batch(db, to_insert):
+        calls.append(len(to_insert))
+        if len(calls) == 2:
+            raise OperationalError("INSERT", {}, Exception("canceling statement due to statement timeout"))
+        insert_rows(db, to_insert)
+
+    monkeypatch.setattr(protocol_import, "_insert_rows", failing_second_batch)
+    rows = [protocol_row(f"ИМ-{n}") for n in range(5)]
+
+    response = post_ndjson(client, rows)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["status"] for r in body["results"]] == ["created", "created", "error", "error", "created"]
+    assert "statement timeout" in body["results"][2]["detail"]
+    assert body["created"] == 3
+    with session_factory() as db:
+        numbers = {n for (n,) in db.query(Protocol.number).filter(Protocol.number.like("ИМ-%"))}
+    assert numbers == {"ИМ-0", "ИМ-1", "ИМ-4"}
+
+
+def test_references_resolved_by_name(client, seeded, session_factory):
+    rows = [protocol_row("ИМ-1", 1), protocol_row("ИМ-2", 2)]
+
+    response = client.post("/protocols/bulk", params={"user": "importer"}, json=rows)
+
+    assert response.status_code == 200
+    assert response.json()["created"] == 2
+    with session_factory() as db:
+        protocol = db.query(Protocol).filter_by(number="ИМ-2").one()
+        assert db.get(Vehicle, protocol.vehicle_id).state_number == "А002ВС77"
+        assert db.get(Owner, protocol.owner_id).last_name == "Иванов2"
+        assert db.get(Inspector, protocol.inspector_id).last_name == "Кузнецов"
+        assert db.get(Violation, protocol.violation_id).name == "Превышение на 20-40 км/ч"
+
+
+def test_unknown_references_and_invalid_rows_rejected(client, seeded, session_factory):
+    unknown_vehicle = dict(protocol_row("ИМ-2"), vehicle="Х999ХХ99")
+    unknown_people = dict(protocol_row("ИМ-3"), owner="Петров Пётр", inspector="Сидоров Иван")
+    bad_name = dict(protocol_row("ИМ-4"), owner="Иванов0")
+    rows = [protocol_row("ИМ-1"), unknown_vehicle, unknown_people, bad_name, "не объект"]
+
+    response = client.post("/protocols/bulk", params={"user": "importer"}, json=rows)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 5
+    assert body["created"] == 1
+    statuses = [r["status"] for r in body["results"]]
+    assert statuses == ["created", "unresolved", "unresolved", "invalid", "invalid"]
+    assert body["results"][1]["detail"] == "Не найдены: vehicle"
+    assert body["results"][2]["detail"] == "Не найдены: owner, inspector"
+    with session_factory() as db:
+        assert db.query(Protocol).filter(Protocol.number.like("ИМ-%")).count() == 1
+
+
+def test_resolution_statements_do_not_grow_with_rows(client, seeded, sync_engine):
+    statements = StatementCounter(sync_engine)
+    # Роль пользователя кэшируется первым вызовом — он в замер не входит
+    client.post("/protocols/bulk", params={"user": "importer"}, json=[])
+
+    statements.reset()
+    client.post("/protocols/bulk", params={"user": "importer"}, json=[protocol_row("ИМ-0")])
+    used_one = statements.count
+
+    statements.reset()
+    rows = [protocol_row(f"ИМ-{n}", n % 3) for n in range(1, 30)]
+    response = client.post("/protocols/bulk", params={"user": "importer"}, json=rows)
+
+    assert response.json()["created"] == 29
+    assert statements.count == used_one
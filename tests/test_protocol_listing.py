@@ -0,0 +1,57 @@
+# tests/test_protocol_listing.py
+# Список протоколов строится одним запросом независимо от числа строк
+import pytest
+
+from tests.conftest import StatementCounter, seed_protocols
+
+
+@pytest.fixture
+def statements(sync_engine, async_engine):
+    # Список идёт через async-движок, карточка — через sync: считаются оба
+    return StatementCounter(sync_engine, async_engine.sync_engine)
+
+
+def _list_statements(client, statements, limit):
+    statements.reset()
+    response = client.get("/protocols", params={"limit": limit})
+    assert response.status_code == 200
+    return statements.count, response.json()
+
+
+@pytest.mark.parametrize("count", [1, 25])
+def test_protocol_listing_is_single_statement(client, session_factory, statements, count):
+    with session_factory() as db:
+        seed_protocols(db, count)
+
+    used, rows = _list_statements(client, statements, limit=100)
+
+    assert len(rows) == count
+    assert used == 1
+    assert rows[0]["vehicle"] == "А000ВС77"
+    assert rows[0]["owner"] == "Иванов0 Пётр"
+    assert rows[0]["inspector"] == "Кузнецов Илья"
+
+
+def test_protocol_listing_statements_do_not_grow_with_rows(client, session_factory, statements):
+    with session_factory() as db:
+        seed_protocols(db, 1)
+    used_one, _ = _list_statements(client, statements, limit=100)
+
+    with session_factory() as db:
+        seed_protocols(db, 40, start=1)
+    used_many, rows = _list_statements(client, statements, limit=100)
+
+    assert len(rows) == 41
+    assert used_many == used_one
+
+
+def test_protocol_detail_is_single_statement(client, session_factory, statements):
+    with session_factory() as db:
+        seed_protocols(db, 3)
+
+    statements.reset()
+    response = client.get("/protocols/2")
+
+    assert response.status_code == 200
+    assert response.json()["number"] == "ПР-00001"
+    assert statements.count == 1
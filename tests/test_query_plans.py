@@ -0,0 +1,332 @@
+# tests/test_query_plans.py
+# Планы горячих запросов на PostgreSQL: схема — alembic upgrade head,
+# данные — генератор backend/generate_data.py. Без TEST_PG_URL тесты
+# пропускаются. База по TEST_PG_URL пересоздаётся с нуля — только отдельная!
+import json
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, select, text
+
+from backend.generate_data import generate
+from backend.models import Inspector, Owner, Protocol, Vehicle
+from backend.pagination import encode_cursor, page_query, sort_keys
+from backend.routers.inspectors import INSPECTOR_SORTS
+from backend.routers.owners import OWNER_SORTS
+from backend.routers.protocols import PROTOCOL_SORTS, protocol_rows_select
+from backend.routers.search import SEARCH_SOURCES, _best_matches
+from backend.routers.vehicles import VEHICLE_SORTS, vehicle_rows_select
+
+PG_URL = os.getenv("TEST_PG_URL")
+pytestmark = pytest.mark.skipif(not PG_URL, reason="TEST_PG_URL не задан")
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGE = 100
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+@pytest.fixture(scope="module")
+def pg_engine():
+    engine = create_engine(PG_URL)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "backend" / "migrations"))
+    config.set_main_option("sqlalchemy.url", PG_URL.replace("%", "%%"))
+    command.upgrade(config, "head")
+
+    # Объём, при котором Seq Scan по большим таблицам заметно дороже индекса
+    generate(owners=20_000, vehicles=24_000, inspectors=2_000, protocols=100_000,
+             seed=1, bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def plan_scans(plan):
+    """(тип узла, таблица, индекс) для каждого узла плана"""
+    found = [(plan["Node Type"], plan.get("Relation Name"), plan.get("Index Name"))]
+    for child in plan.get("Plans", []):
+        found += plan_scans(child)
+    return found
+
+
+def explain(conn, statement, small=False):
+    compiled = statement.compile(dialect=conn.dialect)
+    if small:
+        # Справочник из нескольких строк Postgres законно читает целиком;
+        # проверяется, что индекс подходит под запрос
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+    raw = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    conn.rollback()
+    return (raw if isinstance(raw, list) else json.loads(raw))[0]["Plan"]
+
+
+def assert_index_scan(plan, table, indexes):
+    scans = plan_scans(plan)
+    assert ("Seq Scan", table, None) not in scans, f"Seq Scan по {table}: {scans}"
+    used = {index for node, _, index in scans if node in INDEX_SCANS}
+    assert used & set(indexes), f"по {table} ожидался один из {indexes}, план: {scans}"
+
+
+def sample(conn, sql):
+    row = conn.execute(text(sql)).mappings().first()
+    assert row is not None, f"нет данных: {sql}"
+    return dict(row)
+
+
+def page_after(query, sort, options, row):
+    """Вторая и далее страницы: keyset-условие по курсору строки row"""
+    keys, descending = sort_keys(sort, options)
+    cursor = encode_cursor(keys, SimpleNamespace(**row))
+    return page_query(query, keys, PAGE, cursor, descending)
+
+
+# Поиски при записи и импорте: (название, таблица, индексы, справочник,
+# запрос значений-образцов, запрос с :параметрами из образца)
+LOOKUPS = [
+    (
+        "Owner по ФИО",
+        "owner",
+        ["ix_owner_full_name", "ix_owner_last_name_id"],
+        False,
+        "SELECT last_name, first_name FROM owner LIMIT 1",
+        "SELECT id FROM owner WHERE last_name = :last_name AND first_name = :first_name",
+    ),
+    (
+        "Inspector по ФИО",
+        "inspector",
+        ["ix_inspector_full_name", "ix_inspector_last_name_id"],
+        False,
+        "SELECT last_name, first_name FROM inspector LIMIT 1",
+        "SELECT id FROM inspector WHERE last_name = :last_name AND first_name = :first_name",
+    ),
+    (
+        "Violation по имени",
+        "violation",
+        ["ix_violation_name", "ix_violation_name_trgm"],
+        True,
+        "SELECT name FROM violation LIMIT 1",
+        "SELECT id FROM violation WHERE name = :name",
+    ),
+    (
+        "Article по номеру",
+        "article",
+        ["ix_article_number"],
+        True,
+        "SELECT number FROM article LIMIT 1",
+        "SELECT id FROM article WHERE number = :number",
+    ),
+    (
+        "Model по имени и бренду",
+        "model",
+        ["ix_model_name_brand_id"],
+        True,
+        "SELECT m.name AS model_name, b.name AS brand_name "
+        "FROM model m JOIN brand b ON b.id = m.brand_id LIMIT 1",
+        "SELECT m.id FROM model m JOIN brand b ON b.id = m.brand_id "
+        "WHERE m.name = :model_name AND b.name = :brand_name",
+    ),
+    (
+        "Протоколы ТС",
+        "protocol",
+        ["ix_protocol_vehicle_id"],
+        False,
+        "SELECT vehicle_id FROM protocol LIMIT 1",
+        "SELECT count(*) FROM protocol WHERE vehicle_id = :vehicle_id",
+    ),
+    (
+        "Протоколы владельца",
+        "protocol",
+        ["ix_protocol_owner_id"],
+        False,
+        "SELECT owner_id FROM protocol LIMIT 1",
+        "SELECT count(*) FROM protocol WHERE owner_id = :owner_id",
+    ),
+    (
+        "ТС владельца",
+        "vehicle",
+        ["ix_vehicle_owner_id"],
+        False,
+        "SELECT owner_id FROM vehicle LIMIT 1",
+        "SELECT id FROM vehicle WHERE owner_id = :owner_id",
+    ),
+]
+
+
+@pytest.mark.parametrize("name,table,indexes,small,sample_sql,sql", LOOKUPS, ids=[c[0] for c in LOOKUPS])
+def test_lookup_uses_index(pg_engine, name, table, indexes, small, sample_sql, sql):
+    with pg_engine.connect() as conn:
+        statement = text(sql).bindparams(**sample(conn, sample_sql))
+        assert_index_scan(explain(conn, statement, small), table, indexes)
+
+
+# Списки GET /<коллекция> так, как их строят роутеры: (название, таблица,
+# индексы, запрос образца, построение запроса по образцу)
+LISTINGS = [
+    (
+        "Протоколы: страница по дате",
+        "protocol",
+        ["ix_protocol_issue_date_id"],
+        "SELECT issue_date, id FROM protocol ORDER BY issue_date, id OFFSET 1000 LIMIT 1",
+        lambda row: page_after(protocol_rows_select(), "issue_date", PROTOCOL_SORTS, row),
+    ),
+    (
+        "Протоколы: страница по дате, по убыванию",
+        "protocol",
+        ["ix_protocol_issue_date_id"],
+        "SELECT issue_date, id FROM protocol ORDER BY issue_date DESC, id DESC OFFSET 1000 LIMIT 1",
+        lambda row: page_after(protocol_rows_select(), "-issue_date", PROTOCOL_SORTS, row),
+    ),
+    (
+        "Протоколы: сортировка по номеру",
+        "protocol",
+        ["protocol_number_key"],
+        "SELECT number FROM protocol ORDER BY number OFFSET 1000 LIMIT 1",
+        lambda row: page_after(protocol_rows_select(), "number", PROTOCOL_SORTS, row),
+    ),
+    (
+        "Протоколы инспектора за период",
+        "protocol",
+        ["ix_protocol_inspector_id_issue_date_id"],
+        "SELECT inspector_id, issue_date FROM protocol LIMIT 1",
+        lambda row: page_query(
+            protocol_rows_select().where(
+                Protocol.inspector_id == row["inspector_id"],
+                Protocol.issue_date >= row["issue_date"],
+            ),
+            PROTOCOL_SORTS["issue_date"],
+            PAGE,
+            None,
+        ),
+    ),
+    (
+        "Протоколы ТС",
+        "protocol",
+        ["ix_protocol_vehicle_id"],
+        "SELECT vehicle_id FROM protocol LIMIT 1",
+        lambda row: page_query(
+            protocol_rows_select().where(Protocol.vehicle_id == row["vehicle_id"]),
+            PROTOCOL_SORTS["issue_date"],
+            PAGE,
+            None,
+        ),
+    ),
+    (
+        "Протоколы владельца",
+        "protocol",
+        ["ix_protocol_owner_id"],
+        "SELECT owner_id FROM protocol LIMIT 1",
+        lambda row: page_query(
+            protocol_rows_select().where(Protocol.owner_id == row["owner_id"]),
+            PROTOCOL_SORTS["issue_date"],
+            PAGE,
+            None,
+        ),
+    ),
+    (
+        "Владельцы: страница по фамилии",
+        "owner",
+        ["ix_owner_last_name_id"],
+        "SELECT last_name, id FROM owner ORDER BY last_name, id OFFSET 1000 LIMIT 1",
+        lambda row: page_after(select(Owner), "last_name", OWNER_SORTS, row),
+    ),
+    (
+        "Владельцы по фамилии и имени",
+        "owner",
+        ["ix_owner_full_name", "ix_owner_last_name_id"],
+        "SELECT last_name, first_name FROM owner LIMIT 1",
+        lambda row: page_query(
+            select(Owner).where(
+                Owner.last_name == row["last_name"], Owner.first_name == row["first_name"]
+            ),
+            OWNER_SORTS["last_name"],
+            PAGE,
+            None,
+        ),
+    ),
+    (
+        "Инспекторы отдела",
+        "inspector",
+        # В отделе пятая часть инспекторов: первые 100 по id дешевле найти,
+        # идя по первичному ключу, — оба плана ограничены LIMIT
+        ["ix_inspector_department_id", "inspector_pkey"],
+        "SELECT department FROM inspector LIMIT 1",
+        lambda row: page_query(
+            select(Inspector).where(Inspector.department == row["department"]),
+            INSPECTOR_SORTS["id"],
+            PAGE,
+            None,
+        ),
+    ),
+    (
+        "Инспекторы: страница по отделу",
+        "inspector",
+        ["ix_inspector_department_id"],
+        "SELECT department, id FROM inspector ORDER BY department, id OFFSET 500 LIMIT 1",
+        lambda row: page_after(select(Inspector), "department", INSPECTOR_SORTS, row),
+    ),
+    (
+        "ТС владельца",
+        "vehicle",
+        ["ix_vehicle_owner_id"],
+        "SELECT owner_id FROM vehicle LIMIT 1",
+        lambda row: page_query(
+            vehicle_rows_select().where(Vehicle.owner_id == row["owner_id"]),
+            VEHICLE_SORTS["id"],
+            PAGE,
+            None,
+        ),
+    ),
+    (
+        "ТС: сортировка по номеру",
+        "vehicle",
+        ["vehicle_state_number_key"],
+        "SELECT state_number FROM vehicle ORDER BY state_number OFFSET 1000 LIMIT 1",
+        lambda row: page_after(vehicle_rows_select(), "state_number", VEHICLE_SORTS, row),
+    ),
+]
+
+
+@pytest.mark.parametrize("name,table,indexes,sample_sql,build", LISTINGS, ids=[c[0] for c in LISTINGS])
+def test_listing_uses_index(pg_engine, name, table, indexes, sample_sql, build):
+    with pg_engine.connect() as conn:
+        statement = build(sample(conn, sample_sql))
+        assert_index_scan(explain(conn, statement), table, indexes)
+
+
+# GET /search: каждое поле из SEARCH_SOURCES — своим GiST-индексом pg_trgm.
+# (вид, поле, таблица, индекс, справочник, запрос образца строки поиска)
+SEARCHES = [
+    ("owner", "name", "owner", "ix_owner_full_name_trgm", False,
+     "SELECT left(last_name, 5) AS q FROM owner LIMIT 1"),
+    ("owner", "address", "owner", "ix_owner_address_trgm", False,
+     "SELECT split_part(address, ',', 1) AS q FROM owner LIMIT 1"),
+    ("vehicle", "state_number", "vehicle", "ix_vehicle_state_number_trgm", False,
+     "SELECT substr(state_number, 2, 3) AS q FROM vehicle LIMIT 1"),
+    ("protocol", "number", "protocol", "ix_protocol_number_trgm", False,
+     "SELECT right(number, 6) AS q FROM protocol LIMIT 1"),
+    ("violation", "name", "violation", "ix_violation_name_trgm", True,
+     "SELECT left(name, 6) AS q FROM violation LIMIT 1"),
+]
+
+
+def test_every_search_field_is_covered():
+    covered = {(kind, field) for kind, field, *_ in SEARCHES}
+    assert covered == {(kind, source[0]) for kind, sources in SEARCH_SOURCES.items() for source in sources}
+
+
+@pytest.mark.parametrize(
+    "kind,field,table,index,small,sample_sql", SEARCHES, ids=[f"{c[0]}.{c[1]}" for c in SEARCHES]
+)
+def test_search_uses_trigram_index(pg_engine, kind, field, table, index, small, sample_sql):
+    source = next(source for source in SEARCH_SOURCES[kind] if source[0] == field)
+    with pg_engine.connect() as conn:
+        query = sample(conn, sample_sql)["q"]
+        statement = select(_best_matches(kind, *source, query, 21))
+        assert_index_scan(explain(conn, statement, small), table, [index])
@@ -0,0 +1,43 @@
+# tests/test_query_stats.py
+# Число SQL-запросов и время в БД: заголовки ответа и учёт операторов с ошибкой
+import pytest
+from sqlalchemy import exc, text
+
+from backend.query_stats import (
+    QUERY_COUNT_HEADER,
+    RequestQueryStats,
+    _current,
+    install_query_hooks,
+)
+from tests.conftest import seed_protocols
+
+
+def test_list_response_has_query_headers(client, session_factory, sync_engine, async_engine):
+    # Хуки стоят на движках приложения — фикстурные подключаем явно
+    install_query_hooks(sync_engine)
+    install_query_hooks(async_engine.sync_engine)
+    db = session_factory()
+    seed_protocols(db, 3)
+    db.close()
+
+    response = client.get("/owners")
+
+    assert response.status_code == 200
+    assert int(response.headers[QUERY_COUNT_HEADER]) >= 1
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert "app;dur=" in response.headers["Server-Timing"]
+
+
+def test_failed_statement_is_counted(sync_engine):
+    install_query_hooks(sync_engine)
+    stats = RequestQueryStats()
+    token = _current.set(stats)
+    try:
+        with sync_engine.connect() as conn:
+            with pytest.raises(exc.OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+    finally:
+        _current.reset(token)
+
+    assert stats.count == 2
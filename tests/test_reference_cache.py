@@ -0,0 +1,28 @@
+# tests/test_reference_cache.py
+# Кэш справочников: снимок, загрузка которого пересеклась с invalidate(),
+# не сохраняется
+from backend.models import Color
+from backend.reference_cache import ReferenceCache
+
+
+def test_snapshot_loaded_before_invalidate_is_not_kept(session_factory):
+    db = session_factory()
+    db.add(Color(name="Синий"))
+    db.commit()
+
+    cache = ReferenceCache(ttl=300)
+    load = cache._load
+
+    def load_then_commit(session):
+        snapshot = load(session)
+        cache.invalidate()  # коммит переименования пришёлся на загрузку
+        return snapshot
+
+    cache._load = load_then_commit
+    assert cache.color_id(db, "Синий") is not None
+    assert cache.stats()["loaded"] is False
+
+    cache._load = load
+    cache.color_id(db, "Синий")
+    assert cache.stats()["loaded"] is True
+    db.close()
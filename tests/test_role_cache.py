@@ -0,0 +1,35 @@
+# tests/test_role_cache.py
+# Кэш ролей: изменение учётной записи сбрасывает роль и после коммита,
+# переименование — и под старым именем
+from backend.models import UserAccount
+from backend.security import role_cache
+
+
+def test_role_change_invalidated_after_commit(session_factory):
+    db = session_factory()
+    user = UserAccount(username="petrov", role="admin")
+    db.add(user)
+    db.commit()
+
+    user.role = "inspector"
+    db.flush()
+    # Параллельный check_role между flush и коммитом видит прежнюю роль
+    role_cache.put("petrov", "admin")
+    db.commit()
+    db.close()
+
+    assert role_cache.get("petrov") is None
+
+
+def test_rename_invalidates_old_username(session_factory):
+    db = session_factory()
+    user = UserAccount(username="sidorov", role="admin")
+    db.add(user)
+    db.commit()
+    role_cache.put("sidorov", "admin")
+
+    user.username = "sidorov2"
+    db.commit()
+    db.close()
+
+    assert role_cache.get("sidorov") is None
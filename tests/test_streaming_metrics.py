@@ -0,0 +1,34 @@
+# tests/test_streaming_metrics.py
+# Потоковые маршруты: в гистограмму и агрегаты идёт время до начала ответа,
+# а не время жизни соединения
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.prometheus import PrometheusMiddleware, metrics
+from backend.query_stats import QueryStatsMiddleware, route_query_stats
+
+
+def test_streaming_route_measured_to_response_start():
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+    app.add_middleware(PrometheusMiddleware)
+
+    @app.get("/events")
+    async def events():
+        async def body():
+            yield "data: 1\n\n"
+            await asyncio.sleep(0.3)
+            yield "data: 2\n\n"
+
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    route_query_stats.clear()
+    assert TestClient(app).get("/events").status_code == 200
+
+    route = next(r for r in route_query_stats.snapshot() if r["route"] == "GET /events")
+    assert route["avg_total_ms"] < 300
+    rendered = metrics.render()
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/events",le="0.25"} 1' in rendered
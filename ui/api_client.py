@@ -0,0 +1,196 @@
+import json
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = "http://localhost:8000"
+DEFAULT_TIMEOUT = 3
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+FETCH_ALL_PAGE_SIZE = 1000
+POOL_SIZE = 10  # соединений keep-alive к серверу
+SLOW_CALL_SECONDS = 1.0  # медленные вызовы печатаются в консоль
+
+
+class ApiClient:
+    """
+    Единый HTTP-клиент GUI: одна requests.Session с пулом keep-alive соединений,
+    повторы с нарастающей паузой и замер задержки каждого вызова.
+    """
+
+    def __init__(self, base_url=API_URL, timeout=DEFAULT_TIMEOUT):
+        self.base_url = base_url
+        self.timeout = timeout
+        # Ошибка подключения (запрос не ушёл на сервер) повторяется для всех методов;
+        # обрыв при чтении ответа и 502/503/504 — только для GET/HEAD: PUT мог
+        # закоммититься, и повтор получил бы 409 на собственное сохранение
+        retry = Retry(
+            total=3,
+            connect=3,
+            read=2,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._reference_cache = {}  # path -> (ETag, данные)
+        self._stats = {}  # имя вызова -> [число, сумма секунд, максимум]
+        self._stats_lock = threading.Lock()
+
+    def request(self, method, path, name=None, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        name = name or f"{method} {path}"
+        started = time.perf_counter()
+        try:
+            return self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        finally:
+            self._record(name, time.perf_counter() - started)
+
+    def _record(self, name, seconds):
+        with self._stats_lock:
+            entry = self._stats.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+        if seconds >= SLOW_CALL_SECONDS:
+            print(f"[SLOW API] {name}: {seconds:.2f} с")
+
+    def stats(self):
+        """Задержки по вызовам: число, средняя и максимальная, мс"""
+        with self._stats_lock:
+            return {
+                name: {
+                    "count": count,
+                    "avg_ms": round(total / count * 1000, 1),
+                    "max_ms": round(longest * 1000, 1),
+                }
+                for name, (count, total, longest) in self._stats.items()
+            }
+
+    # Авторизация
+    def login(self, username):
+        return self.request("POST", "/auth/login", json={"username": username})
+
+    # Списки
+    def fetch_page(self, path, after=None, params=None, limit=100, timeout=None):
+        """Одна страница списка: (строки, курсор следующей страницы или None)"""
+        query = dict(params or {}, limit=limit)
+        if after:
+            query["after"] = after
+        response = self.request(
+            "GET", path, name=f"GET {path}", params=query, timeout=timeout or self.timeout
+        )
+        response.raise_for_status()
+        return response.json(), response.headers.get(NEXT_CURSOR_HEADER)
+
+    def fetch_changes(self, path, since=None):
+        """
+        Журнал изменений списка после since (watermark прошлого ответа).
+        Без since сервер отдаёт только watermark — отметку для начала.
+        """
+        response = self.request(
+            "GET", f"{path}/changes", params={"since": since} if since else {}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def fetch_all(self, path, params=None, timeout=None):
+        """Все страницы подряд — для небольших справочников и экспорта отчётов"""
+        rows, cursor = self.fetch_page(path, params=params, limit=FETCH_ALL_PAGE_SIZE, timeout=timeout)
+        while cursor:
+            page, cursor = self.fetch_page(path, cursor, params, FETCH_ALL_PAGE_SIZE, timeout)
+            rows.extend(page)
+        return rows
+
+    def fetch_reference(self, path, timeout=None):
+        """
+        Справочник с кэшем: сервер переспрашивается с If-None-Match
+        и при 304 данные берутся из кэша без повторной загрузки.
+        """
+        cached = self._reference_cache.get(path)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = self.request("GET", path, headers=headers, timeout=timeout or self.timeout)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        response.raise_for_status()
+        data = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            self._reference_cache[path] = (etag, data)
+        return data
+
+    def search(self, q, limit=20, kinds=None):
+        """Быстрый поиск по владельцам, ТС, протоколам и нарушениям; kinds — только эти виды"""
+        params = {"q": q, "limit": limit}
+        if kinds:
+            params["kinds"] = ",".join(kinds)
+        response = self.request("GET", "/search", params=params)
+        response.raise_for_status()
+        return response.json()["hits"]
+
+    def stream_lines(self, path, timeout=5):
+        """Строки потокового ответа (NDJSON), без пустых"""
+        with self.session.get(f"{self.base_url}{path}", stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield line
+
+    def stream_events(self, timeout):
+        """
+        События сервера (GET /events, Server-Sent Events) по мере прихода.
+        timeout — сколько ждать очередной строки: сервер шлёт keepalive,
+        так что тишина дольше означает оборванное соединение.
+        """
+        with self.session.get(f"{self.base_url}/events", stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            data = []
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("data:"):
+                    data.append(line[5:].lstrip())
+                elif not line and data:  # пустая строка завершает событие
+                    yield json.loads("\n".join(data))
+                    data = []
+
+    # Записи: resource — owners, inspectors, vehicles, violations, protocols
+    def get_one(self, resource, entity_id):
+        return self.request("GET", f"/{resource}/{entity_id}", name=f"GET /{resource}/{{id}}")
+
+    def create(self, resource, data, timeout=None):
+        return self.request(
+            "POST", f"/{resource}", json=data, timeout=timeout or self.timeout
+        )
+
+    def update(self, resource, entity_id, data):
+        return self.request(
+            "PUT", f"/{resource}/{entity_id}", name=f"PUT /{resource}/{{id}}", json=data
+        )
+
+    def delete(self, resource, entity_id, user):
+        return self.request(
+            "DELETE", f"/{resource}/{entity_id}", name=f"DELETE /{resource}/{{id}}",
+            params={"user": user},
+        )
+
+    # Блокировки
+    def lock_batch(self, user, entity, lock_ids=(), unlock_ids=()):
+        """Один запрос /locks/batch: снять unlock_ids и захватить lock_ids"""
+        response = self.request(
+            "POST",
+            "/locks/batch",
+            json={
+                "user": user,
+                "lock": [{"entity": entity, "id": i} for i in lock_ids],
+                "unlock": [{"entity": entity, "id": i} for i in unlock_ids],
+            },
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+api = ApiClient()
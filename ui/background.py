@@ -0,0 +1,107 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_INTERVAL_MS = 30
+MAX_WORKERS = 4
+
+
+class BackgroundTasks:
+    """
+    Сетевые вызовы вне главного потока Tk. Функция выполняется в пуле потоков,
+    а её результат передаётся в колбэк уже в главном потоке — через очередь,
+    которую опрашивает root.after.
+
+    key — «слот» задачи: новая задача с тем же ключом отменяет предыдущую
+    (не начатая не выполнится, у начатой результат будет отброшен).
+    serial=True — отдельный поток, где задачи выполняются строго по порядку
+    (блокировки: захват и снятие не должны обгонять друг друга).
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.root = None
+        self.on_busy_changed = None  # колбэк(число выполняющихся задач)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api")
+        self._serial = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-serial")
+        self._results = queue.Queue()
+        self._latest = {}  # key -> номер последней задачи
+        self._pending = {}  # номер задачи -> Future
+        self._counter = 0
+        self._busy = 0
+
+    def attach(self, root, on_busy_changed=None):
+        self.root = root
+        self.on_busy_changed = on_busy_changed
+        self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def submit(self, func, *args, on_done=None, on_error=None, key=None, serial=False):
+        self._counter += 1
+        task_id = self._counter
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous in self._pending:
+                self._pending[previous].cancel()
+            self._latest[key] = task_id
+
+        def run():
+            try:
+                self._results.put((task_id, key, True, func(*args), on_done, on_error))
+            except Exception as e:
+                self._results.put((task_id, key, False, e, on_done, on_error))
+
+        executor = self._serial if serial else self._pool
+        future = executor.submit(run)
+        self._pending[task_id] = future
+
+        def forget_cancelled(f):
+            if f.cancelled():
+                self._results.put((task_id, key, None, None, None, None))
+
+        future.add_done_callback(forget_cancelled)
+        self._notify_busy()
+        return task_id
+
+    def dispatch(self, callback, value):
+        """Вызвать callback(value) в потоке Tk — для событий из других потоков"""
+        self._results.put((0, None, True, value, callback, None))
+
+    def run_now(self, func, *args, timeout=5):
+        """Выполнить в последовательном потоке и дождаться — для закрытия окна"""
+        return self._serial.submit(func, *args).result(timeout=timeout)
+
+    def _poll(self):
+        try:
+            while True:
+                task_id, key, ok, value, on_done, on_error = self._results.get_nowait()
+                self._pending.pop(task_id, None)
+                if ok is None:
+                    continue  # отменена до начала
+                # Устаревший результат: после этой задачи пришла новая с тем же ключом
+                if key is not None and self._latest.get(key) != task_id:
+                    continue
+                if key is not None:
+                    self._latest.pop(key, None)
+                callback = on_done if ok else on_error
+                if callback:
+                    try:
+                        callback(value)
+                    except Exception as e:
+                        print(f"[BACKGROUND CALLBACK ERROR] {e}")
+                elif not ok:
+                    print(f"[BACKGROUND ERROR] {value}")
+        except queue.Empty:
+            pass
+        self._notify_busy()
+        self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _notify_busy(self):
+        busy = len(self._pending)
+        if busy != self._busy and self.on_busy_changed:
+            self.on_busy_changed(busy)
+        self._busy = busy
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._serial.shutdown(wait=False, cancel_futures=True)
+
+
+background = BackgroundTasks()
@@ -0,0 +1,48 @@
+import threading
+from .api_client import api
+from .background import background
+
+READ_TIMEOUT = 45  # втрое больше интервала keepalive сервера
+RECONNECT_MIN_SECONDS = 1
+RECONNECT_MAX_SECONDS = 30
+
+
+class EventStream:
+    """
+    Подписка на события сервера (GET /events) в отдельном потоке. Каждое
+    событие передаётся в on_event уже в потоке Tk. После переподключения
+    приходит событие reconnected: пока связи не было, изменения могли
+    пройти мимо, и вкладки сверяются с журналом изменений.
+    """
+
+    def __init__(self, on_event):
+        self.on_event = on_event
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="events", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        delay = RECONNECT_MIN_SECONDS
+        connected_before = False
+        while not self._stopped.is_set():
+            try:
+                for data in api.stream_events(timeout=READ_TIMEOUT):
+                    if self._stopped.is_set():
+                        return
+                    if data["event"] == "ready":
+                        delay = RECONNECT_MIN_SECONDS
+                        if connected_before:
+                            background.dispatch(self.on_event, {"event": "reconnected"})
+                        connected_before = True
+                        continue
+                    background.dispatch(self.on_event, data)
+            except Exception as e:
+                print(f"[EVENTS ERROR] {e}")
+            # Сервер закрыл поток (перезапуск, переполнение) или связь оборвалась
+            self._stopped.wait(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
@@ -5,12 +5,9 @@ from openpyxl import Workbook
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
-from requests.exceptions import Timeout, ConnectionError
+from .api_client import api
 from .lockable_tab import LockableTab
-
-
-API_URL = "http://localhost:8000"
+from .virtual_tree import PagedSource, VirtualTreeview
 
 
 class InspectorTab(LockableTab):
@@ -24,29 +21,27 @@ class InspectorTab(LockableTab):
 
     def load_selected_inspector_data(self):
         """Загружает актуальные данные выбранного инспектора"""
-        try:
-            response = requests.get(f"{API_URL}/inspectors/{self.selected_id}", timeout=3)
-            if response.status_code == 200:
-                inspector_data = response.json()
-                self.selected_version = inspector_data["version"]
-
-                # Заполняем поля актуальными данными
-                self.entries["Фамилия"].delete(0, tk.END)
-                self.entries["Фамилия"].insert(0, inspector_data["last_name"])
-                self.entries["Имя"].delete(0, tk.END)
-                self.entries["Имя"].insert(0, inspector_data["first_name"])
-                self.entries["Отчество"].delete(0, tk.END)
-                self.entries["Отчество"].insert(0, inspector_data["middle_name"])
-                self.department_cb.set(inspector_data["department"])
-                self.rank_cb.set(inspector_data["rank"])
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при загрузке данных инспектора)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить данные: {e}")
-            self.unlock_entity()
-            self.selected_id = None
+
+        def done(response):
+            if response.status_code != 200:
+                return
+            inspector_data = response.json()
+            self.selected_version = inspector_data["version"]
+
+            # Заполняем поля актуальными данными
+            self.entries["Фамилия"].delete(0, tk.END)
+            self.entries["Фамилия"].insert(0, inspector_data["last_name"])
+            self.entries["Имя"].delete(0, tk.END)
+            self.entries["Имя"].insert(0, inspector_data["first_name"])
+            self.entries["Отчество"].delete(0, tk.END)
+            self.entries["Отчество"].insert(0, inspector_data["middle_name"])
+            self.department_cb.set(inspector_data["department"])
+            self.rank_cb.set(inspector_data["rank"])
+
+        self.run_async(
+            api.get_one, "inspectors", self.selected_id,
+            on_done=done, action="загрузке данных инспектора", key="detail",
+        )
 
     def build_ui(self):
         title = ttk.Label(
@@ -54,16 +49,21 @@ class InspectorTab(LockableTab):
         )
         title.pack(anchor="w", pady=(0, 10))
 
-        self.tree = ttk.Treeview(
+        self.table = VirtualTreeview(
             self.frame,
             columns=("ID", "Фамилия", "Имя", "Отчество", "Отдел", "Звание", "Версия"),
-            show="headings",
+            source=PagedSource("/inspectors", self.row_values),
         )
+        self.tree = self.table.tree
         for col in self.tree["columns"]:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=150, anchor="center")
-        self.tree.pack(fill="both", expand=True, pady=(0, 10))
-        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.table.bind_sort(
+            {"ID": "id", "Фамилия": "last_name", "Отдел": "department"}, "last_name"
+        )
+        self.table.pack(fill="both", expand=True, pady=(0, 10))
+        self.table.bind_select(self.on_select)
+        self.bind_paging(self.table)
 
         if self.role == "admin":
             self.build_admin_form()
@@ -122,66 +122,37 @@ class InspectorTab(LockableTab):
         btn_frame, text="📊 Экспорт в Excel", command=self.export_inspectors_excel
         ).pack(side="left", padx=5)
 
-    def load_data(self):
-        self.tree.delete(*self.tree.get_children())
-        try:
-            response = requests.get(f"{API_URL}/inspectors", timeout=3)
-            if response.status_code == 200:
-                for row in response.json():
-                    self.tree.insert(
-                        "",
-                        "end",
-                        values=(
-                            row["id"],
-                            row["last_name"],
-                            row["first_name"],
-                            row["middle_name"],
-                            row["department"],
-                            row["rank"],
-                            row["version"],
-                        ),
-                    )
+    @staticmethod
+    def row_values(row):
+        return (
+            row["id"],
+            row["last_name"],
+            row["first_name"],
+            row["middle_name"],
+            row["department"],
+            row["rank"],
+            row["version"],
+        )
 
-            else:
-                messagebox.showerror(
-                    "Ошибка",
-                    f"Не удалось загрузить инспекторов: {response.status_code}",
-                )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при загрузке списка инспекторов)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+    def load_data(self):
+        self.load_first_page("загрузке списка инспекторов")
 
     def on_select(self, event):
-        selected = self.tree.selection()
-        if not selected or self.role != "admin":
+        values = self.table.selected_values()
+        if not values or self.role != "admin":
             return
 
-        # Сначала разблокируем предыдущую запись
-        if hasattr(self, "selected_id") and self.selected_id:
-            self.unlock_entity()
-
-        try:
-            values = self.tree.item(selected[0])["values"]
-            if len(values) < 7:
-                raise ValueError("Недостаточно данных в строке")
-
-            self.selected_id = values[0]
-
-            # Сначала блокируем, потом получаем актуальные данные
-            if not self.lock_entity():
-                self.selected_id = None
-                return
-
-            # Загружаем актуальные данные после блокировки
-            self.load_selected_inspector_data()
-
-        except Exception as e:
+        if len(values) < 7:
             messagebox.showerror(
-                "Ошибка", f"Не удалось обработать выбранную строку: {e}"
+                "Ошибка", "Не удалось обработать выбранную строку: Недостаточно данных в строке"
             )
+            return
+
+        self.selected_id = values[0]
+
+        # Сначала блокируем все выделенные строки (предыдущие снимаются
+        # тем же запросом), потом получаем актуальные данные
+        self.lock_entity(self.selected_row_ids(), on_locked=self.load_selected_inspector_data)
 
     def add_inspector(self):
         last = self.entries["Фамилия"].get().strip()
@@ -203,8 +174,7 @@ class InspectorTab(LockableTab):
             "user": self.username,
         }
 
-        try:
-            response = requests.post(f"{API_URL}/inspectors", json=data, timeout=3)
+        def done(response):
             if response.status_code == 201:
                 messagebox.showinfo("Успех", "Инспектор добавлен")
                 self.load_data()
@@ -220,12 +190,8 @@ class InspectorTab(LockableTab):
                 messagebox.showerror(
                     "Ошибка", f"Не удалось добавить инспектора: {response.status_code}"
                 )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при добавлении инспектора)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+
+        self.run_async(api.create, "inspectors", data, on_done=done, action="добавлении инспектора")
 
     def update_inspector(self):
         if not self.selected_id:
@@ -251,14 +217,10 @@ class InspectorTab(LockableTab):
             "version": self.selected_version,
         }
 
-        try:
-            response = requests.put(
-                f"{API_URL}/inspectors/{self.selected_id}", json=data, timeout=3
-            )
+        def done(response):
             if response.status_code == 200:
                 messagebox.showinfo("Успех", "Инспектор обновлён")
                 self.load_data()
-                self.unlock_entity()
                 self.clear_form()
             elif response.status_code == 404:
                 messagebox.showerror("Ошибка", "Инспектор не найден")
@@ -276,12 +238,11 @@ class InspectorTab(LockableTab):
                 messagebox.showerror(
                     "Ошибка", f"Не удалось обновить инспектора: {response.status_code}"
                 )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при обновлении инспектора)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+
+        self.run_async(
+            api.update, "inspectors", self.selected_id, data,
+            on_done=done, action="обновлении инспектора",
+        )
 
     def clear_form(self):
         self.unlock_entity()
@@ -293,29 +254,18 @@ class InspectorTab(LockableTab):
         self.rank_cb.set("лейтенант")
 
     def refresh_data(self):
-        self.load_data() 
+        self.sync_page()
         
         
     def export_inspectors_json(self):
-        try:
-            response = requests.get(f"{API_URL}/reports/inspectors", timeout=5)
-            if response.status_code == 200:
-                self.export_to_json(response.json(), "inspectors_report.json")
-            else:
-                messagebox.showerror("Ошибка", f"Не удалось получить данные: {response.status_code}")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Сервер недоступен: {e}")
+        self.fetch_report(
+            "/reports/inspectors",
+            lambda data: self.export_to_json(data, "inspectors_report.json"),
+        )
 
     def export_inspectors_excel(self):
-        try:
-            response = requests.get(f"{API_URL}/reports/inspectors", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                columns = ["id", "ФИО", "Отдел", "Звание", "Создано"]
-                self.export_to_excel(data, "inspectors_report.xlsx", columns)
-            else:
-                messagebox.showerror("Ошибка", f"Не удалось получить данные: {response.status_code}")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Сервер недоступен: {e}")
-            
-    
\ No newline at end of file
+        columns = ["id", "ФИО", "Отдел", "Звание", "Создано"]
+        self.fetch_report(
+            "/reports/inspectors",
+            lambda data: self.export_to_excel(data, "inspectors_report.xlsx", columns),
+        )
@@ -1,56 +1,213 @@
 import json
 from openpyxl import Workbook
-import requests
 from tkinter import filedialog, messagebox
+from requests.exceptions import Timeout, ConnectionError
+from .api_client import api
+from .background import background
 
-API_URL = "http://localhost:8000"
+LOCK_RENEW_INTERVAL_MS = 20_000  # с запасом меньше TTL блокировки на сервере
+EVENT_SYNC_DELAY_MS = 300  # серия событий сервера — одна сверка списка
 
 
 class LockableTab:
+    # Сущности, чьи поля показаны в списке вкладки (ФИО владельца у ТС и т.п.)
+    related_entities = ()
+
     def __init__(self, entity_type, username):
         self.entity_type = entity_type
         self.username = username
         self.selected_id = None
         self.locked = False
+        self.page_table = None
+        self.renew_job = None
+        self.locked_ids = set()
+        self.lock_request = 0
+        self.event_sync_job = None
+
+    def run_async(self, func, *args, on_done=None, action="запросе", key=None, serial=False):
+        """
+        Выполнить func(*args) в фоне, on_done(результат) — в потоке Tk.
+        key задаётся относительно вкладки: новый вызов отменяет прежний.
+        """
+        return background.submit(
+            func,
+            *args,
+            on_done=on_done,
+            on_error=lambda e: self.show_request_error(e, action),
+            key=f"{self.entity_type}:{key}" if key else None,
+            serial=serial,
+        )
 
+    @staticmethod
+    def show_request_error(error, action):
+        if isinstance(error, Timeout):
+            messagebox.showerror("Ошибка", f"Сервер не отвечает (таймаут при {action})")
+        elif isinstance(error, ConnectionError):
+            messagebox.showerror("Ошибка", "Нет подключения к серверу")
+        else:
+            messagebox.showerror("Ошибка", f"Ошибка при {action}: {error}")
 
-    def lock_entity(self):
-        if not self.selected_id:
-            return False
-        try:
-            url = f"{API_URL}/lock/{self.entity_type}/{self.selected_id}"
-            response = requests.post(url, params={"user": self.username})
+    def post_lock_batch(self, lock_ids=(), unlock_ids=()):
+        """Один запрос /locks/batch: снять unlock_ids и захватить lock_ids"""
+        return api.lock_batch(self.username, self.entity_type, lock_ids, unlock_ids)
+
+    def sync_locks(self, ids):
+        """
+        Выполняется в последовательном фоновом потоке: блокирует ids и снимает
+        прочие блокировки вкладки. locked_ids меняется только здесь, поэтому
+        быстрые переключения строк не оставляют «потерянных» блокировок.
+        """
+        result = self.post_lock_batch(ids, self.locked_ids - ids)
+        # Снятые блокировки больше не наши, даже если захват не удался
+        self.locked_ids &= ids
+        if result["ok"]:
+            self.locked_ids = set(ids)
+        return result
+
+    def selected_row_ids(self):
+        return sorted(self.page_table.selected_ids)
+
+    def lock_entity(self, ids=None, on_locked=None):
+        """
+        Блокирует записи ids (по умолчанию — selected_id) и в том же запросе
+        снимает блокировки с ранее выбранных записей. on_locked вызывается
+        после успешного захвата, если выбор за это время не сменился.
+        """
+        if ids is None:
+            ids = [self.selected_id] if self.selected_id else []
+        ids = set(ids)
+        if not ids:
+            return
+        self.lock_request += 1
+        request = self.lock_request
 
-            if response.status_code == 200:
-                return True
-            elif response.status_code == 409:
+        def done(result):
+            if request != self.lock_request:
+                return  # пока ждали ответа, выбрали другие строки
+            if result["ok"]:
+                self.schedule_lock_renewal()
+                if on_locked:
+                    on_locked()
+                return
+            self.selected_id = None
+            busy = [r["id"] for r in result["results"] if r["status"] == "conflict"]
+            if busy:
                 messagebox.showerror(
                     "Блокировка",
-                    f"{self.entity_type.upper()} редактируется другим пользователем",
+                    f"{self.entity_type.upper()} редактируется другим пользователем: "
+                    + ", ".join(map(str, busy)),
                 )
-                return False
             else:
-                messagebox.showerror(
-                    "Ошибка", f"Ошибка блокировки: {response.status_code}"
-                )
-                return False
-        except Exception as e:
-            messagebox.showerror(
-                "Ошибка", f"Не удалось захватить {self.entity_type}: {e}"
-            )
-            return False
+                messagebox.showerror("Ошибка", "Запись не найдена")
+
+        def failed(e):
+            if request == self.lock_request:
+                self.selected_id = None
+                messagebox.showerror("Ошибка", f"Не удалось захватить {self.entity_type}: {e}")
+
+        background.submit(self.sync_locks, ids, on_done=done, on_error=failed, serial=True)
+
+    def open_record(self, entity_id, on_locked):
+        """
+        Открыть запись, найденную поиском: выделить её в списке (если она
+        в загруженной части) и, как при выборе строки, заблокировать и
+        загрузить в форму.
+        """
+        self.page_table.select_ids([entity_id])
+        self.selected_id = entity_id
+        if self.role in ["admin", "inspector"]:
+            self.lock_entity([entity_id], on_locked=on_locked)
+
+    def schedule_lock_renewal(self):
+        self.cancel_lock_renewal()
+        self.renew_job = self.frame.after(LOCK_RENEW_INTERVAL_MS, self.renew_lock)
+
+    def cancel_lock_renewal(self):
+        if self.renew_job:
+            self.frame.after_cancel(self.renew_job)
+            self.renew_job = None
 
-    def unlock_entity(self):
-        if not self.selected_id:
+    def renew_lock(self):
+        """Продлевает аренду блокировок, пока записи открыты на редактирование"""
+        self.renew_job = None
+        if not self.locked_ids:
             return
-        try:
-            url = f"{API_URL}/unlock/{self.entity_type}/{self.selected_id}"
-            response = requests.post(url, params={"user": self.username})
 
-            if response.status_code != 200:
-                print(f"[UNLOCK WARNING] {response.status_code}")
+        def renew():
+            # Повторный захват своих блокировок продлевает их
+            return self.post_lock_batch(self.locked_ids)["ok"] if self.locked_ids else False
+
+        def done(ok):
+            if ok:
+                self.schedule_lock_renewal()
+            elif self.locked_ids:
+                print("[RENEW WARNING] блокировка потеряна")
+
+        def failed(e):
+            print(f"[RENEW ERROR] {e}")
+            self.schedule_lock_renewal()
+
+        background.submit(renew, on_done=done, on_error=failed, serial=True)
+
+    def release_locks(self):
+        """Выполняется в последовательном фоновом потоке"""
+        if not self.locked_ids:
+            return
+        try:
+            self.post_lock_batch(unlock_ids=self.locked_ids)
         except Exception as e:
             print(f"[UNLOCK ERROR] {e}")
+        self.locked_ids = set()
+
+    def unlock_entity(self, wait=False):
+        """
+        Снимает все блокировки вкладки одним запросом. Выбор строки
+        сбрасывается сразу; wait=True — дождаться ответа (закрытие окна).
+        """
+        self.cancel_lock_renewal()
+        self.lock_request += 1  # ответы на ещё не обработанные захваты больше не нужны
+        if wait:
+            try:
+                background.run_now(self.release_locks)
+            except Exception as e:
+                print(f"[UNLOCK ERROR] {e}")
+        else:
+            background.submit(self.release_locks, serial=True)
+
+    def bind_paging(self, table):
+        """table — VirtualTreeview вкладки: выделение, перезагрузка списка"""
+        self.page_table = table
+
+    def load_first_page(self, action="загрузке данных"):
+        self.page_table.reload(on_error=lambda e: self.show_request_error(e, action))
+
+    def sync_page(self, action="обновлении данных"):
+        """Обновление вкладки: из сервера приходят только изменённые строки"""
+        self.page_table.refresh(on_error=lambda e: self.show_request_error(e, action))
+
+    def on_server_event(self, data):
+        """
+        Событие сервера (GET /events): чужие блокировки отмечаются в списке,
+        изменения записей подтягиваются через журнал изменений.
+        """
+        kind = data["event"]
+        if kind in ("lock", "unlock"):
+            if data["entity"] == self.entity_type and data["user"] != self.username:
+                self.page_table.set_row_lock(data["id"], kind == "lock", data.get("ttl"))
+            return
+        if kind == "change" and data["entity"] not in (self.entity_type, *self.related_entities):
+            return
+        if kind in ("reconnected", "resync"):
+            # Снятия блокировок могли пройти мимо; действующие придут с продлением
+            self.page_table.clear_locks()
+        if self.event_sync_job is None:
+            self.event_sync_job = self.frame.after(EVENT_SYNC_DELAY_MS, self.sync_from_events)
+
+    def sync_from_events(self):
+        self.event_sync_job = None
+        # Скрытая вкладка сверится при переключении на неё (refresh_data)
+        if self.frame.winfo_ismapped():
+            self.page_table.refresh(on_error=lambda e: print(f"[SYNC ERROR] {e}"))
 
     def on_tab_switch(self):
         self.unlock_entity()
@@ -62,6 +219,15 @@ class LockableTab:
         """
         pass
 
+    def fetch_report(self, path, on_done):
+        """Отчёт для экспорта грузится в фоне, диалог сохранения — по готовности"""
+        background.submit(
+            api.fetch_all, path, None, 5,
+            on_done=on_done,
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Сервер недоступен: {e}"),
+            key=f"{self.entity_type}:export",
+        )
+
     def export_to_json(self, data, default_filename):
         """Экспорт данных в JSON"""
         file_path = filedialog.asksaveasfilename(
@@ -1,12 +1,11 @@
+import json
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
-from requests.exceptions import Timeout, ConnectionError
 
+from .api_client import api
+from .background import background
 from .lockable_tab import LockableTab
-
-
-API_URL = "http://localhost:8000"
+from .virtual_tree import PagedSource, VirtualTreeview
 
 
 class OwnerTab(LockableTab):
@@ -24,7 +23,7 @@ class OwnerTab(LockableTab):
         )
         title.pack(anchor="w", pady=(0, 10))
 
-        self.tree = ttk.Treeview(
+        self.table = VirtualTreeview(
             self.frame,
             columns=(
                 "ID",
@@ -35,13 +34,16 @@ class OwnerTab(LockableTab):
                 "Адрес",
                 "Версия",
             ),
-            show="headings",
+            source=PagedSource("/owners", self.row_values),
         )
+        self.tree = self.table.tree
         for col in self.tree["columns"]:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=150, anchor="center")
-        self.tree.pack(fill="both", expand=True, pady=(0, 10))
-        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.table.bind_sort({"ID": "id", "Фамилия": "last_name"}, "last_name")
+        self.table.pack(fill="both", expand=True, pady=(0, 10))
+        self.table.bind_select(self.on_select)
+        self.bind_paging(self.table)
 
         form_frame = ttk.Frame(self.frame)
         form_frame.pack(fill="x", pady=10)
@@ -74,93 +76,63 @@ class OwnerTab(LockableTab):
 
         self.load_owners()
 
-    def load_owners(self):
-        self.tree.delete(*self.tree.get_children())
-        try:
-            response = requests.get(f"{API_URL}/owners", timeout=3)
-            if response.status_code == 200:
-                for row in response.json():
-                    self.tree.insert(
-                        "",
-                        "end",
-                        values=(
-                            row["id"],
-                            row["last_name"],
-                            row["first_name"],
-                            row["middle_name"],
-                            row["date_of_birth"],
-                            row["address"],
-                            row["version"],
-                        ),
-                    )
+    @staticmethod
+    def row_values(row):
+        return (
+            row["id"],
+            row["last_name"],
+            row["first_name"],
+            row["middle_name"],
+            row["date_of_birth"],
+            row["address"],
+            row["version"],
+        )
 
-            else:
-                messagebox.showerror(
-                    "Ошибка", f"Не удалось загрузить владельцев: {response.status_code}"
-                )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при загрузке владельцов)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+    def load_owners(self):
+        self.load_first_page("загрузке владельцов")
 
     def on_select(self, event):
-        selected = self.tree.selection()
-        if not selected or self.role not in ["admin", "inspector"]:
+        values = self.table.selected_values()
+        if not values or self.role not in ["admin", "inspector"]:
             return
 
-        # Сначала разблокируем предыдущую запись
-        if hasattr(self, "selected_id") and self.selected_id:
-            self.unlock_entity()
-
-        try:
-            values = self.tree.item(selected[0])["values"]
-            if len(values) < 7:
-                raise ValueError("Недостаточно данных в строке")
-
-            self.selected_id = values[0]
-
-            # Сначала блокируем, потом получаем актуальные данные
-            if not self.lock_entity():
-                self.selected_id = None
-                return
-
-            # Загружаем актуальные данные после блокировки
-            self.load_selected_owner_data()
-
-        except Exception as e:
+        if len(values) < 7:
             messagebox.showerror(
-                "Ошибка", f"Не удалось обработать выбранную строку: {e}"
+                "Ошибка", "Не удалось обработать выбранную строку: Недостаточно данных в строке"
             )
+            return
+
+        self.selected_id = values[0]
+
+        # Сначала блокируем все выделенные строки (предыдущие снимаются
+        # тем же запросом), потом получаем актуальные данные
+        self.lock_entity(self.selected_row_ids(), on_locked=self.load_selected_owner_data)
 
     def load_selected_owner_data(self):
         """Загружает актуальные данные выбранного владельца"""
-        try:
-            response = requests.get(f"{API_URL}/owners/{self.selected_id}", timeout=3)
-            if response.status_code == 200:
-                owner_data = response.json()
-                self.selected_version = owner_data["version"]
 
-                # Заполняем поля актуальными данными
-                self.entries["Фамилия"].delete(0, tk.END)
-                self.entries["Фамилия"].insert(0, owner_data["last_name"])
-                self.entries["Имя"].delete(0, tk.END)
-                self.entries["Имя"].insert(0, owner_data["first_name"])
-                self.entries["Отчество"].delete(0, tk.END)
-                self.entries["Отчество"].insert(0, owner_data["middle_name"])
-                self.entries["Дата рождения"].delete(0, tk.END)
-                self.entries["Дата рождения"].insert(0, owner_data["date_of_birth"])
-                self.entries["Адрес"].delete(0, tk.END)
-                self.entries["Адрес"].insert(0, owner_data["address"])
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут загрузке данных владельца)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить данные: {e}")
-            self.unlock_entity()
-            self.selected_id = None
+        def done(response):
+            if response.status_code != 200:
+                return
+            owner_data = response.json()
+            self.selected_version = owner_data["version"]
+
+            # Заполняем поля актуальными данными
+            self.entries["Фамилия"].delete(0, tk.END)
+            self.entries["Фамилия"].insert(0, owner_data["last_name"])
+            self.entries["Имя"].delete(0, tk.END)
+            self.entries["Имя"].insert(0, owner_data["first_name"])
+            self.entries["Отчество"].delete(0, tk.END)
+            self.entries["Отчество"].insert(0, owner_data["middle_name"])
+            self.entries["Дата рождения"].delete(0, tk.END)
+            self.entries["Дата рождения"].insert(0, owner_data["date_of_birth"])
+            self.entries["Адрес"].delete(0, tk.END)
+            self.entries["Адрес"].insert(0, owner_data["address"])
+
+        self.run_async(
+            api.get_one, "owners", self.selected_id,
+            on_done=done, action="загрузке данных владельца", key="detail",
+        )
 
     def add_owner(self):
         data = {
@@ -176,8 +148,7 @@ class OwnerTab(LockableTab):
             messagebox.showwarning("Поля", "Заполните все поля")
             return
 
-        try:
-            response = requests.post(f"{API_URL}/owners", json=data, timeout=3)
+        def done(response):
             if response.status_code == 201:
                 messagebox.showinfo("Успех", "Владелец добавлен")
                 self.load_owners()
@@ -193,26 +164,13 @@ class OwnerTab(LockableTab):
                 messagebox.showerror(
                     "Ошибка", f"Не удалось добавить владельца: {response.status_code}"
                 )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при добавлении владельца)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+
+        self.run_async(api.create, "owners", data, on_done=done, action="добавлении владельца")
 
     def update_owner(self):
         if not self.selected_id:
             messagebox.showwarning("Выбор", "Выберите владельца для редактирования")
             return
-        # try:
-        #     check_response = requests.get(f"{API_URL}/owners/{self.selected_id}", timeout=3)
-        #     if check_response.status_code == 200:
-        #         owner_data = check_response.json()
-        #         if owner_data.get("locked_by") != self.username:
-        #             messagebox.showerror("Ошибка", "Вы потеряли блокировку записи")
-        #             return
-        # except:
-        #     pass
         data = {
             "last_name": self.entries["Фамилия"].get().strip(),
             "first_name": self.entries["Имя"].get().strip(),
@@ -227,12 +185,10 @@ class OwnerTab(LockableTab):
             messagebox.showwarning("Поля", "Заполните все поля")
             return
 
-        try:
-            response = requests.put(f"{API_URL}/owners/{self.selected_id}", json=data, timeout=3)
+        def done(response):
             if response.status_code == 200:
                 messagebox.showinfo("Успех", "Данные владельца обновлены")
                 self.load_owners()
-                self.unlock_entity()
                 self.clear_form()
             elif response.status_code == 404:
                 messagebox.showerror("Ошибка", "Владелец не найден")
@@ -250,12 +206,11 @@ class OwnerTab(LockableTab):
                 messagebox.showerror(
                     "Ошибка", f"Не удалось обновить владельца: {response.status_code}"
                 )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при обновлении владельца)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+
+        self.run_async(
+            api.update, "owners", self.selected_id, data,
+            on_done=done, action="обновлении владельца",
+        )
 
     def clear_form(self):
         self.unlock_entity()
@@ -265,15 +220,16 @@ class OwnerTab(LockableTab):
             entry.delete(0, tk.END)
 
     def refresh_data(self):
-        self.load_owners()
+        self.sync_page()
         
         
     def export_owners_json(self):
-        try:
-            response = requests.get(f"{API_URL}/reports/owners", timeout=5)
-            if response.status_code == 200:
-                self.export_to_json(response.json(), "owners_report.json")
-            else:
-                messagebox.showerror("Ошибка", f"Не удалось получить данные: {response.status_code}")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Сервер недоступен: {e}")
\ No newline at end of file
+        def fetch():
+            return [json.loads(line) for line in api.stream_lines("/reports/owners/stream")]
+
+        background.submit(
+            fetch,
+            on_done=lambda data: self.export_to_json(data, "owners_report.json"),
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Сервер недоступен: {e}"),
+            key="owner:export",
+        )
\ No newline at end of file
@@ -1,14 +1,15 @@
 import tkinter as tk
+import datetime
 from tkinter import ttk, messagebox
-import requests
-from requests.exceptions import Timeout, ConnectionError
+from .api_client import api
 from .lockable_tab import LockableTab
-
-
-API_URL = "http://localhost:8000"
+from .quick_search import SearchCompletion, owner_short_name
+from .virtual_tree import PagedSource, VirtualTreeview
 
 
 class ProtocolTab(LockableTab):
+    related_entities = ("vehicle", "owner", "inspector", "violation")
+
     def __init__(self, parent, username, role):
         super().__init__("protocol", username)
         self.selected_version = None
@@ -23,7 +24,27 @@ class ProtocolTab(LockableTab):
         )
         title.pack(anchor="w", pady=(0, 10))
 
-        self.tree = ttk.Treeview(
+        filter_frame = ttk.Frame(self.frame)
+        filter_frame.pack(fill="x", pady=(0, 10))
+
+        ttk.Label(filter_frame, text="Период с").pack(side="left", padx=(0, 5))
+        self.date_from = ttk.Entry(filter_frame, width=12)
+        self.date_from.pack(side="left", padx=(0, 5))
+        ttk.Label(filter_frame, text="по").pack(side="left", padx=(0, 5))
+        self.date_to = ttk.Entry(filter_frame, width=12)
+        self.date_to.pack(side="left", padx=(0, 10))
+        for entry in (self.date_from, self.date_to):
+            entry.bind("<Return>", lambda e: self.apply_filter())
+
+        ttk.Button(filter_frame, text="🔍 Применить", command=self.apply_filter).pack(
+            side="left", padx=(0, 5)
+        )
+        ttk.Button(filter_frame, text="🔄 Показать все", command=self.reset_filter).pack(
+            side="left"
+        )
+        self.period = {}
+
+        self.table = VirtualTreeview(
             self.frame,
             columns=(
                 "ID",
@@ -36,8 +57,9 @@ class ProtocolTab(LockableTab):
                 "Нарушение",
                 "Версия",
             ),
-            show="headings",
+            source=PagedSource("/protocols", self.row_values, self.filter_params),
         )
+        self.tree = self.table.tree
         for col in self.tree["columns"]:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=150, anchor="center")
@@ -45,9 +67,11 @@ class ProtocolTab(LockableTab):
         # Скрываем колонку ID
         self.tree.column("ID", width=0, stretch=False)
         self.tree.heading("ID", text="")
+        self.table.bind_sort({"Номер": "number", "Дата": "issue_date"}, "issue_date")
 
-        self.tree.pack(fill="both", expand=True, pady=(0, 10))
-        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.table.pack(fill="both", expand=True, pady=(0, 10))
+        self.table.bind_select(self.on_select)
+        self.bind_paging(self.table)
 
         form_frame = ttk.Frame(self.frame)
         form_frame.pack(fill="x", pady=10)
@@ -76,6 +100,10 @@ class ProtocolTab(LockableTab):
         self.inspector_cb.grid(row=1, column=5, padx=5)
         ttk.Label(form_frame, text="Инспектор").grid(row=0, column=5, padx=5)
 
+        # ТС и владельцев слишком много для списка — подсказки по мере ввода
+        SearchCompletion(self.vehicle_cb, "vehicle", lambda hit: hit["title"])
+        SearchCompletion(self.owner_cb, "owner", owner_short_name)
+
         self.violation_cb = ttk.Combobox(form_frame, width=30)
         self.violation_cb.grid(row=1, column=6, padx=5)
         ttk.Label(form_frame, text="Нарушение").grid(row=0, column=6, padx=5)
@@ -96,119 +124,108 @@ class ProtocolTab(LockableTab):
         self.load_data()
 
     def load_comboboxes(self):
-        try:
-            self.vehicle_cb["values"] = [
-                v["state_number"] for v in requests.get(f"{API_URL}/vehicles", timeout=3).json()
-            ]
-            self.owner_cb["values"] = [
-                f"{o['last_name']} {o['first_name']}"
-                for o in requests.get(f"{API_URL}/owners", timeout=3).json()
-            ]
+        def fetch():
+            return api.fetch_all("/inspectors"), api.fetch_all("/violations")
+
+        def done(result):
+            inspectors, violations = result
             self.inspector_cb["values"] = [
-                f"{i['last_name']} {i['first_name']}"
-                for i in requests.get(f"{API_URL}/inspectors", timeout=3).json()
-            ]
-            self.violation_cb["values"] = [
-                v["name"] for v in requests.get(f"{API_URL}/violations", timeout=3).json()
+                f"{i['last_name']} {i['first_name']}" for i in inspectors
             ]
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при загрузке справочников)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить справочники: {e}")
+            self.violation_cb["values"] = [v["name"] for v in violations]
+
+        self.run_async(fetch, on_done=done, action="загрузке справочников", key="comboboxes")
+
+    @staticmethod
+    def row_values(row):
+        return (
+            row["id"],
+            row["number"],
+            row["issue_date"],
+            row["issue_time"],
+            row["vehicle"],
+            row["owner"],
+            row["inspector"],
+            row["violation"],
+            row["version"],
+        )
+
+    def filter_params(self):
+        return self.period
+
+    def apply_filter(self):
+        """Период отбирается на сервере: в список приходят только его протоколы"""
+        period = {}
+        for param, entry in (("issue_date_from", self.date_from), ("issue_date_to", self.date_to)):
+            value = entry.get().strip()
+            if not value:
+                continue
+            try:
+                period[param] = datetime.date.fromisoformat(value).isoformat()
+            except ValueError:
+                messagebox.showerror("Ошибка", f"Дата должна быть в формате ГГГГ-ММ-ДД: {value}")
+                return
+        self.period = period
+        self.load_data()
+
+    def reset_filter(self):
+        self.date_from.delete(0, tk.END)
+        self.date_to.delete(0, tk.END)
+        self.period = {}
+        self.load_data()
 
     def load_data(self):
-        self.tree.delete(*self.tree.get_children())
-        try:
-            response = requests.get(f"{API_URL}/protocols", timeout=3)
-            for row in response.json():
-                self.tree.insert(
-                    "",
-                    "end",
-                    values=(
-                        row["id"],
-                        row["number"],
-                        row["issue_date"],
-                        row["issue_time"],
-                        row["vehicle"],
-                        row["owner"],
-                        row["inspector"],
-                        row["violation"],
-                        row["version"],
-                    ),
-                )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при загрузке протоколов)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить протоколы: {e}")
+        self.load_first_page("загрузке протоколов")
 
     def on_select(self, event):
-        selected = self.tree.selection()
-        if not selected or self.role not in ["admin", "inspector"]:
+        values = self.table.selected_values()
+        if not values or self.role not in ["admin", "inspector"]:
             return
 
-        # Сначала разблокируем предыдущую запись
-        if hasattr(self, "selected_id") and self.selected_id:
-            self.unlock_entity()
-
-        try:
-            values = self.tree.item(selected[0])["values"]
-            if len(values) < 9:  # Теперь 9 колонок
-                raise ValueError("Недостаточно данных в строке")
-
-            self.selected_id = values[0]  # ← Теперь это ID (число)
-
-            # Сначала блокируем, потом получаем актуальные данные
-            if not self.lock_entity():
-                self.selected_id = None
-                return
-
-            # Загружаем актуальные данные после блокировки
-            self.load_selected_protocol_data()
-
-        except Exception as e:
+        if len(values) < 9:  # Теперь 9 колонок
             messagebox.showerror(
-                "Ошибка", f"Не удалось обработать выбранную строку: {e}"
+                "Ошибка", "Не удалось обработать выбранную строку: Недостаточно данных в строке"
             )
+            return
+
+        self.selected_id = values[0]  # ← Теперь это ID (число)
+
+        # Сначала блокируем все выделенные строки (предыдущие снимаются
+        # тем же запросом), потом получаем актуальные данные
+        self.lock_entity(self.selected_row_ids(), on_locked=self.load_selected_protocol_data)
 
     def load_selected_protocol_data(self):
         """Загружает актуальные данные выбранного протокола"""
-        try:
-            response = requests.get(f"{API_URL}/protocols/{self.selected_id}", timeout=3)
-            if response.status_code == 200:
-                protocol_data = response.json()
-                self.selected_version = protocol_data["version"]
-
-                # Заполняем поля актуальными данными
-                self.entries["Номер"].delete(0, tk.END)
-                self.entries["Номер"].insert(0, protocol_data["number"])
-                self.entries["Дата"].delete(0, tk.END)
-                self.entries["Дата"].insert(0, protocol_data["issue_date"])
-                self.entries["Время"].delete(0, tk.END)
-                self.entries["Время"].insert(0, protocol_data["issue_time"])
-                self.vehicle_cb.set(protocol_data["vehicle"])
-                self.owner_cb.set(protocol_data["owner"])
-                self.inspector_cb.set(protocol_data["inspector"])
-                self.violation_cb.set(protocol_data["violation"])
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при загрузке протокола)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить данные: {e}")
-            self.unlock_entity()
-            self.selected_id = None
+
+        def done(response):
+            if response.status_code != 200:
+                return
+            protocol_data = response.json()
+            self.selected_version = protocol_data["version"]
+
+            # Заполняем поля актуальными данными
+            self.entries["Номер"].delete(0, tk.END)
+            self.entries["Номер"].insert(0, protocol_data["number"])
+            self.entries["Дата"].delete(0, tk.END)
+            self.entries["Дата"].insert(0, protocol_data["issue_date"])
+            self.entries["Время"].delete(0, tk.END)
+            self.entries["Время"].insert(0, protocol_data["issue_time"])
+            self.vehicle_cb.set(protocol_data["vehicle"])
+            self.owner_cb.set(protocol_data["owner"])
+            self.inspector_cb.set(protocol_data["inspector"])
+            self.violation_cb.set(protocol_data["violation"])
+
+        self.run_async(
+            api.get_one, "protocols", self.selected_id,
+            on_done=done, action="загрузке протокола", key="detail",
+        )
 
     def add_protocol(self):
         data = self.collect_data()
         if not data:
             return
 
-        try:
-            response = requests.post(f"{API_URL}/protocols", json=data, timeout=3)
+        def done(response):
             if response.status_code == 201:
                 messagebox.showinfo("Успех", "Протокол добавлен")
                 self.load_data()
@@ -226,12 +243,8 @@ class ProtocolTab(LockableTab):
                 messagebox.showerror(
                     "Ошибка", f"Не удалось добавить протокол: {response.status_code}"
                 )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при добавлении протокола)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+
+        self.run_async(api.create, "protocols", data, on_done=done, action="добавлении протокола")
 
     def update_protocol(self):
         if not self.selected_id:
@@ -242,15 +255,10 @@ class ProtocolTab(LockableTab):
         if not data:
             return
 
-        try:
-            # Используем ID вместо номера протокола
-            response = requests.put(
-                f"{API_URL}/protocols/{self.selected_id}", json=data, timeout=3
-            )
+        def done(response):
             if response.status_code == 200:
                 messagebox.showinfo("Успех", "Протокол обновлён")
                 self.load_data()
-                self.unlock_entity()
                 self.clear_form()
             elif response.status_code == 404:
                 messagebox.showerror("Ошибка", "Протокол не найден")
@@ -268,12 +276,12 @@ class ProtocolTab(LockableTab):
                 messagebox.showerror(
                     "Ошибка", f"Не удалось обновить протокол: {response.status_code}"
                 )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при обновлении протокола)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+
+        # Используем ID вместо номера протокола
+        self.run_async(
+            api.update, "protocols", self.selected_id, data,
+            on_done=done, action="обновлении протокола",
+        )
 
     def collect_data(self):
         number = self.entries["Номер"].get().strip()
@@ -317,4 +325,4 @@ class ProtocolTab(LockableTab):
         self.violation_cb.set("")
 
     def refresh_data(self):
-        self.load_data()
\ No newline at end of file
+        self.sync_page()
\ No newline at end of file
@@ -0,0 +1,152 @@
+import tkinter as tk
+from tkinter import ttk
+from .api_client import api
+from .background import background
+
+SEARCH_DELAY_MS = 250  # запрос уходит, когда пользователь перестал печатать
+MIN_QUERY_LENGTH = 2
+RESULTS_SHOWN = 15
+KIND_LABELS = {
+    "owner": "👤",
+    "vehicle": "🚘",
+    "protocol": "📄",
+    "violation": "⚠️",
+}
+
+
+class QuickSearch(ttk.Frame):
+    """
+    Строка быстрого поиска (GET /search): результаты появляются в списке
+    под полем по мере ввода. Enter или двойной щелчок — on_open(результат).
+    """
+
+    def __init__(self, parent, on_open):
+        super().__init__(parent)
+        self.on_open = on_open
+        self.hits = []
+        self.search_job = None
+
+        ttk.Label(self, text="🔍 Поиск").pack(side="left", padx=(0, 5))
+        self.entry = ttk.Entry(self, width=40)
+        self.entry.pack(side="left", fill="x", expand=True)
+        self.entry.bind("<KeyRelease>", self._on_key)
+        self.entry.bind("<Return>", lambda e: self._open(0))
+        self.entry.bind("<Down>", self._focus_results)
+        self.entry.bind("<Escape>", lambda e: self.hide())
+
+        # Список результатов — окно без рамки под полем ввода
+        self.popup = tk.Toplevel(self)
+        self.popup.overrideredirect(True)
+        self.popup.withdraw()
+        self.results = tk.Listbox(self.popup, height=RESULTS_SHOWN, activestyle="none")
+        self.results.pack(fill="both", expand=True)
+        self.results.bind("<Double-Button-1>", lambda e: self._open_selected())
+        self.results.bind("<Return>", lambda e: self._open_selected())
+        self.results.bind("<Escape>", lambda e: self.hide())
+
+    def _on_key(self, event):
+        if event.keysym in ("Return", "Down", "Up", "Escape"):
+            return
+        if self.search_job:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(SEARCH_DELAY_MS, self.search)
+
+    def search(self):
+        self.search_job = None
+        query = self.entry.get().strip()
+        if len(query) < MIN_QUERY_LENGTH:
+            self.hide()
+            return
+
+        def failed(e):
+            print(f"[SEARCH ERROR] {e}")
+
+        # Новый запрос отменяет ещё не пришедший ответ на предыдущий
+        background.submit(
+            api.search, query, RESULTS_SHOWN, on_done=self.show, on_error=failed, key="quick-search"
+        )
+
+    def show(self, hits):
+        self.hits = hits
+        self.results.delete(0, tk.END)
+        if not hits:
+            self.results.insert(tk.END, "Ничего не найдено")
+        for hit in hits:
+            line = f"{KIND_LABELS.get(hit['kind'], '')} {hit['title']}"
+            if hit["subtitle"]:
+                line += f" — {hit['subtitle']}"
+            self.results.insert(tk.END, line)
+        self.popup.geometry(
+            f"{self.entry.winfo_width()}x{self.results.winfo_reqheight()}"
+            f"+{self.entry.winfo_rootx()}+{self.entry.winfo_rooty() + self.entry.winfo_height()}"
+        )
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def hide(self):
+        self.popup.withdraw()
+
+    def _focus_results(self, event):
+        if self.hits and self.popup.winfo_viewable():
+            self.results.focus_set()
+            self.results.selection_clear(0, tk.END)
+            self.results.selection_set(0)
+            self.results.activate(0)
+
+    def _open_selected(self):
+        selection = self.results.curselection()
+        if selection:
+            self._open(selection[0])
+
+    def _open(self, index):
+        # Enter до прихода результатов не открывает устаревшую находку
+        if index >= len(self.hits) or not self.popup.winfo_viewable():
+            return
+        self.hide()
+        self.on_open(self.hits[index])
+
+
+class SearchCompletion:
+    """
+    Подсказки в Combobox по мере ввода (GET /search по одному виду) — для
+    больших таблиц (владельцы, ТС), которые нельзя выгрузить в values целиком.
+    to_value(результат) — строка, которая подставляется в поле.
+    """
+
+    def __init__(self, combobox, kind, to_value, limit=RESULTS_SHOWN):
+        self.combobox = combobox
+        self.kind = kind
+        self.to_value = to_value
+        self.limit = limit
+        self.search_job = None
+        combobox.bind("<KeyRelease>", self._on_key, add="+")
+
+    def _on_key(self, event):
+        if event.keysym in ("Return", "Down", "Up", "Escape", "Tab"):
+            return
+        if self.search_job:
+            self.combobox.after_cancel(self.search_job)
+        self.search_job = self.combobox.after(SEARCH_DELAY_MS, self.search)
+
+    def search(self):
+        self.search_job = None
+        query = self.combobox.get().strip()
+        if len(query) < MIN_QUERY_LENGTH:
+            self.combobox["values"] = []
+            return
+
+        def failed(e):
+            print(f"[SEARCH ERROR] {e}")
+
+        background.submit(
+            api.search, query, self.limit, (self.kind,),
+            on_done=self.show, on_error=failed, key=f"complete:{self.combobox}",
+        )
+
+    def show(self, hits):
+        self.combobox["values"] = list(dict.fromkeys(self.to_value(hit) for hit in hits))
+
+
+def owner_short_name(hit):
+    """«Фамилия Имя» из заголовка результата поиска владельца (ФИО)"""
+    return " ".join(hit["title"].split()[:2])
@@ -1,13 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
-from requests.exceptions import Timeout, ConnectionError
+from .api_client import api
+from .background import background
 from .lockable_tab import LockableTab
-
-API_URL = "http://localhost:8000"
+from .quick_search import SearchCompletion, owner_short_name
+from .virtual_tree import PagedSource, VirtualTreeview
 
 
 class VehicleTab(LockableTab):
+    related_entities = ("owner",)
+
     def __init__(self, parent, username, role):
         super().__init__("vehicle", username)
         self.selected_version = None
@@ -24,18 +26,21 @@ class VehicleTab(LockableTab):
         )
         title.pack(anchor="w", pady=(0, 10))
 
-        self.tree = ttk.Treeview(
+        self.table = VirtualTreeview(
             self.frame,
             columns=("ID", "Гос. номер", "Модель", "Цвет", "Владелец", "Версия"),
-            show="headings",
+            source=PagedSource("/vehicles", self.row_values),
         )
+        self.tree = self.table.tree
         for col in self.tree["columns"]:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=150, anchor="center")
         self.tree.column("ID", width=0, stretch=False)
         self.tree.heading("ID", text="")
-        self.tree.pack(fill="both", expand=True, pady=(0, 10))
-        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.table.bind_sort({"Гос. номер": "state_number"}, None)
+        self.table.pack(fill="both", expand=True, pady=(0, 10))
+        self.table.bind_select(self.on_select)
+        self.bind_paging(self.table)
 
         form_frame = ttk.Frame(self.frame)
         form_frame.pack(fill="x", pady=10)
@@ -55,6 +60,8 @@ class VehicleTab(LockableTab):
         ttk.Label(form_frame, text="Владелец").grid(row=0, column=3, padx=5)
         self.owner_cb = ttk.Combobox(form_frame, width=20)
         self.owner_cb.grid(row=1, column=3, padx=5)
+        # Владельцев слишком много для списка — подсказки по мере ввода
+        SearchCompletion(self.owner_cb, "owner", owner_short_name)
 
         btn_frame = ttk.Frame(self.frame)
         btn_frame.pack(pady=10)
@@ -74,94 +81,53 @@ class VehicleTab(LockableTab):
         self.load_vehicles()
 
     def load_comboboxes(self):
-        try:
-            models = requests.get(f"{API_URL}/vehicles/models", timeout=3).json()
-            self.model_cb["values"] = [f"{m['name']} ({m['brand']})" for m in models]
+        def fetch():
+            models = api.fetch_reference("/vehicles/models")
+            colors = api.fetch_reference("/vehicles/colors")
+            return models, colors
 
-            colors = requests.get(f"{API_URL}/vehicles/colors", timeout=3).json()
+        def done(result):
+            models, colors = result
+            self.model_cb["values"] = [f"{m['name']} ({m['brand']})" for m in models]
             self.color_cb["values"] = [c["name"] for c in colors]
 
-            owners_resp = requests.get(f"{API_URL}/owners", timeout=3)
-            if owners_resp.status_code == 200:
-                owners = owners_resp.json()
-                if isinstance(owners, list):
-                    self.owner_cb["values"] = [
-                        f"{o['last_name']} {o['first_name']}" for o in owners
-                    ]
-                else:
-                    raise ValueError("Ответ по владельцам не является списком")
-            else:
-                raise ValueError(f"Ошибка загрузки владельцев: {owners_resp.status_code}")
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при загрузке справочников)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except ValueError as e:
-            messagebox.showerror("Ошибка", f"Некорректные данные: {e}")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+        self.run_async(fetch, on_done=done, action="загрузке справочников", key="comboboxes")
+
+    @staticmethod
+    def row_values(row):
+        return (
+            row["id"],  # ← ID
+            row["state_number"],
+            row["model"],
+            row["color"],
+            row["owner"],
+            row["version"],
+        )
 
     def load_vehicles(self):
-        self.tree.delete(*self.tree.get_children())
-        try:
-            response = requests.get(f"{API_URL}/vehicles", timeout=3)
-            if response.status_code == 200:
-                for row in response.json():
-                    # Вставляем ID как первое значение
-                    self.tree.insert(
-                        "",
-                        "end",
-                        values=(
-                            row["id"],  # ← ID
-                            row["state_number"],
-                            row["model"],
-                            row["color"],
-                            row["owner"],
-                            row["version"],
-                        ),
-                    )
-            else:
-                messagebox.showerror("Ошибка", f"Не удалось загрузить ТС: {response.status_code}")
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при загрузке списка)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+        self.load_first_page("загрузке списка")
 
     def on_select(self, event):
-        selected = self.tree.selection()
-        if not selected or self.role not in ["admin", "inspector"]:
+        values = self.table.selected_values()
+        if not values or self.role not in ["admin", "inspector"]:
             return
 
-        # Сначала разблокируем предыдущую запись
-        if hasattr(self, "selected_id") and self.selected_id:
-            self.unlock_entity()
-
-        try:
-            values = self.tree.item(selected[0])["values"]
-            if len(values) < 6:  # Теперь 6 колонок
-                raise ValueError("Недостаточно данных в строке")
-
-            self.selected_id = values[0]  # ← Теперь это ID (число)
-
-            # Сначала блокируем, потом получаем актуальные данные
-            if not self.lock_entity():
-                self.selected_id = None
-                return
-
-            # Загружаем актуальные данные после блокировки
-            self.load_selected_vehicle_data()
-
-        except Exception as e:
+        if len(values) < 6:  # Теперь 6 колонок
             messagebox.showerror(
-                "Ошибка", f"Не удалось обработать выбранную строку: {e}"
+                "Ошибка", "Не удалось обработать выбранную строку: Недостаточно данных в строке"
             )
+            return
+
+        self.selected_id = values[0]  # ← Теперь это ID (число)
+
+        # Сначала блокируем все выделенные строки (предыдущие снимаются
+        # тем же запросом), потом получаем актуальные данные
+        self.lock_entity(self.selected_row_ids(), on_locked=self.load_selected_vehicle_data)
 
     def load_selected_vehicle_data(self):
         """Загружает актуальные данные выбранного ТС"""
-        try:
-            response = requests.get(f"{API_URL}/vehicles/{self.selected_id}", timeout=3)
+
+        def done(response):
             if response.status_code == 200:
                 vehicle_data = response.json()
                 self.selected_version = vehicle_data["version"]
@@ -177,19 +143,17 @@ class VehicleTab(LockableTab):
                 messagebox.showerror("Ошибка", f"Не удалось загрузить данные: {response.status_code}")
                 self.unlock_entity()
                 self.selected_id = None
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при загрузке данных)")
-            self.unlock_entity()
-            self.selected_id = None
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-            self.unlock_entity()
-            self.selected_id = None
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+
+        def failed(e):
+            self.show_request_error(e, "загрузке данных")
             self.unlock_entity()
             self.selected_id = None
 
+        background.submit(
+            api.get_one, "vehicles", self.selected_id,
+            on_done=done, on_error=failed, key="vehicle:detail",
+        )
+
     def add_vehicle(self):
         state_number = self.state_entry.get().strip()
         model_text = self.model_cb.get().strip()
@@ -221,27 +185,22 @@ class VehicleTab(LockableTab):
             "user": self.username,
         }
 
-        try:
-                response = requests.post(f"{API_URL}/vehicles", json=data, timeout=5)
-                if response.status_code == 201:
-                    messagebox.showinfo("Успех", "ТС добавлено")
-                    self.load_vehicles()
-                    self.clear_form()
-                elif response.status_code == 409:
-                    messagebox.showwarning("Конфликт", "ТС с таким номером уже существует")
-                elif response.status_code == 422:
-                    messagebox.showerror(
-                        "Ошибка валидации",
-                        str(response.json().get("detail", "Некорректные данные")),
-                    )
-                else:
-                    messagebox.showerror("Ошибка", f"Не удалось добавить ТС: {response.status_code}")
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при добавлении)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+        def done(response):
+            if response.status_code == 201:
+                messagebox.showinfo("Успех", "ТС добавлено")
+                self.load_vehicles()
+                self.clear_form()
+            elif response.status_code == 409:
+                messagebox.showwarning("Конфликт", "ТС с таким номером уже существует")
+            elif response.status_code == 422:
+                messagebox.showerror(
+                    "Ошибка валидации",
+                    str(response.json().get("detail", "Некорректные данные")),
+                )
+            else:
+                messagebox.showerror("Ошибка", f"Не удалось добавить ТС: {response.status_code}")
+
+        self.run_async(api.create, "vehicles", data, 5, on_done=done, action="добавлении")
 
     def update_vehicle(self):
         if not self.selected_id:
@@ -275,12 +234,10 @@ class VehicleTab(LockableTab):
             "version": self.selected_version,
         }
 
-        try:
-            response = requests.put(f"{API_URL}/vehicles/{self.selected_id}", json=data, timeout=3)
+        def done(response):
             if response.status_code == 200:
                 messagebox.showinfo("Успех", "ТС обновлено")
                 self.load_vehicles()
-                self.unlock_entity()
                 self.clear_form()
             elif response.status_code == 404:
                 messagebox.showerror("Ошибка", "ТС не найдено")
@@ -298,12 +255,11 @@ class VehicleTab(LockableTab):
                 messagebox.showerror(
                     "Ошибка", f"Не удалось обновить ТС: {response.status_code} "
                 )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при обновлении)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+
+        self.run_async(
+            api.update, "vehicles", self.selected_id, data,
+            on_done=done, action="обновлении",
+        )
 
     def delete_vehicle(self):
         if not self.selected_id:
@@ -316,14 +272,10 @@ class VehicleTab(LockableTab):
         if not confirm:
             return
 
-        try:
-            response = requests.delete(
-                f"{API_URL}/vehicles/{self.selected_id}?user={self.username}", timeout=3
-            )
+        def done(response):
             if response.status_code == 200:
                 messagebox.showinfo("Успех", "ТС удалено")
                 self.load_vehicles()
-                self.unlock_entity()
                 self.clear_form()
             
             elif response.status_code == 400:
@@ -342,12 +294,11 @@ class VehicleTab(LockableTab):
                 messagebox.showerror(
                     "Ошибка", f"Не удалось удалить ТС: {response.status_code}"
                 )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при удалении нарушения)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+
+        self.run_async(
+            api.delete, "vehicles", self.selected_id, self.username,
+            on_done=done, action="удалении",
+        )
 
     def clear_form(self):
         self.unlock_entity()
@@ -360,4 +311,4 @@ class VehicleTab(LockableTab):
 
 
     def refresh_data(self):
-        self.load_vehicles()
\ No newline at end of file
+        self.sync_page()
\ No newline at end of file
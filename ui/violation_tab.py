@@ -1,11 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
-from requests.exceptions import Timeout, ConnectionError
+from requests.exceptions import HTTPError
+from .api_client import api
+from .background import background
 from .lockable_tab import LockableTab
-
-
-API_URL = "http://localhost:8000"
+from .virtual_tree import PagedSource, VirtualTreeview
 
 
 class ViolationTab(LockableTab):
@@ -36,16 +35,18 @@ class ViolationTab(LockableTab):
         )
         reset_btn.pack(side="left")
 
-        self.tree = ttk.Treeview(
+        self.table = VirtualTreeview(
             self.frame,
             columns=("ID", "Нарушение", "Тип", "Статья", "Версия"),
-            show="headings",
+            source=PagedSource("/violations", self.row_values, self.filter_params),
         )
+        self.tree = self.table.tree
         for col in self.tree["columns"]:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=250, anchor="center")
-        self.tree.pack(fill="both", expand=True)
-        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.table.pack(fill="both", expand=True)
+        self.table.bind_select(self.on_select)
+        self.bind_paging(self.table)
 
         if self.role in ["admin", "inspector"]:
             self.build_admin_form()
@@ -83,125 +84,91 @@ class ViolationTab(LockableTab):
         ).pack(side="left", padx=5)
 
     def load_types(self):
-        try:
-            response = requests.get(f"{API_URL}/violations/violation-types", timeout=3)
-            if response.status_code == 200:
-                types = [t["name"] for t in response.json()]
-                self.type_cb["values"] = types
-            else:
+        def done(types):
+            self.type_cb["values"] = [t["name"] for t in types]
+
+        def failed(e):
+            if isinstance(e, HTTPError):
                 messagebox.showerror(
                     "Ошибка",
-                    f"Не удалось загрузить типы нарушений: {response.status_code}",
+                    f"Не удалось загрузить типы нарушений: {e.response.status_code}",
                 )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при загрузке типов нарушений)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
-
-    def load_data(self):
-        self.tree.delete(*self.tree.get_children())
-        try:
-            if self.type_cb.get():
-                response = requests.get(
-                    f"{API_URL}/violations", params={"type": self.type_cb.get()}, timeout=3
-                )
-            else:
-                response = requests.get(f"{API_URL}/violations", timeout=3)
-
-            if response.status_code == 200:
-                for row in response.json():
-                    self.tree.insert(
-                        "",
-                        "end",
-                        values=(
-                            row["id"],
-                            row["name"],
-                            row["type"],
-                            f"{row['article_number']} — {row['article_name']}",
-                            row["version"],
-                        ),
-                    )
-
             else:
-                messagebox.showerror(
-                    "Ошибка", f"Не удалось загрузить нарушения: {response.status_code}"
-                )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при загрузке списка нарушений)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
-
-    def on_select(self, event):
-        selected = self.tree.selection()
-        if not selected or self.role not in ["admin", "inspector"]:
-            return
+                self.show_request_error(e, "загрузке типов нарушений")
 
-        # Сначала разблокируем предыдущую запись
-        if hasattr(self, "selected_id") and self.selected_id:
-            self.unlock_entity()
+        background.submit(
+            api.fetch_reference, "/violations/violation-types",
+            on_done=done, on_error=failed, key="violation:types",
+        )
 
-        try:
-            values = self.tree.item(selected[0])["values"]
-            if len(values) < 5:
-                raise ValueError("Недостаточно данных в строке")
+    @staticmethod
+    def row_values(row):
+        return (
+            row["id"],
+            row["name"],
+            row["type"],
+            f"{row['article_number']} — {row['article_name']}",
+            row["version"],
+        )
 
-            self.selected_id = values[0]  # ID нарушения
+    def filter_params(self):
+        return {"type": self.type_cb.get()} if self.type_cb.get() else {}
 
-            # Сначала блокируем, потом получаем актуальные данные
-            if not self.lock_entity():
-                self.selected_id = None
-                return
+    def load_data(self):
+        self.load_first_page("загрузке списка нарушений")
 
-            # Загружаем актуальные данные после блокировки
-            self.load_selected_violation_data()
+    def on_select(self, event):
+        values = self.table.selected_values()
+        if not values or self.role not in ["admin", "inspector"]:
+            return
 
-        except Exception as e:
+        if len(values) < 5:
             messagebox.showerror(
-                "Ошибка", f"Не удалось обработать выбранную строку: {e}"
+                "Ошибка", "Не удалось обработать выбранную строку: Недостаточно данных в строке"
             )
+            return
+
+        self.selected_id = values[0]  # ID нарушения
+
+        # Сначала блокируем все выделенные строки (предыдущие снимаются
+        # тем же запросом), потом получаем актуальные данные
+        self.lock_entity(self.selected_row_ids(), on_locked=self.load_selected_violation_data)
 
     def load_selected_violation_data(self):
         """Загружает актуальные данные выбранного нарушения"""
-        try:
-            response = requests.get(f"{API_URL}/violations/{self.selected_id}",timeout=3)
-            if response.status_code == 200:
-                violation_data = response.json()
-                self.selected_version = violation_data["version"]
 
-                # Заполняем поля актуальными данными
-                self.entries["Нарушение"].delete(0, tk.END)
-                self.entries["Нарушение"].insert(0, violation_data["name"])
+        def done(response):
+            if response.status_code != 200:
+                return
+            violation_data = response.json()
+            self.selected_version = violation_data["version"]
 
-                self.entries["Тип"].delete(0, tk.END)
-                self.entries["Тип"].insert(0, violation_data["type"])
+            # Заполняем поля актуальными данными
+            self.entries["Нарушение"].delete(0, tk.END)
+            self.entries["Нарушение"].insert(0, violation_data["name"])
 
-                self.entries["Статья №"].delete(0, tk.END)
-                self.entries["Статья №"].insert(0, violation_data["article_number"])
+            self.entries["Тип"].delete(0, tk.END)
+            self.entries["Тип"].insert(0, violation_data["type"])
 
-                self.entries["Название статьи"].delete(0, tk.END)
-                self.entries["Название статьи"].insert(
-                    0, violation_data["article_name"]
-                )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при загрузке данных нарушения)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить данные: {e}")
-            self.unlock_entity()
-            self.selected_id = None
+            self.entries["Статья №"].delete(0, tk.END)
+            self.entries["Статья №"].insert(0, violation_data["article_number"])
+
+            self.entries["Название статьи"].delete(0, tk.END)
+            self.entries["Название статьи"].insert(
+                0, violation_data["article_name"]
+            )
+
+        self.run_async(
+            api.get_one, "violations", self.selected_id,
+            on_done=done, action="загрузке данных нарушения", key="detail",
+        )
 
     def add_violation(self):
         data = self.collect_data()
         if not data:
             return
 
-        try:
-            response = requests.post(f"{API_URL}/violations", json=data, timeout=3)
+        def done(response):
             if response.status_code == 201:
                 messagebox.showinfo("Успех", "Нарушение добавлено")
                 self.load_data()
@@ -217,12 +184,8 @@ class ViolationTab(LockableTab):
                 messagebox.showerror(
                     "Ошибка", f"Не удалось добавить нарушение: {response.status_code}"
                 )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при добавлении нарушения)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+
+        self.run_async(api.create, "violations", data, on_done=done, action="добавлении нарушения")
 
     def update_violation(self):
         if not self.selected_id:
@@ -233,14 +196,10 @@ class ViolationTab(LockableTab):
         if not data:
             return
 
-        try:
-            response = requests.put(
-                f"{API_URL}/violations/{self.selected_id}", json=data, timeout=3
-            )
+        def done(response):
             if response.status_code == 200:
                 messagebox.showinfo("Успех", "Нарушение обновлено")
                 self.load_data()
-                self.unlock_entity()
                 self.clear_form()
             elif response.status_code == 404:
                 messagebox.showerror("Ошибка", "Нарушение не найдено")
@@ -258,12 +217,11 @@ class ViolationTab(LockableTab):
                 messagebox.showerror(
                     "Ошибка", f"Не удалось обновить нарушение: {response.status_code}"
                 )
-        except Timeout:
-            messagebox.showerror("Ошибка", "Сервер не отвечает (таймаут при обновлении нарушения)")
-        except ConnectionError:
-            messagebox.showerror("Ошибка", "Нет подключения к серверу")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Неизвестная ошибка: {e}")
+
+        self.run_async(
+            api.update, "violations", self.selected_id, data,
+            on_done=done, action="обновлении нарушения",
+        )
 
     def collect_data(self):
         name = self.entries["Нарушение"].get().strip()
@@ -302,27 +260,18 @@ class ViolationTab(LockableTab):
 
 
     def refresh_data(self):
-        self.load_data()
+        self.sync_page()
         
     
     def export_violation_json(self):
-        try:
-            response = requests.get(f"{API_URL}/reports/violations", timeout=5)
-            if response.status_code == 200:
-                self.export_to_json(response.json(), "violations_report.json")
-            else:
-                messagebox.showerror("Ошибка", f"Не удалось получить данные: {response.status_code}")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Сервер недоступен: {e}")
+        self.fetch_report(
+            "/reports/violations",
+            lambda data: self.export_to_json(data, "violations_report.json"),
+        )
 
     def export_violation_excel(self):
-        try:
-            response = requests.get(f"{API_URL}/reports/violations", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                columns = ["id", "Название", "Тип нарушения", "Создано"]
-                self.export_to_excel(data, "violations_report.xlsx", columns)
-            else:
-                messagebox.showerror("Ошибка", f"Не удалось получить данные: {response.status_code}")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Сервер недоступен: {e}")
\ No newline at end of file
+        columns = ["id", "Название", "Тип нарушения", "Создано"]
+        self.fetch_report(
+            "/reports/violations",
+            lambda data: self.export_to_excel(data, "violations_report.xlsx", columns),
+        )
@@ -0,0 +1,414 @@
+import time
+from collections import OrderedDict
+from tkinter import ttk
+from .api_client import api
+from .background import background
+
+PAGE_SIZE = 100
+CACHED_PAGES = 10  # страниц в памяти; остальные при возврате запрашиваются заново
+PREFETCH_SCREENS = 1  # сколько экранов строк подгружать выше и ниже видимого окна
+WHEEL_ROWS = 3
+DEFAULT_ROW_HEIGHT = 20
+LOCKED_TAG = "locked"
+LOCKED_FOREGROUND = "#b03030"  # строки, которые редактирует другой пользователь
+
+
+class PagedSource:
+    """
+    Список сервера по keyset-страницам. Хранятся курсоры всех пройденных
+    страниц (по ним любая страница запрашивается заново) и только последние
+    CACHED_PAGES страниц строк — память не зависит от размера списка.
+    Все страницы, кроме последней, полные, поэтому номер строки однозначно
+    задаёт страницу и смещение в ней.
+
+    sync() применяет журнал изменений сервера (GET <path>/changes): правки
+    строк в памяти подставляются на место. Позиция новых строк в порядке
+    сортировки известна только серверу, поэтому вставка или удаление
+    показанной строки требуют перезагрузки — только видимого окна.
+    """
+
+    def __init__(self, path, row_values, params=None, page_size=PAGE_SIZE, cached_pages=CACHED_PAGES):
+        self.path = path
+        self.row_values = row_values
+        self.params = params or (lambda: {})
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        self.generation = 0  # ответы на запросы прежнего поколения отбрасываются
+        self.sort = None  # значение sort для сервера; None — порядок по умолчанию
+        self.reset()
+
+    def reset(self):
+        self.generation += 1
+        self.cursors = [None]  # cursors[i] — курсор страницы i
+        self.pages = OrderedDict()  # номер страницы -> значения строк, LRU
+        self.pending = set()
+        self.total = None  # известно, когда получена последняя страница
+        self.watermark = None  # since для журнала изменений
+
+    def invalidate(self, watermark):
+        """
+        Забыть загруженные строки, сохранив курсоры: окно перечитывается на
+        прежнем месте. Курсор — ключ строки, а не её номер, поэтому после
+        вставок и удалений он остаётся верной границей страницы.
+        """
+        self.generation += 1
+        self.pages.clear()
+        self.pending = set()
+        self.watermark = watermark
+
+    def estimated_count(self):
+        """Точное число строк, если дошли до конца, иначе — по известным страницам"""
+        if self.total is not None:
+            return self.total
+        return len(self.cursors) * self.page_size
+
+    def row(self, index):
+        """Значения строки или None, если её страница не загружена"""
+        page_no, offset = divmod(index, self.page_size)
+        page = self.pages.get(page_no)
+        if page is None:
+            return None
+        self.pages.move_to_end(page_no)
+        return page[offset] if offset < len(page) else None
+
+    def request(self, page_no, on_loaded, on_error):
+        """Запросить страницу в фоне, если её нет в памяти и курсор известен"""
+        if page_no in self.pages or page_no in self.pending or page_no >= len(self.cursors):
+            return
+        self.pending.add(page_no)
+        generation = self.generation
+        cursor = self.cursors[page_no]
+        # Отметка берётся до чтения первой страницы: изменения, сделанные
+        # во время загрузки, придут в следующем sync()
+        need_watermark = self.watermark is None and page_no == 0
+
+        def fetch(cursor, params):
+            watermark = api.fetch_changes(self.path)["watermark"] if need_watermark else None
+            return api.fetch_page(self.path, cursor, params, self.page_size), watermark
+
+        def done(result):
+            if generation != self.generation:
+                return
+            self.pending.discard(page_no)
+            if self.cursors[page_no] != cursor:
+                # Предыдущая страница перечитана и её граница сдвинулась:
+                # страница запросится заново с новым курсором
+                on_loaded()
+                return
+            (rows, next_cursor), watermark = result
+            if watermark:
+                self.watermark = watermark
+            self.pages[page_no] = [self.row_values(row) for row in rows]
+            while len(self.pages) > self.cached_pages:
+                self.pages.popitem(last=False)
+            if next_cursor:
+                if page_no + 1 < len(self.cursors):
+                    if self.cursors[page_no + 1] != next_cursor:
+                        self.cursors[page_no + 1] = next_cursor
+                        self.pages.pop(page_no + 1, None)
+                else:
+                    self.cursors.append(next_cursor)
+                if self.total is not None and self.total <= (page_no + 1) * self.page_size:
+                    self.total = None  # за время просмотра добавились строки
+            else:
+                del self.cursors[page_no + 1:]
+                for stale in [n for n in self.pages if n > page_no]:
+                    del self.pages[stale]
+                self.total = page_no * self.page_size + len(rows)
+            on_loaded()
+
+        def failed(e):
+            if generation != self.generation:
+                return
+            self.pending.discard(page_no)
+            on_error(page_no, e)
+
+        params = dict(self.params())
+        if self.sort:
+            params["sort"] = self.sort
+        background.submit(fetch, cursor, params, on_done=done, on_error=failed)
+
+    def sync(self, on_done, on_error):
+        """
+        Применить изменения после watermark. on_done(True) — строки в памяти
+        обновлены, on_done(False) — загруженные строки сброшены, видимое
+        окно нужно перечитать.
+        """
+        generation = self.generation
+
+        def done(feed):
+            if generation != self.generation:
+                return
+            applied = self.apply_changes(feed)
+            if not applied:
+                self.invalidate(feed["watermark"])
+            on_done(applied)
+
+        def failed(e):
+            if generation == self.generation:
+                on_error(e)
+
+        background.submit(
+            api.fetch_changes, self.path, self.watermark,
+            on_done=done, on_error=failed, key=f"{self.path}:sync",
+        )
+
+    def apply_changes(self, feed):
+        if not feed["complete"]:
+            return False
+        cached = {}
+        for page in self.pages.values():
+            for offset, values in enumerate(page):
+                cached[values[0]] = (page, offset)
+        if feed["created"] or any(row_id in cached for row_id in feed["deleted"]):
+            return False
+        for row in feed["changed"]:
+            values = self.row_values(row)
+            if values[0] in cached:
+                page, offset = cached[values[0]]
+                page[offset] = values
+        self.watermark = feed["watermark"]
+        return True
+
+
+class VirtualTreeview(ttk.Frame):
+    """
+    Таблица с виртуальной прокруткой: в Treeview ровно столько строк,
+    сколько помещается на экране, при прокрутке в них подставляются
+    значения из PagedSource. Выделение хранится по ID (первая колонка),
+    поэтому переживает прокрутку и перезагрузку страниц. Так же по ID
+    хранятся чужие блокировки — строки с ними выделены цветом.
+    """
+
+    def __init__(self, parent, columns, source, **tree_options):
+        super().__init__(parent)
+        self.source = source
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", **tree_options)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.top = 0  # индекс строки в первой ячейке окна
+        self.visible = int(self.tree.cget("height"))
+        self.slots = []  # строки Treeview, переиспользуются при прокрутке
+        self.slot_values = {}  # iid -> значения загруженной строки
+        self.selected_ids = set()
+        self.sorts = {}  # колонка -> значение sort сервера
+        self.heading_texts = {}
+        self.locks = {}  # ID -> момент истечения аренды (time.monotonic)
+        self.on_select = None
+        self.on_error = None
+        self._expected_selection = set()
+        self._selection_changed = False
+
+        self.tree.tag_configure(LOCKED_TAG, foreground=LOCKED_FOREGROUND)
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<Configure>", self._on_configure)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_mousewheel)
+        for sequence in ("<Up>", "<Down>", "<Prior>", "<Next>"):
+            self.tree.bind(sequence, self._on_key)
+
+    def bind_sort(self, sorts, default):
+        """
+        sorts — колонка -> значение sort сервера. Щелчок по заголовку
+        сортирует по колонке, повторный — в обратном порядке.
+        """
+        self.sorts = sorts
+        self.source.sort = default
+        self.heading_texts = {column: self.tree.heading(column, "text") for column in sorts}
+        for column in sorts:
+            self.tree.heading(column, command=lambda c=column: self._on_heading(c))
+        self._update_headings()
+
+    def _on_heading(self, column):
+        name = self.sorts[column]
+        self.source.sort = f"-{name}" if self.source.sort == name else name
+        self._update_headings()
+        self.reload(self.on_error)
+
+    def _update_headings(self):
+        for column, name in self.sorts.items():
+            arrow = {name: " ▲", f"-{name}": " ▼"}.get(self.source.sort, "")
+            self.tree.heading(column, text=self.heading_texts[column] + arrow)
+
+    def bind_select(self, callback):
+        """callback(event) — только когда пользователь сменил выделение"""
+        self.on_select = callback
+
+    def reload(self, on_error=None):
+        """Начать список заново (обновление, смена фильтра)"""
+        self.on_error = on_error
+        self.source.reset()
+        self.top = 0
+        self.selected_ids = set()
+        self.render()
+
+    def refresh(self, on_error=None):
+        """
+        Обновление без повторной загрузки: только изменения с прошлого
+        раза. Если их не применить на месте — перечитывается видимое окно,
+        позиция прокрутки и выделение сохраняются.
+        """
+        if self.source.watermark is None:
+            self.reload(on_error)
+            return
+
+        def done(applied):
+            self.render()
+
+        def failed(error):
+            if on_error:
+                on_error(error)
+
+        self.on_error = on_error
+        self.source.sync(done, failed)
+
+    def set_row_lock(self, row_id, locked, ttl=None):
+        """
+        Отметить строку как заблокированную другим пользователем. Отметка
+        гаснет через ttl секунд, если блокировку не продлят.
+        """
+        if locked:
+            self.locks[row_id] = time.monotonic() + ttl
+            self.after(int(ttl * 1000) + 100, self._expire_locks)
+        elif self.locks.pop(row_id, None) is None:
+            return
+        if row_id in self._visible_ids():
+            self.render()
+
+    def clear_locks(self):
+        self.locks = {}
+        self.render()
+
+    def _expire_locks(self):
+        now = time.monotonic()
+        expired = [row_id for row_id, expires_at in self.locks.items() if expires_at <= now]
+        for row_id in expired:
+            del self.locks[row_id]
+        if self._visible_ids() & set(expired):
+            self.render()
+
+    def _visible_ids(self):
+        return {values[0] for values in self.slot_values.values()}
+
+    def selected_values(self):
+        """Значения первой выделенной видимой строки или None"""
+        for iid in self.tree.selection():
+            if iid in self.slot_values:
+                return self.slot_values[iid]
+        return None
+
+    def select_ids(self, ids):
+        """Выделить строки по ID, не вызывая on_select"""
+        self.selected_ids = set(ids)
+        self.render()
+
+    def scroll_to(self, top):
+        self.top = top
+        self.render()
+
+    def render(self):
+        self._adopt_user_selection()
+        count = self.source.estimated_count()
+        self.top = max(0, min(self.top, count - self.visible))
+        needed = max(0, min(self.visible, count - self.top))
+        while len(self.slots) < needed:
+            self.slots.append(self.tree.insert("", "end", values=()))
+        while len(self.slots) > needed:
+            self.tree.delete(self.slots.pop())
+
+        self.slot_values = {}
+        selection = []
+        for offset, iid in enumerate(self.slots):
+            values = self.source.row(self.top + offset)
+            # Пустая ячейка — страница ещё грузится
+            locked = values is not None and values[0] in self.locks
+            self.tree.item(iid, values=values or (), tags=(LOCKED_TAG,) if locked else ())
+            if values is not None:
+                self.slot_values[iid] = values
+                if values[0] in self.selected_ids:
+                    selection.append(iid)
+
+        self._expected_selection = set(selection)
+        if set(self.tree.selection()) != self._expected_selection:
+            self.tree.selection_set(selection)
+        self.tree.yview_moveto(0)
+        self._update_scrollbar(count)
+        self._request_window()
+
+    def _request_window(self):
+        margin = self.visible * PREFETCH_SCREENS
+        first = max(0, self.top - margin) // self.source.page_size
+        last = (self.top + self.visible + margin) // self.source.page_size
+        for page_no in range(first, last + 1):
+            self.source.request(page_no, self.render, self._on_page_error)
+
+    def _on_page_error(self, page_no, error):
+        if page_no == 0 and self.on_error:
+            self.on_error(error)
+        else:
+            print(f"[PAGE ERROR] {self.source.path}, страница {page_no}: {error}")
+
+    def _update_scrollbar(self, count):
+        if count <= 0:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / count, min(1.0, (self.top + len(self.slots)) / count))
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(value) * self.source.estimated_count()))
+        elif action == "scroll":
+            step = int(value) * (self.visible if unit == "pages" else 1)
+            self.scroll_to(self.top + step)
+
+    def _on_mousewheel(self, event):
+        up = event.num == 4 or event.delta > 0
+        self.scroll_to(self.top - WHEEL_ROWS if up else self.top + WHEEL_ROWS)
+        return "break"
+
+    def _on_key(self, event):
+        # Внутри окна стрелки работают как обычно, на краю — прокручивают список
+        focus = self.tree.focus()
+        if focus not in self.slots:
+            return None
+        index = self.slots.index(focus)
+        step = {"Up": -1, "Down": 1, "Prior": -self.visible, "Next": self.visible}[event.keysym]
+        if event.keysym in ("Up", "Down") and 0 <= index + step < len(self.slots):
+            return None
+        self.scroll_to(self.top + step)
+        if focus in self.slots:
+            self.tree.focus(focus)
+            self.tree.selection_set(focus)
+        return "break"
+
+    def _on_configure(self, event):
+        try:
+            row_height = int(ttk.Style().lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT)
+        except ValueError:
+            row_height = DEFAULT_ROW_HEIGHT
+        bbox = self.tree.bbox(self.slots[0]) if self.slots else None
+        header = bbox[1] if bbox else row_height
+        visible = max(1, (event.height - header) // row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def _adopt_user_selection(self):
+        # Выделение в Treeview отличается от выставленного при отрисовке —
+        # значит, его сменил пользователь
+        selection = set(self.tree.selection())
+        if selection == self._expected_selection:
+            return
+        self.selected_ids = {self.slot_values[iid][0] for iid in selection if iid in self.slot_values}
+        self._expected_selection = selection
+        self._selection_changed = True
+
+    def _on_tree_select(self, event):
+        self._adopt_user_selection()
+        if not self._selection_changed:
+            return  # выделение восстановлено после прокрутки
+        self._selection_changed = False
+        if self.selected_ids and self.on_select:
+            self.on_select(event)